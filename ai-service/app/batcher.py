@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Set, Tuple
+import asyncio
+
+BatchFn = Callable[[List[str]], List[Dict]]
+
+
+class MicroBatcher:
+    # Single requests that arrive within `max_wait_seconds` of each other are evaluated as one batch;
+    # each batch runs on the worker pool so several batches can be in flight during a burst.
+    def __init__(self, fn: BatchFn, executor: Executor, max_batch: int, max_wait_seconds: float) -> None:
+        self.fn = fn
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._batch: List[Tuple[str, asyncio.Future]] = []
+        self._inflight: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Drain whatever was still queued or half-collected while the pool is alive, so no submitter is left waiting.
+        pending, self._batch = self._batch, []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for i in range(0, len(pending), self.max_batch):
+            self._spawn(pending[i : i + self.max_batch])
+        if self._inflight:
+            await asyncio.gather(*self._inflight)
+
+    async def submit(self, text: str) -> Dict:
+        if self._task is None:
+            raise RuntimeError("batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def evaluate(self, texts: List[str]) -> List[Dict]:
+        # Explicit batches are split across the pool in chunks of `max_batch`.
+        loop = asyncio.get_running_loop()
+        chunks = [texts[i : i + self.max_batch] for i in range(0, len(texts), self.max_batch)]
+        results = await asyncio.gather(*(loop.run_in_executor(self.executor, self.fn, chunk) for chunk in chunks))
+        return [result for chunk in results for result in chunk]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch.append(await self._queue.get())
+            deadline = loop.time() + self.max_wait_seconds
+            while len(self._batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._batch = self._batch, []
+            self._spawn(batch)
+
+    def _spawn(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        task = asyncio.create_task(self._dispatch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.fn, [text for text, _ in batch]
+            )
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -1,20 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List
+import os
+
 from fastapi import FastAPI
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.batcher import MicroBatcher
+from app.triage_llm import triage_llm, triage_llm_batch
+
+BATCH_MAX_SIZE = int(os.getenv("TRIAGE_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("TRIAGE_BATCH_MAX_WAIT_MS", "5"))
+BATCH_WORKERS = int(os.getenv("TRIAGE_BATCH_WORKERS", str(os.cpu_count() or 1)))
+BATCH_LIMIT = int(os.getenv("TRIAGE_BATCH_LIMIT", "512"))
+
+batcher: MicroBatcher | None = None
+
 
-from app.triage_llm import triage_llm
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global batcher
+    with ProcessPoolExecutor(max_workers=BATCH_WORKERS) as executor:
+        batcher = MicroBatcher(triage_llm_batch, executor, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS / 1000.0)
+        batcher.start()
+        yield
+        await batcher.stop()
+        batcher = None
 
-app = FastAPI(title="AI Triage Service")
+
+app = FastAPI(title="AI Triage Service", lifespan=lifespan)
 
 
 class TriagePayload(BaseModel):
     complaint_text: str
 
 
+class TriageBatchPayload(BaseModel):
+    complaint_texts: List[str] = Field(min_length=1, max_length=BATCH_LIMIT)
+
+
 @app.get("/")
 def health():
-    return {"status": "ok", "service": "ai-triage"}
+    return {
+        "status": "ok",
+        "service": "ai-triage",
+        "batches": batcher.batches if batcher else 0,
+        "batched_requests": batcher.items if batcher else 0,
+    }
 
 
 @app.post("/triage")
-def triage(payload: TriagePayload):
-    return triage_llm(payload.complaint_text)
+async def triage(payload: TriagePayload):
+    # Outside the lifespan (e.g. a TestClient used without `with`) there is no batcher; evaluate inline.
+    if batcher is None:
+        return triage_llm(payload.complaint_text)
+    return await batcher.submit(payload.complaint_text)
+
+
+@app.post("/triage/batch")
+async def triage_batch(payload: TriageBatchPayload):
+    if batcher is None:
+        return {"results": triage_llm_batch(payload.complaint_texts)}
+    return {"results": await batcher.evaluate(payload.complaint_texts)}
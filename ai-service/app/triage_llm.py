@@ -76,3 +76,7 @@ def triage_llm(text: str) -> Dict:
         "escalation": {"triggered": bool(flags), "reason": ", ".join(flags) if flags else "Severity threshold"},
         "confidence": 0.78 if flags else 0.66,
     }
+
+
+def triage_llm_batch(texts: List[str]) -> List[Dict]:
+    return [triage_llm(text) for text in texts]
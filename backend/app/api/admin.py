@@ -5,6 +5,10 @@ from sqlalchemy.orm import Session
 from app.core.security import require_roles
 from app.db.models import Ambulance, Doctor, Emergency, Hospital
 from app.db.session import get_db
+from app.services.cache import ranking_cache
+from app.services.dispatch_engine import eta_service
+from app.services.ranking_explanations import compact_ranking_scores
+from app.services.triage_engine import llm_triage_cache, rule_triage_cache
 
 router = APIRouter(prefix="", tags=["Admin"])
 
@@ -22,3 +26,18 @@ def admin_overview(db: Session = Depends(get_db), _user=Depends(require_roles("A
         "hospitals": hospitals,
         "emergencies": emergencies,
     }
+
+
+@router.get("/admin/cache-stats")
+def cache_stats(_user=Depends(require_roles("ADMIN"))):
+    return {
+        "ranking": ranking_cache.stats(),
+        "triage_llm": llm_triage_cache.stats(),
+        "triage_rules": rule_triage_cache.stats(),
+        "eta": eta_service.stats(),
+    }
+
+
+@router.post("/admin/ranking-scores/compact")
+def compact_rankings(db: Session = Depends(get_db), _user=Depends(require_roles("ADMIN"))):
+    return {"deleted": compact_ranking_scores(db)}
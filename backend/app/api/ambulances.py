@@ -5,7 +5,6 @@ from sqlalchemy.orm import Session
 from app.db.models import Ambulance
 from app.db.schemas import AmbulanceOut
 from app.db.session import get_db
-from app.services.scoring_service import score_ambulances
 
 router = APIRouter(prefix="", tags=["Ambulances"])
 
@@ -30,12 +29,8 @@ def get_ambulances(
     if max_base_price is not None:
         stmt = stmt.where(Ambulance.base_price <= max_base_price)
 
-    ambulances = db.scalars(stmt.limit(5000)).all()
-    ranked = score_ambulances(ambulances)
-    for ambulance in ranked[:200]:
-        db.add(ambulance)
-    db.commit()
-    return ranked[offset : offset + limit]
+    stmt = stmt.order_by(Ambulance.ai_score.desc(), Ambulance.id).offset(offset).limit(limit)
+    return db.scalars(stmt).all()
 
 
 @router.get("/ambulance/{ambulance_id}", response_model=AmbulanceOut)
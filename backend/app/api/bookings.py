@@ -13,6 +13,7 @@ from app.db.schemas import (
     BookingTrackingResponse,
 )
 from app.db.session import get_db
+from app.services.reservations import ProviderUnavailable, claim, publish, release_for_tracking
 
 router = APIRouter(prefix="", tags=["Bookings"])
 
@@ -63,6 +64,11 @@ def create_booking(payload: BookingCreate, db: Session = Depends(get_db)):
     )
     db.add(booking)
     db.flush()
+    try:
+        reservation = claim(db, provider_type, payload.provider_id, holder=f"booking:{booking.id}")
+    except ProviderUnavailable as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(exc))
 
     payment = BookingPayment(
         booking_id=booking.id,
@@ -82,8 +88,11 @@ def create_booking(payload: BookingCreate, db: Session = Depends(get_db)):
         status="EN_ROUTE",
     )
     db.add(tracking)
+    db.flush()
+    reservation.tracking_id = tracking.id
 
     db.commit()
+    publish([reservation])
     db.refresh(booking)
     db.refresh(tracking)
     db.refresh(payment)
@@ -145,7 +154,9 @@ def booking_tracking(booking_id: int, db: Session = Depends(get_db)):
         booking.status = "COMPLETED"
         db.add(tracking)
         db.add(booking)
+        released = release_for_tracking(db, tracking.id)
         db.commit()
+        publish(released)
 
     timeline = [
         {"step": "Booked", "done": True},
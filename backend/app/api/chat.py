@@ -1,10 +1,10 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.core.security import decrypt_text, encrypt_text
+from app.core.security import encrypt_text
 from app.db.models import ChatMessage, ChatSession, Doctor
 from app.db.schemas import (
     ChatMessageCreate,
@@ -13,6 +13,8 @@ from app.db.schemas import (
     ChatSessionOut,
 )
 from app.db.session import get_db
+from app.services.chat_history import decode_cursor, encode_cursor, message_page, stream_messages
+from app.services.provider_snapshot import provider_snapshot
 
 router = APIRouter(prefix="", tags=["Chat"])
 
@@ -50,13 +52,26 @@ def create_chat_session(payload: ChatSessionCreate, db: Session = Depends(get_db
 
 
 @router.get("/chat/{session_id}/messages", response_model=list[ChatMessageOut])
-def get_chat_messages(session_id: int, db: Session = Depends(get_db)):
+def get_chat_messages(
+    session_id: int,
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=500),
+    stream: bool = Query(default=False),
+    db: Session = Depends(get_db),
+):
     chat = db.get(ChatSession, session_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Session not found")
-    messages = db.scalars(select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at)).all()
-    for msg in messages:
-        msg.message = decrypt_text(msg.message) or msg.message
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if stream:
+        return StreamingResponse(stream_messages(session_id, after), media_type="application/x-ndjson")
+    messages, next_cursor = message_page(db, session_id, after, limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_cursor)
     return messages
 
 
@@ -84,6 +99,8 @@ def send_message(session_id: int, payload: ChatMessageCreate, db: Session = Depe
     db.add(msg)
     db.commit()
     db.refresh(msg)
+    if payload.sender_type.upper() == "DOCTOR" and doctor:
+        provider_snapshot.invalidate()
     return msg
 
 
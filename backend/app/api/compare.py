@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app.db.models import Ambulance, Doctor
 from app.db.schemas import CompareRequest, CompareResponse
 from app.db.session import get_db
+from app.services.provider_snapshot import provider_snapshot
 from app.services.recommendation_service import ambulance_recommendation, doctor_recommendation
 from app.services.scoring_service import (
     score_ambulances,
@@ -22,10 +23,12 @@ def compare_entities(payload: CompareRequest, db: Session = Depends(get_db)):
         items = db.scalars(select(Doctor).where(Doctor.id.in_(payload.ids))).all()
         if not items:
             raise HTTPException(status_code=404, detail="Doctors not found")
+        provider_snapshot.current(db)
+        bounds = provider_snapshot.doctor_stats.bounds()
         if payload.city and payload.budget is not None:
-            ranked = score_doctors_contextual(items, payload.city, payload.category or "", payload.budget)
+            ranked = score_doctors_contextual(items, payload.city, payload.category or "", payload.budget, bounds)
         else:
-            ranked = score_doctors(items)
+            ranked = score_doctors(items, bounds=bounds)
         winner = ranked[0]
         return CompareResponse(
             winner_id=winner.id,
@@ -38,10 +41,12 @@ def compare_entities(payload: CompareRequest, db: Session = Depends(get_db)):
         items = db.scalars(select(Ambulance).where(Ambulance.id.in_(payload.ids))).all()
         if not items:
             raise HTTPException(status_code=404, detail="Ambulances not found")
+        provider_snapshot.current(db)
+        bounds = provider_snapshot.ambulance_stats.bounds()
         if payload.city and payload.budget is not None:
-            ranked = score_ambulances_contextual(items, payload.city, payload.budget)
+            ranked = score_ambulances_contextual(items, payload.city, payload.budget, bounds=bounds)
         else:
-            ranked = score_ambulances(items)
+            ranked = score_ambulances(items, bounds=bounds)
         winner = ranked[0]
         return CompareResponse(
             winner_id=winner.id,
@@ -1,10 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.db.models import Ambulance, Doctor, Emergency, EmergencyAssignment, Hospital, TrackingSession
-from app.db.schemas import DispatchRequest, DispatchResponse
+from app.core.config import settings
+from app.db.schemas import (
+    BatchDispatchAssignment,
+    BatchDispatchRequest,
+    BatchDispatchResponse,
+    DispatchRequest,
+    DispatchResponse,
+)
 from app.db.session import get_db
+from app.services.batch_dispatch import open_emergencies, plan_batch
 from app.services.dispatch_engine import estimate_eta_seconds
+from app.services.emergency_queue import emergency_queue
+from app.services.feedback_loop import load_adjustments
+from app.services.provider_snapshot import provider_snapshot
+from app.services.reservations import ProviderUnavailable, claim, publish
 
 router = APIRouter(prefix="", tags=["Dispatch"])
 
@@ -48,6 +61,11 @@ def dispatch_emergency(payload: DispatchRequest, db: Session = Depends(get_db)):
     else:
         raise HTTPException(status_code=400, detail="No provider selected")
 
+    try:
+        reservation = claim(db, provider_type, provider_id, holder=f"emergency:{emergency.id}")
+    except ProviderUnavailable as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
     origin = (emergency.latitude or 0.0, emergency.longitude or 0.0)
     dest = (dest_lat or 0.0, dest_lng or 0.0)
     eta_seconds = estimate_eta_seconds(origin, dest)
@@ -72,7 +90,12 @@ def dispatch_emergency(payload: DispatchRequest, db: Session = Depends(get_db)):
 
     emergency.status = "DISPATCHED"
     db.add(emergency)
+    db.flush()
+    if reservation is not None:
+        reservation.tracking_id = tracking.id
     db.commit()
+    publish([reservation])
+    emergency_queue.discard(payload.emergency_id)
     db.refresh(assignment)
     db.refresh(tracking)
 
@@ -83,3 +106,84 @@ def dispatch_emergency(payload: DispatchRequest, db: Session = Depends(get_db)):
         eta_seconds=eta_seconds,
         tracking_id=tracking.id,
     )
+
+
+@router.post("/dispatch/batch", response_model=BatchDispatchResponse)
+def dispatch_batch(payload: BatchDispatchRequest, db: Session = Depends(get_db)):
+    # Assigns ambulances to every open emergency in the window at once, minimising the severity-weighted
+    # total of ETA and ranking score instead of dispatching each emergency greedily.
+    emergencies = open_emergencies(db, payload.window_minutes or settings.dispatch_batch_window_minutes)
+    plan = plan_batch(
+        emergencies,
+        provider_snapshot.current(db),
+        payload.budget,
+        load_adjustments(db),
+        settings.dispatch_batch_candidates,
+    )
+
+    results = [
+        BatchDispatchAssignment(
+            emergency_id=pair.emergency.id,
+            ambulance_id=pair.ambulance_id,
+            eta_seconds=pair.eta_seconds,
+            cost=pair.cost,
+        )
+        for pair in plan.pairs
+    ]
+    if payload.dry_run or not plan.pairs:
+        return BatchDispatchResponse(
+            assignments=results, unassigned=plan.unassigned, candidates=plan.candidates, solve_ms=plan.solve_ms
+        )
+
+    # Every claim, assignment, tracking session and status change goes out in one transaction. The emergency
+    # is taken with a conditional update so an overlapping batch or manual dispatch cannot assign it twice;
+    # if either it or the unit was taken since the plan was read, the pair's savepoint is rolled back (which
+    # also drops the claim) and the emergency is left for the next run.
+    rows = []
+    reservations = []
+    claimed = []
+    unassigned = list(plan.unassigned)
+    for pair, result in zip(plan.pairs, results):
+        savepoint = db.begin_nested()
+        taken = db.execute(
+            update(Emergency)
+            .where(Emergency.id == pair.emergency.id, Emergency.status == "OPEN")
+            .values(status="DISPATCHED")
+            .execution_options(synchronize_session=False)
+        )
+        reservation = None
+        if taken.rowcount == 1:
+            try:
+                reservation = claim(db, "AMBULANCE", pair.ambulance_id, holder=f"emergency:{pair.emergency.id}")
+            except ProviderUnavailable:
+                pass
+        if reservation is None:
+            savepoint.rollback()
+            unassigned.append(pair.emergency.id)
+            continue
+        savepoint.commit()
+        reservations.append(reservation)
+        claimed.append(result)
+        assignment = EmergencyAssignment(emergency_id=pair.emergency.id, ambulance_id=pair.ambulance_id, mode="BATCH")
+        tracking = TrackingSession(
+            provider_type="AMBULANCE",
+            provider_id=pair.ambulance_id,
+            city=pair.city,
+            eta_seconds_initial=pair.eta_seconds,
+            status="EN_ROUTE",
+        )
+        rows.extend((assignment, tracking))
+    db.add_all(rows)
+    db.flush()
+    for result, reservation, assignment, tracking in zip(claimed, reservations, rows[::2], rows[1::2]):
+        result.assignment_id = assignment.id
+        result.tracking_id = tracking.id
+        reservation.tracking_id = tracking.id
+    db.commit()
+    publish(reservations)
+    for result in claimed:
+        emergency_queue.discard(result.emergency_id)
+
+    return BatchDispatchResponse(
+        assignments=claimed, unassigned=unassigned, candidates=plan.candidates, solve_ms=plan.solve_ms
+    )
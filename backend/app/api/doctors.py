@@ -5,7 +5,6 @@ from sqlalchemy.orm import Session
 from app.db.models import Doctor
 from app.db.schemas import DoctorOut
 from app.db.session import get_db
-from app.services.scoring_service import score_doctors
 
 router = APIRouter(prefix="", tags=["Doctors"])
 
@@ -33,12 +32,8 @@ def get_doctors(
     if min_rating is not None:
         stmt = stmt.where(Doctor.rating >= min_rating)
 
-    doctors = db.scalars(stmt.limit(5000)).all()
-    ranked = score_doctors(doctors)
-    for doctor in ranked[:200]:
-        db.add(doctor)
-    db.commit()
-    return ranked[offset : offset + limit]
+    stmt = stmt.order_by(Doctor.ai_score.desc(), Doctor.id).offset(offset).limit(limit)
+    return db.scalars(stmt).all()
 
 
 @router.get("/doctor/{doctor_id}", response_model=DoctorOut)
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException
+
+from app.db.schemas import (
+    QueueAckRequest,
+    QueueAckResponse,
+    QueueExtendRequest,
+    QueueLeaseRequest,
+    QueueLeaseResponse,
+    QueuedEmergencyOut,
+)
+from app.services.emergency_queue import emergency_queue
+
+router = APIRouter(prefix="/queue", tags=["Emergency Queue"])
+
+
+@router.post("/lease", response_model=QueueLeaseResponse)
+def lease_emergencies(payload: QueueLeaseRequest):
+    # Hands out the highest-priority open emergencies. Unacked items return to the queue when the lease expires.
+    lease = emergency_queue.lease(payload.consumer, payload.max_items, payload.lease_seconds)
+    if lease is None:
+        return QueueLeaseResponse(lease_id=None, consumer=payload.consumer, expires_at=None, items=[])
+    now = datetime.utcnow()
+    items = [
+        QueuedEmergencyOut(
+            emergency_id=item.emergency_id,
+            severity=item.severity,
+            severity_score=item.severity_score,
+            priority=round(emergency_queue.priority(item, now), 2),
+            waited_seconds=max(0, int((now - item.created_at).total_seconds())),
+        )
+        for item in lease.items.values()
+    ]
+    return QueueLeaseResponse(lease_id=lease.lease_id, consumer=lease.consumer, expires_at=lease.expires_at, items=items)
+
+
+@router.post("/ack", response_model=QueueAckResponse)
+def ack_emergencies(payload: QueueAckRequest):
+    acked = emergency_queue.ack(payload.lease_id, payload.emergency_ids)
+    if acked is None:
+        raise HTTPException(status_code=404, detail="Lease not found or expired")
+    return QueueAckResponse(lease_id=payload.lease_id, emergency_ids=acked)
+
+
+@router.post("/release", response_model=QueueAckResponse)
+def release_emergencies(payload: QueueAckRequest):
+    released = emergency_queue.release(payload.lease_id, payload.emergency_ids)
+    if released is None:
+        raise HTTPException(status_code=404, detail="Lease not found or expired")
+    return QueueAckResponse(lease_id=payload.lease_id, emergency_ids=released)
+
+
+@router.post("/extend", response_model=QueueLeaseResponse)
+def extend_lease(payload: QueueExtendRequest):
+    lease = emergency_queue.extend(payload.lease_id, payload.lease_seconds)
+    if lease is None:
+        raise HTTPException(status_code=404, detail="Lease not found or expired")
+    return QueueLeaseResponse(lease_id=lease.lease_id, consumer=lease.consumer, expires_at=lease.expires_at, items=[])
+
+
+@router.get("/stats")
+def queue_stats():
+    return emergency_queue.stats()
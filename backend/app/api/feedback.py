@@ -5,6 +5,7 @@ from app.db.models import Emergency, FeedbackOutcome
 from app.db.schemas import FeedbackRequest
 from app.db.session import get_db
 from app.services.feedback_loop import update_adjustments
+from app.services.ranking_explanations import compact_ranking_scores
 
 router = APIRouter(prefix="", tags=["Feedback"])
 
@@ -30,4 +31,6 @@ def record_feedback(payload: FeedbackRequest, db: Session = Depends(get_db)):
     db.commit()
 
     adjustments = update_adjustments(db, outcome)
+    if emergency.status == "RESOLVED":
+        compact_ranking_scores(db, [emergency.id])
     return {"status": "ok", "adjustments": adjustments}
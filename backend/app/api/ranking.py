@@ -1,36 +1,73 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Tuple
+import threading
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db.models import Ambulance, Doctor, Emergency, Hospital, RankingScore
 from app.db.schemas import (
+    AmbulanceOut,
     AmbulanceRankingResponse,
+    DoctorOut,
     DoctorRankingResponse,
+    HospitalOut,
     HospitalRankingResponse,
+    RankingAllResponse,
     RankingExplainResponse,
     RankingRequest,
 )
 from app.db.session import get_db
-from app.services.feedback_loop import load_adjustments
-from app.services.scoring_engine import (
-    SEVERITY_WEIGHTS_AMBULANCE,
-    SEVERITY_WEIGHTS_DOCTOR,
-    SEVERITY_WEIGHTS_HOSPITAL,
-    ambulance_score,
-    doctor_score,
-    explain_top_factor,
-    hospital_score,
+from app.services.batch_scoring import (
+    RankedBatch,
+    rank_ambulances_batch,
+    rank_doctors_batch,
+    rank_hospitals_batch,
 )
+from app.services.cache import ranking_cache
+from app.services.dispatch_engine import eta_service
+from app.services.feedback_loop import load_adjustments_versioned
+from app.services.geo_index import geohash
+from app.services.provider_snapshot import SnapshotState, load_rows, provider_snapshot
+from app.services.ranking_explanations import decode_breakdown
+from app.services.ranking_writer import ranking_record, ranking_writer
+from app.services.scoring_engine import explain_top_factor
 
 router = APIRouter(prefix="", tags=["Ranking"])
 
+# Radius at which distance_score_km reaches zero for each provider type.
+SEARCH_RADIUS_KM = {"doctor": 30.0, "ambulance": 30.0, "hospital": 40.0}
+
+# Three lists per /rank/all call; once every worker is busy the remaining lists are ranked in the
+# request thread instead of queueing behind other requests.
+_executor = ThreadPoolExecutor(max_workers=settings.rank_all_workers, thread_name_prefix="ranking")
+_executor_slots = threading.BoundedSemaphore(settings.rank_all_workers)
+
+
+def _submit(fn: Callable, *args) -> Future:
+    if not _executor_slots.acquire(blocking=False):
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(lambda _: _executor_slots.release())
+    return future
 
-def _apply_weighted_score(breakdown: dict, weights: dict, adjustments: dict) -> float:
-    total = 0.0
-    for key, weight in weights.items():
-        if key in breakdown:
-            total += breakdown[key] * weight * adjustments.get(key, 1.0)
-    return min(100.0, total)
+
+@dataclass
+class RankingContext:
+    severity: str
+    emergency_type: str
+    patient_loc: Tuple[float, float]
+    adjustments: Dict[str, float]
+    adjustments_version: str
+    snapshot: SnapshotState
 
 
 def _emergency_context(db: Session, emergency_id: str, fallback_severity: str):
@@ -43,155 +80,188 @@ def _emergency_context(db: Session, emergency_id: str, fallback_severity: str):
     return emergency, severity, emergency_type, patient_loc
 
 
-@router.post("/rank/doctors", response_model=DoctorRankingResponse)
-def rank_doctors(payload: RankingRequest, db: Session = Depends(get_db)):
-    emergency, severity, emergency_type, patient_loc = _emergency_context(db, payload.emergency_id, payload.severity)
+def _ranking_context(db: Session, payload: RankingRequest) -> RankingContext:
+    _emergency, severity, emergency_type, patient_loc = _emergency_context(db, payload.emergency_id, payload.severity)
     if payload.latitude is not None and payload.longitude is not None:
         patient_loc = (payload.latitude, payload.longitude)
-    adjustments = load_adjustments(db)
-    weights = SEVERITY_WEIGHTS_DOCTOR.get(severity, SEVERITY_WEIGHTS_DOCTOR["LOW"])
-    weights_dict = weights.__dict__
-
-    stmt = select(Doctor)
-    if payload.location_city:
-        stmt = stmt.where(Doctor.city == payload.location_city)
-
-    doctors = db.scalars(stmt).all()
-    scored = []
+    adjustments, adjustments_version = load_adjustments_versioned(db)
+    return RankingContext(
+        severity=severity,
+        emergency_type=emergency_type,
+        patient_loc=patient_loc,
+        adjustments=adjustments,
+        adjustments_version=adjustments_version,
+        snapshot=provider_snapshot.current(db),
+    )
+
+
+def _cached(target_type: str, ctx: RankingContext, payload: RankingRequest, rank: Callable[[], RankedBatch]) -> list:
+    # Nearby emergencies with the same severity, type and budget band share one ranking until providers or weights change.
+    key = (
+        target_type,
+        geohash(*ctx.patient_loc, settings.ranking_cache_geohash_precision),
+        ctx.severity,
+        ctx.emergency_type,
+        int(payload.budget // settings.ranking_cache_budget_step),
+        payload.location_city,
+        payload.max_results,
+        ctx.adjustments_version,
+        ctx.snapshot.version,
+    )
+    ranked = ranking_cache.get(key)
+    if ranked is None:
+        ranked = list(rank())
+        ranking_cache.set(key, ranked)
+    return ranked
+
+
+def _min_candidates(payload: RankingRequest) -> int:
+    return max(settings.geo_min_candidates, payload.max_results)
+
+
+def _rank_doctors(ctx: RankingContext, payload: RankingRequest) -> list:
+    return _cached("doctor", ctx, payload, lambda: _score_doctors(ctx, payload))
+
+
+def _score_doctors(ctx: RankingContext, payload: RankingRequest) -> RankedBatch:
+    # Providers held by a dispatch or booking lease would only end in a 409; off-shift ones stay, demoted by scoring.
+    columns = ctx.snapshot.doctors.nearby(
+        payload.location_city,
+        ctx.patient_loc,
+        SEARCH_RADIUS_KM["doctor"],
+        _min_candidates(payload),
+        skip_reserved=True,
+    )
+    return rank_doctors_batch(
+        ctx.severity, columns, ctx.patient_loc, payload.budget, ctx.emergency_type, ctx.adjustments, payload.max_results
+    )
+
+
+def _rank_ambulances(ctx: RankingContext, payload: RankingRequest) -> list:
+    return _cached("ambulance", ctx, payload, lambda: _score_ambulances(ctx, payload))
+
+
+def _score_ambulances(ctx: RankingContext, payload: RankingRequest) -> RankedBatch:
+    # Providers held by a dispatch or booking lease would only end in a 409; off-shift ones stay, demoted by scoring.
+    columns = ctx.snapshot.ambulances.nearby(
+        payload.location_city,
+        ctx.patient_loc,
+        SEARCH_RADIUS_KM["ambulance"],
+        _min_candidates(payload),
+        skip_reserved=True,
+    )
+    return rank_ambulances_batch(
+        ctx.severity, columns, ctx.patient_loc, payload.budget, ctx.adjustments, payload.max_results
+    )
+
+
+def _rank_hospitals(ctx: RankingContext, payload: RankingRequest) -> list:
+    return _cached("hospital", ctx, payload, lambda: _score_hospitals(ctx, payload))
+
+
+def _score_hospitals(ctx: RankingContext, payload: RankingRequest) -> RankedBatch:
+    columns = ctx.snapshot.hospitals.nearby(
+        payload.location_city, ctx.patient_loc, SEARCH_RADIUS_KM["hospital"], _min_candidates(payload)
+    )
+    return rank_hospitals_batch(
+        ctx.severity, columns, ctx.patient_loc, ctx.emergency_type, ctx.adjustments, payload.max_results
+    )
+
+
+def _ranked_rows(db: Session, model, out_schema, ranked):
+    results = {target_id: (score, breakdown) for target_id, score, breakdown in ranked}
+    rows = []
+    for row in load_rows(db, model, list(results)):
+        score, breakdown = results[row.id]
+        rows.append((out_schema.model_validate(row).model_copy(update={"ai_score": score}), breakdown))
+    return rows
+
+
+def _record_explanations(db: Session, emergency_id: str, target_type: str, top) -> list[RankingExplainResponse]:
     explanations: list[RankingExplainResponse] = []
-
-    for doctor in doctors:
-        result = doctor_score(severity, doctor, patient_loc, payload.budget, emergency_type)
-        adjusted_total = _apply_weighted_score(result["breakdown"], weights_dict, adjustments)
-        doctor.ai_score = round(adjusted_total, 2)
-        scored.append((doctor, result["breakdown"], result["distance_km"]))
-
-    scored.sort(key=lambda x: x[0].ai_score, reverse=True)
-    top = scored[: payload.max_results]
-
-    for idx, (doctor, breakdown, _distance) in enumerate(top, start=1):
+    records = []
+    for idx, (target, breakdown) in enumerate(top, start=1):
         why = explain_top_factor(breakdown) if idx == 1 else None
         explanations.append(
             RankingExplainResponse(
-                target_id=doctor.id,
-                target_type="doctor",
-                score_total=doctor.ai_score,
+                target_id=target.id,
+                target_type=target_type,
+                score_total=target.ai_score,
                 breakdown=breakdown,
                 why_ranked_1=why,
             )
         )
-        db.add(
-            RankingScore(
-                emergency_id=payload.emergency_id,
-                target_type="doctor",
-                target_id=doctor.id,
-                score_total=doctor.ai_score,
-                breakdown=breakdown,
-            )
-        )
+        records.append(ranking_record(emergency_id, target_type, target.id, target.ai_score, breakdown))
+    ranking_writer.submit(db, records)
+    return explanations
 
-    db.commit()
-    return DoctorRankingResponse(doctors=[d for d, _b, _dist in top], explanations=explanations)
 
+def _doctor_response(db: Session, payload: RankingRequest, ranked) -> DoctorRankingResponse:
+    top = _ranked_rows(db, Doctor, DoctorOut, ranked)
+    explanations = _record_explanations(db, payload.emergency_id, "doctor", top)
+    return DoctorRankingResponse(doctors=[d for d, _b in top], explanations=explanations)
 
-@router.post("/rank/ambulances", response_model=AmbulanceRankingResponse)
-def rank_ambulances(payload: RankingRequest, db: Session = Depends(get_db)):
-    emergency, severity, _emergency_type, patient_loc = _emergency_context(db, payload.emergency_id, payload.severity)
-    if payload.latitude is not None and payload.longitude is not None:
-        patient_loc = (payload.latitude, payload.longitude)
-    adjustments = load_adjustments(db)
-    weights = SEVERITY_WEIGHTS_AMBULANCE.get(severity, SEVERITY_WEIGHTS_AMBULANCE["LOW"])
 
-    stmt = select(Ambulance)
-    if payload.location_city:
-        stmt = stmt.where(Ambulance.city == payload.location_city)
+def _ambulance_response(
+    db: Session, ctx: RankingContext, payload: RankingRequest, ranked
+) -> AmbulanceRankingResponse:
+    top = _ranked_rows(db, Ambulance, AmbulanceOut, ranked)
+    explanations = _record_explanations(db, payload.emergency_id, "ambulance", top)
+    ambulances = [a for a, _b in top]
+    # ETAs for every ranked ambulance come from one matrix call.
+    locations = [(a.latitude, a.longitude) for a in ambulances]
+    etas = eta_service.matrix([ctx.patient_loc], locations)[0] if ambulances else []
+    return AmbulanceRankingResponse(
+        ambulances=ambulances,
+        explanations=explanations,
+        eta_seconds={a.id: eta for a, eta in zip(ambulances, etas)},
+    )
 
-    ambulances = db.scalars(stmt).all()
-    scored = []
-    explanations: list[RankingExplainResponse] = []
 
-    for ambulance in ambulances:
-        result = ambulance_score(severity, ambulance, patient_loc, payload.budget)
-        adjusted_total = _apply_weighted_score(result["breakdown"], weights, adjustments)
-        ambulance.ai_score = round(adjusted_total, 2)
-        scored.append((ambulance, result["breakdown"], result["distance_km"]))
+def _hospital_response(db: Session, payload: RankingRequest, ranked) -> HospitalRankingResponse:
+    top = _ranked_rows(db, Hospital, HospitalOut, ranked)
+    explanations = _record_explanations(db, payload.emergency_id, "hospital", top)
+    return HospitalRankingResponse(hospitals=[h for h, _b in top], explanations=explanations)
 
-    scored.sort(key=lambda x: x[0].ai_score, reverse=True)
-    top = scored[: payload.max_results]
 
-    for idx, (ambulance, breakdown, _distance) in enumerate(top, start=1):
-        why = explain_top_factor(breakdown) if idx == 1 else None
-        explanations.append(
-            RankingExplainResponse(
-                target_id=ambulance.id,
-                target_type="ambulance",
-                score_total=ambulance.ai_score,
-                breakdown=breakdown,
-                why_ranked_1=why,
-            )
-        )
-        db.add(
-            RankingScore(
-                emergency_id=payload.emergency_id,
-                target_type="ambulance",
-                target_id=ambulance.id,
-                score_total=ambulance.ai_score,
-                breakdown=breakdown,
-            )
-        )
+@router.post("/rank/doctors", response_model=DoctorRankingResponse)
+def rank_doctors(payload: RankingRequest, db: Session = Depends(get_db)):
+    ctx = _ranking_context(db, payload)
+    response = _doctor_response(db, payload, _rank_doctors(ctx, payload))
+    db.commit()
+    return response
+
 
+@router.post("/rank/ambulances", response_model=AmbulanceRankingResponse)
+def rank_ambulances(payload: RankingRequest, db: Session = Depends(get_db)):
+    ctx = _ranking_context(db, payload)
+    response = _ambulance_response(db, ctx, payload, _rank_ambulances(ctx, payload))
     db.commit()
-    return AmbulanceRankingResponse(ambulances=[a for a, _b, _dist in top], explanations=explanations)
+    return response
 
 
 @router.post("/rank/hospitals", response_model=HospitalRankingResponse)
 def rank_hospitals(payload: RankingRequest, db: Session = Depends(get_db)):
-    emergency, severity, emergency_type, patient_loc = _emergency_context(db, payload.emergency_id, payload.severity)
-    if payload.latitude is not None and payload.longitude is not None:
-        patient_loc = (payload.latitude, payload.longitude)
-    adjustments = load_adjustments(db)
-    weights = SEVERITY_WEIGHTS_HOSPITAL.get(severity, SEVERITY_WEIGHTS_HOSPITAL["LOW"])
-
-    stmt = select(Hospital)
-    if payload.location_city:
-        stmt = stmt.where(Hospital.city == payload.location_city)
-
-    hospitals = db.scalars(stmt).all()
-    scored = []
-    explanations: list[RankingExplainResponse] = []
-
-    for hospital in hospitals:
-        result = hospital_score(severity, hospital, patient_loc, payload.budget, emergency_type)
-        adjusted_total = _apply_weighted_score(result["breakdown"], weights, adjustments)
-        hospital.ai_score = round(adjusted_total, 2)
-        scored.append((hospital, result["breakdown"], result["distance_km"]))
+    ctx = _ranking_context(db, payload)
+    response = _hospital_response(db, payload, _rank_hospitals(ctx, payload))
+    db.commit()
+    return response
 
-    scored.sort(key=lambda x: x[0].ai_score, reverse=True)
-    top = scored[: payload.max_results]
 
-    for idx, (hospital, breakdown, _distance) in enumerate(top, start=1):
-        why = explain_top_factor(breakdown) if idx == 1 else None
-        explanations.append(
-            RankingExplainResponse(
-                target_id=hospital.id,
-                target_type="hospital",
-                score_total=hospital.ai_score,
-                breakdown=breakdown,
-                why_ranked_1=why,
-            )
-        )
-        db.add(
-            RankingScore(
-                emergency_id=payload.emergency_id,
-                target_type="hospital",
-                target_id=hospital.id,
-                score_total=hospital.ai_score,
-                breakdown=breakdown,
-            )
-        )
+@router.post("/rank/all", response_model=RankingAllResponse)
+def rank_all(payload: RankingRequest, db: Session = Depends(get_db)):
+    ctx = _ranking_context(db, payload)
+    doctors = _submit(_rank_doctors, ctx, payload)
+    ambulances = _submit(_rank_ambulances, ctx, payload)
+    hospitals = _submit(_rank_hospitals, ctx, payload)
 
+    response = RankingAllResponse(
+        doctors=_doctor_response(db, payload, doctors.result()),
+        ambulances=_ambulance_response(db, ctx, payload, ambulances.result()),
+        hospitals=_hospital_response(db, payload, hospitals.result()),
+    )
     db.commit()
-    return HospitalRankingResponse(hospitals=[h for h, _b, _dist in top], explanations=explanations)
+    return response
 
 
 @router.get("/why-ranked/{emergency_id}/{target_type}/{target_id}", response_model=RankingExplainResponse)
@@ -203,12 +273,23 @@ def why_ranked(emergency_id: str, target_type: str, target_id: int, db: Session
         .where(RankingScore.target_id == target_id)
         .order_by(RankingScore.created_at.desc())
     ).first()
+    pending = ranking_writer.pending(emergency_id, target_type, target_id)
+    if pending and (score is None or pending["created_at"] >= score.created_at):
+        breakdown = decode_breakdown(target_type, pending["breakdown"])
+        return RankingExplainResponse(
+            target_id=pending["target_id"],
+            target_type=pending["target_type"],
+            score_total=pending["score_total"],
+            breakdown=breakdown,
+            why_ranked_1=explain_top_factor(breakdown),
+        )
     if score:
+        breakdown = decode_breakdown(score.target_type, score.breakdown)
         return RankingExplainResponse(
             target_id=score.target_id,
             target_type=score.target_type,
             score_total=score.score_total,
-            breakdown=score.breakdown,
-            why_ranked_1=explain_top_factor(score.breakdown),
+            breakdown=breakdown,
+            why_ranked_1=explain_top_factor(breakdown),
         )
     raise HTTPException(status_code=404, detail="Ranking explanation not found")
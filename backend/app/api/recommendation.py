@@ -1,16 +1,25 @@
+import numpy as np
 from fastapi import APIRouter, Depends
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.db.models import Ambulance, Doctor, SearchEvent
-from app.db.schemas import EmergencyRecommendRequest, EmergencyRecommendResponse
+from app.db.schemas import AmbulanceOut, DoctorOut, EmergencyRecommendRequest, EmergencyRecommendResponse
 from app.db.session import get_db
+from app.services.contextual_ranking import recommend_ambulances, recommend_doctors
+from app.services.provider_snapshot import load_rows, provider_snapshot
 from app.services.recommendation_service import ambulance_recommendation, doctor_recommendation, final_recommendation
-from app.services.scoring_service import score_ambulances_contextual, score_doctors_contextual
 
 router = APIRouter(prefix="", tags=["Recommendation"])
 
 
+def _ranked_out(db: Session, model, out_schema, ids: np.ndarray, scores: np.ndarray) -> list:
+    score_by_id = dict(zip(ids.tolist(), scores.tolist()))
+    return [
+        out_schema.model_validate(row).model_copy(update={"ai_score": score_by_id[row.id]})
+        for row in load_rows(db, model, list(score_by_id))
+    ]
+
+
 @router.post("/recommend", response_model=EmergencyRecommendResponse)
 def recommend(payload: EmergencyRecommendRequest, db: Session = Depends(get_db)):
     db.add(SearchEvent(city=payload.location, problem=payload.problem, budget=payload.budget))
@@ -18,26 +27,30 @@ def recommend(payload: EmergencyRecommendRequest, db: Session = Depends(get_db))
     min_rating = payload.min_rating if payload.min_rating is not None else 0.0
     limit = payload.suggestion_count
 
-    doctor_stmt = select(Doctor).where(Doctor.rating >= min_rating).limit(5000)
-    ambulance_stmt = select(Ambulance).limit(5000)
-
-    doctor_source = db.scalars(doctor_stmt).all()
-    ambulance_source = db.scalars(ambulance_stmt).all()
-    doctors = score_doctors_contextual(doctor_source, payload.location, payload.problem, payload.budget)
-    ambulances = score_ambulances_contextual(ambulance_source, payload.location, payload.budget)
-
-    if payload.service_preference == "doctor":
-        ambulances = []
-    elif payload.service_preference == "ambulance":
-        doctors = []
+    snapshot = provider_snapshot.current(db)
+    compared_doctors = 0
+    compared_ambulances = len(snapshot.ambulances.columns)
 
-    doctors = doctors[:limit]
-    ambulances = ambulances[:limit]
+    doctors: list[DoctorOut] = []
+    ambulances: list[AmbulanceOut] = []
+    if payload.service_preference != "ambulance":
+        result = recommend_doctors(
+            snapshot.doctors,
+            payload.location,
+            payload.problem,
+            payload.budget,
+            min_rating,
+            provider_snapshot.doctor_stats.bounds(),
+            limit,
+        )
+        compared_doctors = result.eligible
+        doctors = _ranked_out(db, Doctor, DoctorOut, result.ids, result.scores)
+    if payload.service_preference != "doctor":
+        result = recommend_ambulances(
+            snapshot.ambulances, payload.location, payload.budget, provider_snapshot.ambulance_stats.bounds(), limit
+        )
+        ambulances = _ranked_out(db, Ambulance, AmbulanceOut, result.ids, result.scores)
 
-    for doctor in doctors:
-        db.add(doctor)
-    for ambulance in ambulances:
-        db.add(ambulance)
     db.commit()
 
     top_doctor = doctors[0] if doctors else None
@@ -49,6 +62,6 @@ def recommend(payload: EmergencyRecommendRequest, db: Session = Depends(get_db))
         top_doctor_summary=doctor_recommendation(top_doctor, payload.problem) if top_doctor else "No doctor match",
         top_ambulance_summary=ambulance_recommendation(top_ambulance, payload.budget) if top_ambulance else "No ambulance match",
         final_recommendation=final_recommendation(top_doctor, top_ambulance, payload.problem, payload.budget),
-        compared_doctors=len(doctor_source),
-        compared_ambulances=len(ambulance_source),
+        compared_doctors=compared_doctors,
+        compared_ambulances=compared_ambulances,
     )
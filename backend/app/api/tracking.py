@@ -1,8 +1,8 @@
 from datetime import datetime
-import asyncio
 
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.db.models import Ambulance, Doctor, TrackingSession
 from app.db.schemas import (
@@ -11,6 +11,7 @@ from app.db.schemas import (
     TrackingStatusResponse,
 )
 from app.db.session import get_db, SessionLocal
+from app.services.reservations import publish, release_for_tracking
 from app.services.websocket_manager import TrackingConnectionManager
 
 router = APIRouter(prefix="", tags=["Tracking"])
@@ -95,32 +96,44 @@ def get_tracking_status(tracking_id: int, db: Session = Depends(get_db)):
     if status.eta_seconds == 0 and session.status != "ARRIVED":
         session.status = "ARRIVED"
         db.add(session)
+        released = release_for_tracking(db, session.id)
         db.commit()
+        publish(released)
         status.status = session.status
 
     return status
 
 
+def _tick_status(tracking_id: int) -> dict | None:
+    # A short-lived session per tick, so no connection is held while the ticker sleeps.
+    with SessionLocal() as db:
+        session = db.get(TrackingSession, tracking_id)
+        if not session:
+            return None
+        status = _build_status(session)
+        if status.eta_seconds == 0 and session.status != "ARRIVED":
+            session.status = "ARRIVED"
+            db.add(session)
+            released = release_for_tracking(db, session.id)
+            db.commit()
+            publish(released)
+            status.status = session.status
+        return status.model_dump()
+
+
+async def _tick(tracking_id: int) -> dict | None:
+    return await run_in_threadpool(_tick_status, tracking_id)
+
+
 @router.websocket("/tracking/ws/{tracking_id}")
 async def tracking_socket(websocket: WebSocket, tracking_id: int):
+    # Viewers only subscribe; the shared ticker reads the session and pushes updates.
     await manager.connect(tracking_id, websocket)
-    db = SessionLocal()
+    manager.subscribe(tracking_id, _tick)
     try:
         while True:
-            session = db.get(TrackingSession, tracking_id)
-            if not session:
-                await websocket.send_json({"error": "Tracking session not found"})
-                manager.disconnect(tracking_id, websocket)
-                break
-            status = _build_status(session)
-            if status.eta_seconds == 0 and session.status != "ARRIVED":
-                session.status = "ARRIVED"
-                db.add(session)
-                db.commit()
-                status.status = session.status
-            await manager.broadcast(tracking_id, status.model_dump())
-            await asyncio.sleep(2)
+            await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(tracking_id, websocket)
+        pass
     finally:
-        db.close()
+        manager.disconnect(tracking_id, websocket)
@@ -1,20 +1,26 @@
+from datetime import datetime
+import uuid
+
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.security import encrypt_text
 from app.db.models import Emergency, TriageLog
 from app.db.schemas import TriageRequest, TriageResponse
 from app.db.session import get_db
+from app.services.emergency_queue import QueuedEmergency, emergency_queue
 from app.services.triage_engine import triage
 
 router = APIRouter(prefix="", tags=["Triage"])
 
 
-@router.post("/triage", response_model=TriageResponse)
-def run_triage(payload: TriageRequest, db: Session = Depends(get_db)):
-    result = triage(payload.complaint_text)
-
+def _record_triage(db: Session, payload: TriageRequest, result: dict) -> str:
+    # The id is assigned here so the log can reference it without a flush; both rows commit together.
+    emergency_id = str(uuid.uuid4())
+    created_at = datetime.utcnow()
     emergency = Emergency(
+        id=emergency_id,
         patient_user_id=payload.user_id,
         complaint_text="REDACTED",
         complaint_text_encrypted=encrypt_text(payload.complaint_text),
@@ -24,19 +30,24 @@ def run_triage(payload: TriageRequest, db: Session = Depends(get_db)):
         status="OPEN",
         latitude=payload.latitude or 0.0,
         longitude=payload.longitude or 0.0,
+        created_at=created_at,
     )
-    db.add(emergency)
-    db.commit()
-    db.refresh(emergency)
-
     log = TriageLog(
-        emergency_id=emergency.id,
+        emergency_id=emergency_id,
         entities=result["entities"],
         risk_flags=result["risk_flags"],
         llm_output=result,
         confidence=result["confidence"],
     )
-    db.add(log)
+    db.add_all([emergency, log])
     db.commit()
+    emergency_queue.push(QueuedEmergency(emergency_id, result["severity"], result["severity_score"], created_at))
+    return emergency_id
+
 
-    return TriageResponse(emergency_id=emergency.id, **result)
+@router.post("/triage", response_model=TriageResponse)
+async def run_triage(payload: TriageRequest, db: Session = Depends(get_db)):
+    # The LLM call is awaited on the event loop; only the database writes take a worker thread.
+    result = await triage(payload.complaint_text)
+    emergency_id = await run_in_threadpool(_record_triage, db, payload, result)
+    return TriageResponse(emergency_id=emergency_id, **result)
@@ -9,9 +9,53 @@ class Settings(BaseSettings):
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
     jwt_exp_minutes: int = Field(default=180, alias="JWT_EXP_MINUTES")
     encryption_key: str = Field(default="", alias="ENCRYPTION_KEY")
+    encryption_previous_keys: str = Field(default="", alias="ENCRYPTION_PREVIOUS_KEYS")
+    crypto_workers: int = Field(default=4, alias="CRYPTO_WORKERS")
+    crypto_parallel_threshold: int = Field(default=512, alias="CRYPTO_PARALLEL_THRESHOLD")
     google_maps_api_key: str = Field(default="", alias="GOOGLE_MAPS_API_KEY")
+    eta_provider: str = Field(default="auto", alias="ETA_PROVIDER")
+    road_graph_path: str = Field(default="", alias="ROAD_GRAPH_PATH")
+    eta_timeout_seconds: float = Field(default=5.0, alias="ETA_TIMEOUT_SECONDS")
+    eta_pool_size: int = Field(default=10, alias="ETA_POOL_SIZE")
+    eta_cache_size: int = Field(default=20000, alias="ETA_CACHE_SIZE")
+    eta_cache_ttl_seconds: int = Field(default=900, alias="ETA_CACHE_TTL_SECONDS")
+    eta_cache_stale_seconds: int = Field(default=1800, alias="ETA_CACHE_STALE_SECONDS")
+    eta_cache_geohash_precision: int = Field(default=6, alias="ETA_CACHE_GEOHASH_PRECISION")
+    eta_bucket_minutes: int = Field(default=60, alias="ETA_BUCKET_MINUTES")
+    dispatch_batch_window_minutes: int = Field(default=30, alias="DISPATCH_BATCH_WINDOW_MINUTES")
+    dispatch_batch_candidates: int = Field(default=10, alias="DISPATCH_BATCH_CANDIDATES")
+    reservation_lease_seconds: int = Field(default=3600, alias="RESERVATION_LEASE_SECONDS")
+    reservation_sweep_seconds: float = Field(default=30.0, alias="RESERVATION_SWEEP_SECONDS")
+    queue_aging_points_per_minute: float = Field(default=2.0, alias="QUEUE_AGING_POINTS_PER_MINUTE")
+    queue_lease_seconds: int = Field(default=60, alias="QUEUE_LEASE_SECONDS")
     ai_service_url: str = Field(default="", alias="AI_SERVICE_URL")
     enable_llm_triage: bool = Field(default=False, alias="ENABLE_LLM_TRIAGE")
+    llm_triage_mode: str = Field(default="hedged", alias="LLM_TRIAGE_MODE")
+    llm_triage_deadline_seconds: float = Field(default=1.5, alias="LLM_TRIAGE_DEADLINE_SECONDS")
+    llm_timeout_seconds: float = Field(default=8.0, alias="LLM_TIMEOUT_SECONDS")
+    llm_pool_size: int = Field(default=20, alias="LLM_POOL_SIZE")
+    llm_breaker_failures: int = Field(default=5, alias="LLM_BREAKER_FAILURES")
+    llm_breaker_reset_seconds: float = Field(default=30.0, alias="LLM_BREAKER_RESET_SECONDS")
+    llm_batch_backlog: int = Field(default=8, alias="LLM_BATCH_BACKLOG")
+    llm_batch_size: int = Field(default=32, alias="LLM_BATCH_SIZE")
+    llm_batch_wait_ms: float = Field(default=5.0, alias="LLM_BATCH_WAIT_MS")
+    provider_snapshot_ttl_seconds: int = Field(default=300, alias="PROVIDER_SNAPSHOT_TTL_SECONDS")
+    geo_cell_degrees: float = Field(default=0.1, alias="GEO_CELL_DEGREES")
+    geo_min_candidates: int = Field(default=20, alias="GEO_MIN_CANDIDATES")
+    geo_max_radius_km: float = Field(default=320.0, alias="GEO_MAX_RADIUS_KM")
+    ranking_cache_size: int = Field(default=2048, alias="RANKING_CACHE_SIZE")
+    rank_all_workers: int = Field(default=24, alias="RANK_ALL_WORKERS")
+    ranking_cache_ttl_seconds: int = Field(default=120, alias="RANKING_CACHE_TTL_SECONDS")
+    ranking_cache_geohash_precision: int = Field(default=6, alias="RANKING_CACHE_GEOHASH_PRECISION")
+    ranking_cache_budget_step: float = Field(default=500.0, alias="RANKING_CACHE_BUDGET_STEP")
+    triage_cache_size: int = Field(default=4096, alias="TRIAGE_CACHE_SIZE")
+    triage_cache_ttl_seconds: int = Field(default=600, alias="TRIAGE_CACHE_TTL_SECONDS")
+    ai_score_refresh_seconds: int = Field(default=300, alias="AI_SCORE_REFRESH_SECONDS")
+    ranking_write_mode: str = Field(default="async", alias="RANKING_WRITE_MODE")
+    ranking_write_queue_size: int = Field(default=10000, alias="RANKING_WRITE_QUEUE_SIZE")
+    ranking_write_batch_size: int = Field(default=500, alias="RANKING_WRITE_BATCH_SIZE")
+    ranking_write_flush_seconds: float = Field(default=0.5, alias="RANKING_WRITE_FLUSH_SECONDS")
+    ranking_write_retries: int = Field(default=3, alias="RANKING_WRITE_RETRIES")
     cors_origins_raw: str = Field(
         default="http://localhost:5173,http://127.0.0.1:5173,https://ai-healthcare-emergency.vercel.app",
         alias="CORS_ORIGINS",
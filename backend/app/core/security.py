@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import base64
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any
+from functools import lru_cache
+from typing import Any, Callable, List
 
 import jwt
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
@@ -20,35 +22,76 @@ pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def _derive_fernet_key() -> bytes:
-    if settings.encryption_key:
-        return settings.encryption_key.encode("utf-8")
-    seed = settings.jwt_secret.encode("utf-8")
+def _derive_fernet_key(encryption_key: str, jwt_secret: str) -> bytes:
+    if encryption_key:
+        return encryption_key.encode("utf-8")
+    seed = jwt_secret.encode("utf-8")
     digest = hashlib.sha256(seed).digest()
     return base64.urlsafe_b64encode(digest)
 
 
-def _get_fernet() -> Fernet:
-    key = _derive_fernet_key()
-    return Fernet(key)
+@lru_cache(maxsize=8)
+def _cipher(encryption_key: str, previous_keys: str, jwt_secret: str) -> MultiFernet:
+    # Built once per key version; the first key encrypts, every key is tried on decrypt.
+    keys = [_derive_fernet_key(encryption_key, jwt_secret)]
+    keys += [key.strip().encode("utf-8") for key in previous_keys.split(",") if key.strip()]
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+def _get_fernet() -> MultiFernet:
+    return _cipher(settings.encryption_key, settings.encryption_previous_keys, settings.jwt_secret)
+
+
+@lru_cache(maxsize=1)
+def _crypto_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.crypto_workers, thread_name_prefix="crypto")
+
+
+def _encrypt_chunk(values: List[str]) -> List[str]:
+    fernet = _get_fernet()
+    out = []
+    for value in values:
+        try:
+            out.append(fernet.encrypt(value.encode("utf-8")).decode("utf-8") if value else "")
+        except Exception:
+            out.append("")
+    return out
+
+
+def _decrypt_chunk(values: List[str]) -> List[str]:
+    fernet = _get_fernet()
+    out = []
+    for value in values:
+        try:
+            out.append(fernet.decrypt(value.encode("utf-8")).decode("utf-8") if value else "")
+        except InvalidToken:
+            out.append("")
+    return out
+
+
+def _map_chunks(fn: Callable[[List[str]], List[str]], values: List[str]) -> List[str]:
+    workers = settings.crypto_workers
+    if workers <= 1 or len(values) < settings.crypto_parallel_threshold:
+        return fn(values)
+    size = -(-len(values) // workers)
+    parts = _crypto_pool().map(fn, [values[i : i + size] for i in range(0, len(values), size)])
+    return [value for part in parts for value in part]
 
 
 def encrypt_text(value: str) -> str:
-    if not value:
-        return ""
-    try:
-        return _get_fernet().encrypt(value.encode("utf-8")).decode("utf-8")
-    except Exception:
-        return ""
+    return _encrypt_chunk([value])[0]
 
 
 def decrypt_text(value: str) -> str:
-    if not value:
-        return ""
-    try:
-        return _get_fernet().decrypt(value.encode("utf-8")).decode("utf-8")
-    except InvalidToken:
-        return ""
+    return _decrypt_chunk([value])[0]
+
+
+def encrypt_many(values: List[str]) -> List[str]:
+    return _map_chunks(_encrypt_chunk, values)
+
+
+def decrypt_many(values: List[str]) -> List[str]:
+    return _map_chunks(_decrypt_chunk, values)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 import uuid
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text, JSON
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text, JSON, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -74,6 +74,11 @@ class Ambulance(Base):
     longitude: Mapped[float] = mapped_column(Float, default=0.0)
 
 
+# Matches the listing order (ai_score DESC, id) so the index is read forward without a sort.
+Index("ix_doctors_ai_score", Doctor.ai_score.desc(), Doctor.id)
+Index("ix_ambulances_ai_score", Ambulance.ai_score.desc(), Ambulance.id)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -140,13 +145,14 @@ class TriageLog(Base):
 
 class RankingScore(Base):
     __tablename__ = "ranking_scores"
+    __table_args__ = (Index("ix_ranking_scores_lookup", "emergency_id", "target_type", "target_id", "created_at"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     emergency_id: Mapped[str] = mapped_column(String(36), ForeignKey("emergencies.id"))
     target_type: Mapped[str] = mapped_column(String(40), index=True)
     target_id: Mapped[int] = mapped_column(Integer, index=True)
     score_total: Mapped[float] = mapped_column(Float, default=0.0)
-    breakdown: Mapped[dict] = mapped_column(JSON, default=dict)
+    breakdown: Mapped[list] = mapped_column(JSON, default=list)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
@@ -219,6 +225,7 @@ class ChatSession(Base):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (Index("ix_chat_messages_session_cursor", "session_id", "created_at", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     session_id: Mapped[int] = mapped_column(Integer, ForeignKey("chat_sessions.id"), index=True)
@@ -252,6 +259,32 @@ class TrackingSession(Base):
     status: Mapped[str] = mapped_column(String(20), default="EN_ROUTE")
 
 
+class ProviderReservation(Base):
+    __tablename__ = "provider_reservations"
+    __table_args__ = (
+        Index("ix_provider_reservations_active", "status", "expires_at"),
+        # At most one ACTIVE reservation per provider; this index is what makes a claim exclusive.
+        Index(
+            "ux_provider_reservations_holder",
+            "provider_type",
+            "provider_id",
+            unique=True,
+            sqlite_where=text("status = 'ACTIVE'"),
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    provider_type: Mapped[str] = mapped_column(String(20))  # DOCTOR / AMBULANCE
+    provider_id: Mapped[int] = mapped_column(Integer)
+    holder: Mapped[str] = mapped_column(String(60), default="")  # emergency:<id> / booking:<id>
+    tracking_id: Mapped[int | None] = mapped_column(Integer, index=True, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default="ACTIVE")  # ACTIVE / RELEASED / EXPIRED
+    claimed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
+    released_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
 class Booking(Base):
     __tablename__ = "bookings"
 
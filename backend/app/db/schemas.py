@@ -118,6 +118,7 @@ class TriageResponse(BaseModel):
     risk_flags: list[str]
     escalation: dict
     confidence: float
+    triage_source: str = "rules"
 
 
 class RankingRequest(BaseModel):
@@ -146,6 +147,7 @@ class DoctorRankingResponse(BaseModel):
 class AmbulanceRankingResponse(BaseModel):
     ambulances: list[AmbulanceOut]
     explanations: list[RankingExplainResponse]
+    eta_seconds: dict[int, int] = {}
 
 
 class HospitalOut(BaseModel):
@@ -174,6 +176,12 @@ class HospitalRankingResponse(BaseModel):
     explanations: list[RankingExplainResponse]
 
 
+class RankingAllResponse(BaseModel):
+    doctors: DoctorRankingResponse
+    ambulances: AmbulanceRankingResponse
+    hospitals: HospitalRankingResponse
+
+
 class DispatchRequest(BaseModel):
     emergency_id: str
     doctor_id: int | None = None
@@ -190,6 +198,64 @@ class DispatchResponse(BaseModel):
     tracking_id: int
 
 
+class BatchDispatchRequest(BaseModel):
+    window_minutes: int | None = Field(default=None, ge=1, le=1440)
+    budget: float = Field(default=0, ge=0)
+    dry_run: bool = False
+
+
+class BatchDispatchAssignment(BaseModel):
+    emergency_id: str
+    ambulance_id: int
+    eta_seconds: int
+    cost: float
+    assignment_id: str | None = None
+    tracking_id: int | None = None
+
+
+class BatchDispatchResponse(BaseModel):
+    assignments: list[BatchDispatchAssignment]
+    unassigned: list[str]
+    candidates: int
+    solve_ms: float
+
+
+class QueueLeaseRequest(BaseModel):
+    consumer: str = "dispatcher"
+    max_items: int = Field(default=1, ge=1, le=100)
+    lease_seconds: int | None = Field(default=None, ge=1, le=3600)
+
+
+class QueuedEmergencyOut(BaseModel):
+    emergency_id: str
+    severity: str
+    severity_score: int
+    priority: float
+    waited_seconds: int
+
+
+class QueueLeaseResponse(BaseModel):
+    lease_id: str | None
+    consumer: str
+    expires_at: datetime | None
+    items: list[QueuedEmergencyOut]
+
+
+class QueueAckRequest(BaseModel):
+    lease_id: str
+    emergency_ids: list[str] | None = None
+
+
+class QueueAckResponse(BaseModel):
+    lease_id: str
+    emergency_ids: list[str]
+
+
+class QueueExtendRequest(BaseModel):
+    lease_id: str
+    lease_seconds: int | None = Field(default=None, ge=1, le=3600)
+
+
 class TrackingRealtimeUpdate(BaseModel):
     tracking_id: int
     status: str
@@ -344,6 +344,28 @@ def _ambulance_random(idx: int, rng: random.Random) -> Ambulance:
     )
 
 
+def _hospital_random(idx: int, rng: random.Random, phone_serial: int) -> Hospital:
+    city, state, country = rng.choice(CITY_POOL)
+    lat, lng = CITY_GEO.get(city, (19.0760, 72.8777))
+    lat += rng.uniform(-0.12, 0.12)
+    lng += rng.uniform(-0.12, 0.12)
+    return Hospital(
+        name=f"CityCare Emergency Hospital {idx}",
+        city=city,
+        state=state,
+        country=country,
+        icu_beds_available=rng.randint(4, 28),
+        emergency_wait_minutes=rng.randint(6, 40),
+        success_rate=round(rng.uniform(78.0, 97.0), 1),
+        avg_cost_index=round(rng.uniform(0.8, 1.6), 2),
+        distance_km_estimate=round(rng.uniform(1.2, 18.0), 1),
+        latitude=round(lat, 6),
+        longitude=round(lng, 6),
+        phone_number=f"+91-988880{phone_serial:04d}",
+        is_available=rng.random() > 0.1,
+    )
+
+
 def seed_if_empty(db: Session, min_doctors: int = 1500, min_ambulances: int = 1200, min_hospitals: int = 120) -> None:
     doctor_count = db.scalar(select(func.count(Doctor.id))) or 0
     amb_count = db.scalar(select(func.count(Ambulance.id))) or 0
@@ -384,27 +406,7 @@ def seed_if_empty(db: Session, min_doctors: int = 1500, min_ambulances: int = 12
 
     if hospital_count < min_hospitals:
         to_add = min_hospitals - hospital_count
-        for i in range(to_add):
-            city, state, country = rng.choice(CITY_POOL)
-            lat, lng = CITY_GEO.get(city, (19.0760, 72.8777))
-            lat += rng.uniform(-0.12, 0.12)
-            lng += rng.uniform(-0.12, 0.12)
-            hospital = Hospital(
-                name=f"CityCare Emergency Hospital {hospital_count + i + 1}",
-                city=city,
-                state=state,
-                country=country,
-                icu_beds_available=rng.randint(4, 28),
-                emergency_wait_minutes=rng.randint(6, 40),
-                success_rate=round(rng.uniform(78.0, 97.0), 1),
-                avg_cost_index=round(rng.uniform(0.8, 1.6), 2),
-                distance_km_estimate=round(rng.uniform(1.2, 18.0), 1),
-                latitude=round(lat, 6),
-                longitude=round(lng, 6),
-                phone_number=f"+91-988880{1000 + i:04d}",
-                is_available=rng.random() > 0.1,
-            )
-            db.add(hospital)
+        db.add_all([_hospital_random(hospital_count + i + 1, rng, phone_serial=1000 + i) for i in range(to_add)])
         db.commit()
 
     hospitals = db.scalars(select(Hospital)).all()
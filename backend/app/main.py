@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -15,6 +16,7 @@ from app.api import (
     compare,
     dispatch,
     doctors,
+    emergency_queue as emergency_queue_api,
     feedback,
     hospitals,
     meta,
@@ -24,15 +26,42 @@ from app.api import (
     triage,
 )
 from app.core.config import settings
-from app.db.models import Base
+from app.db.models import Ambulance, Base, ChatMessage, Doctor, ProviderReservation, RankingScore
 from app.db.seed import seed_if_empty
 from app.db.session import SessionLocal, engine
+from app.services.ai_score_refresh import ai_score_refresher, recompute_ai_scores
+from app.services.dispatch_engine import eta_service
+from app.services.emergency_queue import emergency_queue
+from app.services.llm_client import llm_client
+from app.services.ranking_writer import ranking_writer
+from app.services.reservations import lease_sweeper
 
 Base.metadata.create_all(bind=engine)
+# create_all skips indexes on tables that already exist.
+for model in (Doctor, Ambulance, RankingScore, ChatMessage, ProviderReservation):
+    for index in model.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
 with SessionLocal() as db:
     seed_if_empty(db)
+    recompute_ai_scores(db)
+    emergency_queue.rebuild(db)
 
-app = FastAPI(title=settings.app_name)
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    ranking_writer.start()
+    ai_score_refresher.start()
+    llm_client.start()
+    lease_sweeper.start()
+    yield
+    lease_sweeper.stop()
+    await llm_client.aclose()
+    eta_service.close()
+    ai_score_refresher.stop()
+    ranking_writer.stop()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 STATIC_DIR = Path(__file__).parent / "static"
 ASSETS_DIR = STATIC_DIR / "assets"
 
@@ -62,6 +91,7 @@ app.include_router(bookings.router)
 app.include_router(triage.router)
 app.include_router(ranking.router)
 app.include_router(dispatch.router)
+app.include_router(emergency_queue_api.router)
 app.include_router(hospitals.router)
 app.include_router(feedback.router)
 app.include_router(auth.router)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Ambulance, Doctor
+from app.db.session import SessionLocal
+from app.services.provider_snapshot import provider_snapshot
+from app.services.scoring_service import ambulance_ai_scores, doctor_ai_scores
+
+
+def _write_changed(db: Session, model, ids: np.ndarray, scores: np.ndarray) -> int:
+    stored = dict(db.execute(select(model.id, model.ai_score)).all())
+    changes = [
+        {"id": target_id, "ai_score": score}
+        for target_id, score in zip(ids.tolist(), scores.tolist())
+        if stored.get(target_id) != score
+    ]
+    if changes:
+        db.execute(update(model), changes)
+    return len(changes)
+
+
+def recompute_ai_scores(db: Session) -> int:
+    # Listing scores are normalised over each provider population; only rows whose score moved are written.
+    state = provider_snapshot.current(db)
+    doctors = state.doctors.columns
+    ambulances = state.ambulances.columns
+    doctor_scores = doctor_ai_scores(doctors, provider_snapshot.doctor_stats.bounds())
+    ambulance_scores = ambulance_ai_scores(ambulances, provider_snapshot.ambulance_stats.bounds())
+    updated = _write_changed(db, Doctor, doctors.ids, doctor_scores)
+    updated += _write_changed(db, Ambulance, ambulances.ids, ambulance_scores)
+    db.commit()
+    return updated
+
+
+class AiScoreRefresher:
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def request(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ai-score-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                with SessionLocal() as db:
+                    recompute_ai_scores(db)
+            except Exception:
+                # The next request or interval retries; listings keep serving the previous scores.
+                continue
+
+
+ai_score_refresher = AiScoreRefresher(interval_seconds=settings.ai_score_refresh_seconds)
+provider_snapshot.add_listener(ai_score_refresher.request)
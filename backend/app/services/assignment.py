@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+def useful_columns(cost: np.ndarray) -> np.ndarray:
+    # An optimal assignment of n rows only ever gives a row one of its n cheapest columns (at most n - 1
+    # other rows can hold them), so every column outside those lists can be dropped without changing it.
+    n, m = cost.shape
+    if n == 0 or m <= n:
+        return np.arange(m)
+    return np.unique(np.argpartition(cost, n - 1, axis=1)[:, :n])
+
+
+def solve_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Minimum-cost assignment of rows to distinct columns: one shortest augmenting path per row over
+    # reduced costs, with the dual updates deferred to the end of each search (as in LAPJV / Crouse 2016).
+    # Returns matched (row, column) index arrays sorted by row; when there are more rows than columns the
+    # problem is solved on the transpose and some rows stay unmatched.
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    if cost.shape[0] > cost.shape[1]:
+        cols, rows = solve_assignment(cost.T)
+        order = np.argsort(rows, kind="stable")
+        return rows[order], cols[order]
+
+    n, m = cost.shape
+    u = np.zeros(n)
+    v = np.zeros(m)
+    row_of = np.full(m, -1, dtype=np.int64)
+    col_of = np.full(n, -1, dtype=np.int64)
+    path = np.empty(m, dtype=np.int64)
+    reduced = np.empty(m)
+    for start in range(n):
+        # `pending` holds tentative path lengths of unscanned columns; scanned ones are +inf in `open_v`
+        # (the negated duals), which keeps them out of every later relaxation.
+        pending = np.full(m, np.inf)
+        shortest = np.zeros(m)
+        open_v = -v
+        scanned_rows = [start]
+        scanned_cols = []
+        row = start
+        reached = 0.0
+        while True:
+            np.add(cost[row], open_v, out=reduced)
+            reduced += reached - u[row]
+            np.putmask(path, reduced < pending, row)
+            np.minimum(pending, reduced, out=pending)
+            col = int(pending.argmin())
+            reached = pending[col]
+            if reached == np.inf:
+                raise ValueError("cost matrix is infeasible")
+            shortest[col] = reached
+            pending[col] = np.inf
+            open_v[col] = np.inf
+            scanned_cols.append(col)
+            if row_of[col] < 0:
+                break
+            row = int(row_of[col])
+            scanned_rows.append(row)
+
+        u[start] += reached
+        for r in scanned_rows[1:]:
+            u[r] += reached - shortest[col_of[r]]
+        cols = np.array(scanned_cols)
+        v[cols] -= reached - shortest[cols]
+        while True:
+            r = int(path[col])
+            row_of[col] = r
+            col, col_of[r] = int(col_of[r]), col
+            if r == start:
+                break
+
+    rows = np.arange(n, dtype=np.int64)
+    return rows, col_of
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List
+import time
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import Emergency
+from app.services.assignment import solve_assignment, useful_columns
+from app.services.batch_scoring import AmbulanceColumns, rank_ambulances_batch
+from app.services.dispatch_engine import eta_service, haversine_eta_seconds
+from app.services.provider_snapshot import ProviderTable, SnapshotState
+
+# Multiplies an emergency's whole cost row, so a minute saved on a critical case outweighs one on a low case.
+SEVERITY_COST_WEIGHT = {"CRITICAL": 8.0, "HIGH": 4.0, "MODERATE": 2.0, "LOW": 1.0}
+# Minutes of ETA one ranking-score point is worth.
+SCORE_MINUTES_PER_POINT = 0.1
+SEARCH_RADIUS_KM = 30.0
+
+
+@dataclass
+class BatchPair:
+    emergency: Emergency
+    ambulance_id: int
+    city: str
+    eta_seconds: int
+    cost: float
+
+
+@dataclass
+class BatchPlan:
+    pairs: List[BatchPair] = field(default_factory=list)
+    unassigned: List[str] = field(default_factory=list)
+    candidates: int = 0
+    solve_ms: float = 0.0
+
+
+def open_emergencies(db: Session, window_minutes: int) -> List[Emergency]:
+    since = datetime.utcnow() - timedelta(minutes=window_minutes)
+    return list(
+        db.scalars(
+            select(Emergency)
+            .where(Emergency.status == "OPEN", Emergency.created_at >= since)
+            .order_by(Emergency.created_at)
+        )
+    )
+
+
+def _severity_weight(emergency: Emergency) -> float:
+    return SEVERITY_COST_WEIGHT.get(emergency.severity, SEVERITY_COST_WEIGHT["LOW"])
+
+
+def plan_batch(
+    emergencies: List[Emergency],
+    snapshot: SnapshotState,
+    budget: float,
+    adjustments: Dict[str, float],
+    candidates: int,
+) -> BatchPlan:
+    plan = BatchPlan()
+    table = snapshot.ambulances.columns
+    free = table.is_available & table.status_available & ~snapshot.ambulances.reserved
+    fleet = ProviderTable(table.take(np.flatnonzero(free)))
+    if not emergencies:
+        return plan
+    if len(fleet.columns) == 0:
+        plan.unassigned = [e.id for e in emergencies]
+        return plan
+
+    # With fewer ambulances than emergencies a minimum-cost solution would drop the expensive rows,
+    # which are the severe ones; keep the most severe (oldest first) and leave the rest for the next run.
+    ranked = sorted(emergencies, key=lambda e: -_severity_weight(e))
+    rows = ranked[: len(fleet.columns)]
+    plan.unassigned = [e.id for e in ranked[len(fleet.columns) :]]
+
+    # Every pair starts at a straight-line ETA with a zero ranking score; each emergency's shortlist of top
+    # ranked ambulances is then priced with its real score and provider ETA. Off-list pairs stay in the
+    # matrix so a surge around one spot still gets every emergency a vehicle.
+    fleet_cols = fleet.columns
+    positions = {int(ambulance_id): pos for pos, ambulance_id in enumerate(fleet_cols.ids.tolist())}
+    weights = np.array([_severity_weight(e) for e in rows])
+    origins = [(e.latitude or 0.0, e.longitude or 0.0) for e in rows]
+    straight = np.stack(
+        [haversine_eta_seconds(lat, lng, fleet_cols.latitude, fleet_cols.longitude) for lat, lng in origins]
+    )
+    cost = weights[:, None] * (straight / 60.0 + 100.0 * SCORE_MINUTES_PER_POINT)
+    etas: List[Dict[int, int]] = []
+    for i, (emergency, loc) in enumerate(zip(rows, origins)):
+        nearby: AmbulanceColumns = fleet.nearby(None, loc, SEARCH_RADIUS_KM, candidates)
+        batch = rank_ambulances_batch(emergency.severity, nearby, loc, budget, adjustments, candidates)
+        order = batch.order.tolist()
+        seconds = eta_service.matrix(
+            [loc], [(float(batch.columns.latitude[idx]), float(batch.columns.longitude[idx])) for idx in order]
+        )[0]
+        shortlist = {}
+        for idx, eta in zip(order, seconds):
+            pos = positions[int(batch.columns.ids[idx])]
+            shortlist[pos] = eta
+            score = float(batch.scores.totals[idx])
+            cost[i, pos] = weights[i] * (eta / 60.0 + (100.0 - score) * SCORE_MINUTES_PER_POINT)
+        etas.append(shortlist)
+
+    columns = useful_columns(cost)
+    cost = cost[:, columns]
+    plan.candidates = len(columns)
+
+    started = time.perf_counter()
+    matched_rows, matched_cols = solve_assignment(cost)
+    plan.solve_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    for i, j in zip(matched_rows.tolist(), matched_cols.tolist()):
+        pos = int(columns[j])
+        eta = etas[i].get(pos)
+        if eta is None:
+            eta = eta_service.eta(origins[i], (float(fleet_cols.latitude[pos]), float(fleet_cols.longitude[pos])))
+        city = fleet_cols.city_names[fleet_cols.city[pos]]
+        plan.pairs.append(BatchPair(rows[i], int(fleet_cols.ids[pos]), city, int(eta), round(float(cost[i, j]), 3)))
+    return plan
@@ -0,0 +1,473 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Dict, Iterable, List, Sequence, Tuple
+import math
+
+import numpy as np
+
+from app.db.models import Ambulance, Doctor, Hospital
+from app.services.scoring_engine import (
+    EMERGENCY_SPECIALTY_MAP,
+    SEVERITY_WEIGHTS_AMBULANCE,
+    SEVERITY_WEIGHTS_DOCTOR,
+    SEVERITY_WEIGHTS_HOSPITAL,
+)
+from app.services.topk import prune_below_kth, top_k
+
+AVAILABLE_STATUSES = {"online", "available", "on_call", "24x7"}
+
+
+def _take(columns, index):
+    values = {}
+    for f in fields(columns):
+        value = getattr(columns, f.name)
+        if isinstance(value, np.ndarray):
+            values[f.name] = value[index]
+        elif isinstance(value, dict):
+            values[f.name] = {k: v[index] for k, v in value.items()}
+        else:
+            values[f.name] = value
+    return type(columns)(**values)
+
+
+def _encode(values: Iterable[str]) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    vocab: Dict[str, int] = {}
+    codes = np.array([vocab.setdefault(v, len(vocab)) for v in values], dtype=np.int32)
+    return codes, tuple(vocab)
+
+
+def codes_matching(vocab: Sequence[str], wanted: Iterable[str]) -> List[int]:
+    wanted_set = set(wanted)
+    return [idx for idx, name in enumerate(vocab) if name in wanted_set]
+
+
+def _status_available(status: str | None) -> bool:
+    return bool(status) and status.lower() in AVAILABLE_STATUSES
+
+
+@dataclass
+class DoctorColumns:
+    ids: np.ndarray
+    city: np.ndarray
+    city_names: Tuple[str, ...]
+    latitude: np.ndarray
+    longitude: np.ndarray
+    experience_years: np.ndarray
+    rating: np.ndarray
+    rating_count: np.ndarray
+    reviews_count: np.ndarray
+    total_patients_served: np.ndarray
+    response_minutes: np.ndarray
+    response_seconds: np.ndarray
+    is_available: np.ndarray
+    status_available: np.ndarray
+    verified: np.ndarray
+    category: np.ndarray
+    category_names: Tuple[str, ...]
+    consultation_fee: np.ndarray
+    success_rate: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, index) -> "DoctorColumns":
+        return _take(self, index)
+
+    @classmethod
+    def from_rows(cls, doctors: Sequence[Doctor]) -> "DoctorColumns":
+        city, city_names = _encode(d.city for d in doctors)
+        category, category_names = _encode(d.category.strip().lower() for d in doctors)
+        return cls(
+            ids=np.array([d.id for d in doctors], dtype=np.int64),
+            city=city,
+            city_names=city_names,
+            latitude=np.array([d.latitude for d in doctors], dtype=np.float64),
+            longitude=np.array([d.longitude for d in doctors], dtype=np.float64),
+            experience_years=np.array([d.experience_years for d in doctors], dtype=np.int32),
+            rating=np.array([d.rating for d in doctors], dtype=np.float64),
+            rating_count=np.array([d.rating_count or d.reviews_count for d in doctors], dtype=np.int32),
+            reviews_count=np.array([d.reviews_count for d in doctors], dtype=np.int32),
+            total_patients_served=np.array([d.total_patients_served for d in doctors], dtype=np.int32),
+            response_minutes=np.array([d.response_time_minutes for d in doctors], dtype=np.int32),
+            response_seconds=np.array(
+                [d.response_time_seconds or d.response_time_minutes * 60 for d in doctors], dtype=np.int32
+            ),
+            is_available=np.array([bool(d.is_available) for d in doctors], dtype=bool),
+            status_available=np.array([_status_available(d.availability_status) for d in doctors], dtype=bool),
+            verified=np.array([bool(d.verified_status) for d in doctors], dtype=bool),
+            category=category,
+            category_names=category_names,
+            consultation_fee=np.array([d.consultation_fee for d in doctors], dtype=np.float64),
+            success_rate=np.array([d.success_rate for d in doctors], dtype=np.float64),
+        )
+
+
+@dataclass
+class AmbulanceColumns:
+    ids: np.ndarray
+    city: np.ndarray
+    city_names: Tuple[str, ...]
+    latitude: np.ndarray
+    longitude: np.ndarray
+    rating: np.ndarray
+    response_minutes: np.ndarray
+    response_seconds: np.ndarray
+    is_available: np.ndarray
+    status_available: np.ndarray
+    on_duty: np.ndarray
+    verified: np.ndarray
+    advanced_vehicle: np.ndarray
+    has_icu: np.ndarray
+    has_ventilator: np.ndarray
+    has_oxygen: np.ndarray
+    driver_score: np.ndarray
+    base_price: np.ndarray
+    cost_per_km: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, index) -> "AmbulanceColumns":
+        return _take(self, index)
+
+    @classmethod
+    def from_rows(cls, ambulances: Sequence[Ambulance]) -> "AmbulanceColumns":
+        city, city_names = _encode(a.city for a in ambulances)
+        return cls(
+            ids=np.array([a.id for a in ambulances], dtype=np.int64),
+            city=city,
+            city_names=city_names,
+            latitude=np.array([a.latitude for a in ambulances], dtype=np.float64),
+            longitude=np.array([a.longitude for a in ambulances], dtype=np.float64),
+            rating=np.array([a.rating for a in ambulances], dtype=np.float64),
+            response_minutes=np.array([a.response_time_minutes for a in ambulances], dtype=np.int32),
+            response_seconds=np.array(
+                [a.response_time_seconds or a.response_time_minutes * 60 for a in ambulances], dtype=np.int32
+            ),
+            is_available=np.array([bool(a.is_available) for a in ambulances], dtype=bool),
+            status_available=np.array([_status_available(a.availability_status) for a in ambulances], dtype=bool),
+            on_duty=np.array([a.availability_status in {"AVAILABLE", "ON_CALL"} for a in ambulances], dtype=bool),
+            verified=np.array([bool(a.verified_status) for a in ambulances], dtype=bool),
+            advanced_vehicle=np.array([a.vehicle_type in {"ICU", "ALS", "Ventilator"} for a in ambulances], dtype=bool),
+            has_icu=np.array([bool(a.has_icu) for a in ambulances], dtype=bool),
+            has_ventilator=np.array([bool(a.has_ventilator) for a in ambulances], dtype=bool),
+            has_oxygen=np.array([bool(a.has_oxygen) for a in ambulances], dtype=bool),
+            driver_score=np.array([a.driver_score for a in ambulances], dtype=np.float64),
+            base_price=np.array([a.base_price for a in ambulances], dtype=np.float64),
+            cost_per_km=np.array([a.cost_per_km for a in ambulances], dtype=np.float64),
+        )
+
+
+@dataclass
+class HospitalColumns:
+    ids: np.ndarray
+    city: np.ndarray
+    city_names: Tuple[str, ...]
+    latitude: np.ndarray
+    longitude: np.ndarray
+    icu_beds_available: np.ndarray
+    emergency_wait_minutes: np.ndarray
+    success_rate: np.ndarray
+    avg_cost_index: np.ndarray
+    is_available: np.ndarray
+    specialties: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, index) -> "HospitalColumns":
+        return _take(self, index)
+
+    @classmethod
+    def from_rows(
+        cls, hospitals: Sequence[Hospital], specializations: Dict[int, List[str]] | None = None
+    ) -> "HospitalColumns":
+        specialties: Dict[str, np.ndarray] = {}
+        for idx, hospital in enumerate(hospitals):
+            if specializations is None:
+                names = [spec.specialization for spec in hospital.specializations]
+            else:
+                names = specializations.get(hospital.id, [])
+            for name in names:
+                key = name.lower()
+                if key not in specialties:
+                    specialties[key] = np.zeros(len(hospitals), dtype=bool)
+                specialties[key][idx] = True
+        city, city_names = _encode(h.city for h in hospitals)
+        return cls(
+            ids=np.array([h.id for h in hospitals], dtype=np.int64),
+            city=city,
+            city_names=city_names,
+            latitude=np.array([h.latitude for h in hospitals], dtype=np.float64),
+            longitude=np.array([h.longitude for h in hospitals], dtype=np.float64),
+            icu_beds_available=np.array([h.icu_beds_available for h in hospitals], dtype=np.int32),
+            emergency_wait_minutes=np.array([h.emergency_wait_minutes for h in hospitals], dtype=np.int32),
+            success_rate=np.array([h.success_rate for h in hospitals], dtype=np.float64),
+            avg_cost_index=np.array([h.avg_cost_index for h in hospitals], dtype=np.float64),
+            is_available=np.array([bool(h.is_available) for h in hospitals], dtype=bool),
+            specialties=specialties,
+        )
+
+
+@dataclass
+class BatchScores:
+    totals: np.ndarray
+    components: Dict[str, np.ndarray]
+    distance_km: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+    def breakdown(self, index: int) -> Dict[str, float]:
+        return {key: float(values[index]) for key, values in self.components.items()}
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    # np.rint(x * 100) / 100 agrees with round(x, 2) except where x * 100 sits on a .5 boundary,
+    # so those few entries are rounded by Python to keep results bit-identical.
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100.0
+    rounded = np.rint(scaled) / 100.0
+    ambiguous = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if ambiguous.any():
+        idx = np.flatnonzero(ambiguous)
+        rounded[idx] = [round(float(v), 2) for v in values[idx]]
+    return rounded
+
+
+def _clamp(values: np.ndarray) -> np.ndarray:
+    return np.clip(values, 0.0, 100.0)
+
+
+def haversine_km_batch(lat1: float, lon1: float, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    if lat1 == 0.0 and lon1 == 0.0:
+        return np.zeros(len(lat2), dtype=np.float64)
+    r = 6371.0
+    p = math.pi / 180.0
+    a = 0.5 - np.cos((lat2 - lat1) * p) / 2 + math.cos(lat1 * p) * np.cos(lat2 * p) * (1 - np.cos((lon2 - lon1) * p)) / 2
+    km = 2 * r * np.arcsin(np.sqrt(a))
+    km[(lat2 == 0.0) & (lon2 == 0.0)] = 0.0
+    return km
+
+
+def distance_score_batch(km: np.ndarray, max_km: float = 30.0) -> np.ndarray:
+    return np.where(km <= 0, 60.0, _clamp(100.0 * (1.0 - np.minimum(km, max_km) / max_km)))
+
+
+def response_time_score_batch(seconds: np.ndarray, target: int = 180) -> np.ndarray:
+    return np.where(seconds <= 0, 60.0, _clamp(100.0 * (target / np.maximum(seconds, 30))))
+
+
+def availability_score_batch(is_available: np.ndarray, status_available: np.ndarray) -> np.ndarray:
+    return np.where(is_available, 100.0, np.where(status_available, 80.0, 20.0))
+
+
+def budget_score_batch(cost: np.ndarray, budget: float) -> np.ndarray:
+    if budget <= 0:
+        return np.full(len(cost), 50.0)
+    ratio = budget / np.maximum(cost, 1.0)
+    return _clamp(100.0 * np.minimum(1.0, ratio))
+
+
+def _weighted_sum(components: Dict[str, np.ndarray], weights: Dict[str, float], adjustments: Dict[str, float], size: int):
+    total = np.zeros(size, dtype=np.float64)
+    for key, weight in weights.items():
+        if key in components:
+            total += components[key] * weight * adjustments.get(key, 1.0)
+    return total
+
+
+def _finish(components: Dict[str, np.ndarray], weights, adjustments, km: np.ndarray) -> BatchScores:
+    rounded = {key: round2(values) for key, values in components.items()}
+    return BatchScores(
+        totals=round2(np.minimum(100.0, _weighted_sum(rounded, weights, adjustments, len(km)))),
+        components=rounded,
+        distance_km=round2(km),
+    )
+
+
+def _doctor_components(
+    columns: DoctorColumns, km: np.ndarray | None, budget: float, emergency_type: str
+) -> Dict[str, np.ndarray]:
+    desired = [d.lower() for d in EMERGENCY_SPECIALTY_MAP.get(emergency_type, ["General Physician"])]
+    desired_codes = codes_matching(columns.category_names, desired)
+    count = columns.rating_count
+    bayesian = (count / (count + 50)) * columns.rating + (50 / (count + 50)) * 4.2
+
+    components = {
+        "experience": _clamp(100.0 * np.minimum(columns.experience_years, 20) / 20),
+        "bayesian": bayesian * 20.0,
+    }
+    if km is not None:
+        components["distance"] = distance_score_batch(km)
+    components.update(
+        {
+            "response": response_time_score_batch(columns.response_seconds),
+            "availability": availability_score_batch(columns.is_available, columns.status_available),
+            "emergency_match": np.where(np.isin(columns.category, desired_codes), 95.0, 55.0),
+            "budget": budget_score_batch(columns.consultation_fee, budget),
+            "success": _clamp(columns.success_rate),
+        }
+    )
+    return components
+
+
+def _ambulance_components(columns: AmbulanceColumns, km: np.ndarray | None, budget: float) -> Dict[str, np.ndarray]:
+    equipment = 50.0 + np.where(columns.has_icu, 20.0, 0.0)
+    equipment = equipment + np.where(columns.has_ventilator, 20.0, 0.0)
+    equipment = equipment + np.where(columns.has_oxygen, 10.0, 0.0)
+
+    components = {}
+    if km is not None:
+        components["distance"] = distance_score_batch(km)
+    components.update(
+        {
+            "response": response_time_score_batch(columns.response_seconds),
+            "availability": availability_score_batch(columns.is_available, columns.status_available),
+            "equipment": _clamp(equipment),
+            "driver": _clamp(columns.driver_score),
+        }
+    )
+    if km is not None:
+        components["cost"] = budget_score_batch(columns.base_price + columns.cost_per_km * np.maximum(km, 3), budget)
+    return components
+
+
+def _hospital_components(columns: HospitalColumns, km: np.ndarray | None, emergency_type: str) -> Dict[str, np.ndarray]:
+    specialty_match = columns.specialties.get(emergency_type.lower())
+    if specialty_match is None:
+        specialty_match = np.zeros(len(columns), dtype=bool)
+
+    components = {
+        "icu": _clamp(columns.icu_beds_available * 4.0),
+        "wait": _clamp(100.0 - columns.emergency_wait_minutes * 2),
+        "success": _clamp(columns.success_rate),
+    }
+    if km is not None:
+        components["distance"] = distance_score_batch(km, max_km=40)
+    components.update(
+        {
+            "specialty": np.where(specialty_match, 95.0, 60.0),
+            "cost": _clamp(100.0 / np.maximum(columns.avg_cost_index, 0.6)),
+        }
+    )
+    return components
+
+
+def _distance_km(columns, patient_loc: Tuple[float, float]) -> np.ndarray:
+    return haversine_km_batch(patient_loc[0], patient_loc[1], columns.latitude, columns.longitude)
+
+
+def doctor_scores_batch(
+    severity: str,
+    columns: DoctorColumns,
+    patient_loc: Tuple[float, float],
+    budget: float,
+    emergency_type: str,
+    adjustments: Dict[str, float],
+) -> BatchScores:
+    weights = SEVERITY_WEIGHTS_DOCTOR.get(severity, SEVERITY_WEIGHTS_DOCTOR["LOW"]).__dict__
+    km = _distance_km(columns, patient_loc)
+    return _finish(_doctor_components(columns, km, budget, emergency_type), weights, adjustments, km)
+
+
+def ambulance_scores_batch(
+    severity: str,
+    columns: AmbulanceColumns,
+    patient_loc: Tuple[float, float],
+    budget: float,
+    adjustments: Dict[str, float],
+) -> BatchScores:
+    weights = SEVERITY_WEIGHTS_AMBULANCE.get(severity, SEVERITY_WEIGHTS_AMBULANCE["LOW"])
+    km = _distance_km(columns, patient_loc)
+    return _finish(_ambulance_components(columns, km, budget), weights, adjustments, km)
+
+
+def hospital_scores_batch(
+    severity: str,
+    columns: HospitalColumns,
+    patient_loc: Tuple[float, float],
+    budget: float,
+    emergency_type: str,
+    adjustments: Dict[str, float],
+) -> BatchScores:
+    weights = SEVERITY_WEIGHTS_HOSPITAL.get(severity, SEVERITY_WEIGHTS_HOSPITAL["LOW"])
+    km = _distance_km(columns, patient_loc)
+    return _finish(_hospital_components(columns, km, emergency_type), weights, adjustments, km)
+
+
+@dataclass
+class RankedBatch:
+    columns: DoctorColumns | AmbulanceColumns | HospitalColumns
+    scores: BatchScores
+    order: np.ndarray
+
+    def __iter__(self):
+        for idx in self.order.tolist():
+            yield int(self.columns.ids[idx]), float(self.scores.totals[idx]), self.scores.breakdown(idx)
+
+
+def _ranked(columns, components_fn, weights, adjustments, patient_loc, k: int) -> RankedBatch:
+    # Location-independent components give each row a score range; rows whose best case cannot
+    # reach the k-th worst case are dropped before distances are computed.
+    static = {key: round2(values) for key, values in components_fn(columns, None).items()}
+    base = _weighted_sum(static, weights, adjustments, len(columns))
+    dynamic = [100.0 * weight * adjustments.get(key, 1.0) for key, weight in weights.items() if key not in static]
+    lower = np.minimum(100.0, base + sum(min(0.0, d) for d in dynamic))
+    upper = np.minimum(100.0, base + sum(max(0.0, d) for d in dynamic))
+    keep = prune_below_kth(lower, upper, k)
+    if keep is not None:
+        columns = columns.take(keep)
+
+    km = _distance_km(columns, patient_loc)
+    scores = _finish(components_fn(columns, km), weights, adjustments, km)
+    return RankedBatch(columns=columns, scores=scores, order=top_k(scores.totals, k, columns.ids))
+
+
+def rank_doctors_batch(
+    severity: str,
+    columns: DoctorColumns,
+    patient_loc: Tuple[float, float],
+    budget: float,
+    emergency_type: str,
+    adjustments: Dict[str, float],
+    k: int,
+) -> RankedBatch:
+    weights = SEVERITY_WEIGHTS_DOCTOR.get(severity, SEVERITY_WEIGHTS_DOCTOR["LOW"]).__dict__
+    return _ranked(
+        columns,
+        lambda cols, km: _doctor_components(cols, km, budget, emergency_type),
+        weights,
+        adjustments,
+        patient_loc,
+        k,
+    )
+
+
+def rank_ambulances_batch(
+    severity: str,
+    columns: AmbulanceColumns,
+    patient_loc: Tuple[float, float],
+    budget: float,
+    adjustments: Dict[str, float],
+    k: int,
+) -> RankedBatch:
+    weights = SEVERITY_WEIGHTS_AMBULANCE.get(severity, SEVERITY_WEIGHTS_AMBULANCE["LOW"])
+    return _ranked(
+        columns, lambda cols, km: _ambulance_components(cols, km, budget), weights, adjustments, patient_loc, k
+    )
+
+
+def rank_hospitals_batch(
+    severity: str,
+    columns: HospitalColumns,
+    patient_loc: Tuple[float, float],
+    emergency_type: str,
+    adjustments: Dict[str, float],
+    k: int,
+) -> RankedBatch:
+    weights = SEVERITY_WEIGHTS_HOSPITAL.get(severity, SEVERITY_WEIGHTS_HOSPITAL["LOW"])
+    return _ranked(
+        columns, lambda cols, km: _hospital_components(cols, km, emergency_type), weights, adjustments, patient_loc, k
+    )
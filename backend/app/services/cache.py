@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+import threading
+import time
+
+from app.core.config import settings
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl_seconds: float, stale_seconds: float = 0.0) -> None:
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        # Entries outlive their TTL by `stale_seconds`, served only through lookup() and flagged stale.
+        self.stale_seconds = stale_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        found = self.lookup(key, allow_stale=False)
+        return default if found is None else found[0]
+
+    def lookup(self, key: Hashable, allow_stale: bool = True) -> Tuple[Any, bool] | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            fresh_until, value = entry
+            if fresh_until + self.stale_seconds <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            stale = fresh_until <= now
+            if stale and not allow_stale:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return value, stale
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+ranking_cache = TTLCache(maxsize=settings.ranking_cache_size, ttl_seconds=settings.ranking_cache_ttl_seconds)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterator, List, Tuple
+import base64
+import json
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.security import decrypt_many
+from app.db.models import ChatMessage
+from app.db.schemas import ChatMessageOut
+from app.db.session import SessionLocal
+
+Cursor = Tuple[datetime, int]
+
+STREAM_PAGE_SIZE = 200
+COLUMNS = (
+    ChatMessage.id,
+    ChatMessage.session_id,
+    ChatMessage.sender_type,
+    ChatMessage.message,
+    ChatMessage.file_url,
+    ChatMessage.created_at,
+)
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    raw = f"{cursor[0].isoformat()}|{cursor[1]}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(value: str) -> Cursor:
+    created_at, message_id = base64.urlsafe_b64decode(value.encode("ascii")).decode("utf-8").rsplit("|", 1)
+    return datetime.fromisoformat(created_at), int(message_id)
+
+
+def message_page(
+    db: Session, session_id: int, after: Cursor | None, limit: int | None
+) -> Tuple[List[ChatMessageOut], Cursor | None]:
+    # Keyset page over (created_at, id); rows are read as plain tuples so nothing decrypted lands on the ORM.
+    stmt = select(*COLUMNS).where(ChatMessage.session_id == session_id)
+    if after is not None:
+        stmt = stmt.where(
+            or_(
+                ChatMessage.created_at > after[0],
+                and_(ChatMessage.created_at == after[0], ChatMessage.id > after[1]),
+            )
+        )
+    stmt = stmt.order_by(ChatMessage.created_at, ChatMessage.id)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    rows = db.execute(stmt).all()
+    more = limit is not None and len(rows) > limit
+    rows = rows[:limit] if more else rows
+
+    plain = decrypt_many([row.message for row in rows])
+    messages = [
+        ChatMessageOut(
+            id=row.id,
+            session_id=row.session_id,
+            sender_type=row.sender_type,
+            message=text or row.message,
+            file_url=row.file_url,
+            created_at=row.created_at,
+        )
+        for row, text in zip(rows, plain)
+    ]
+    next_cursor = (rows[-1].created_at, rows[-1].id) if more else None
+    return messages, next_cursor
+
+
+def stream_messages(session_id: int, after: Cursor | None) -> Iterator[str]:
+    # Own session: the request-scoped one is closed before a streamed body finishes.
+    with SessionLocal() as db:
+        while True:
+            messages, after = message_page(db, session_id, after, STREAM_PAGE_SIZE)
+            for message in messages:
+                yield json.dumps(message.model_dump(mode="json")) + "\n"
+            if after is None:
+                return
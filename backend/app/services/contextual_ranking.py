@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Tuple
+
+import numpy as np
+
+from app.services.batch_scoring import AmbulanceColumns, DoctorColumns, codes_matching
+from app.services.population_stats import Bounds
+from app.services.provider_snapshot import ProviderTable
+from app.services.scoring_service import (
+    ambulance_ai_scores,
+    ambulance_contextual_scores,
+    doctor_ai_scores,
+    doctor_contextual_scores,
+    problem_categories,
+)
+from app.services.topk import top_k
+
+SCAN_CHUNK = 512
+# Largest boost a provider outside the focus set (other city, other category) can still receive.
+DOCTOR_OUTSIDE_BOOST = 5.0
+AMBULANCE_OUTSIDE_BOOST = 9.0
+
+ScoreFn = Callable[[object], Tuple[np.ndarray, np.ndarray]]
+
+
+@dataclass
+class ContextualResult:
+    ids: np.ndarray
+    scores: np.ndarray
+    eligible: int
+    scored: int
+
+
+def _by_base(table: ProviderTable, base_fn: Callable[[object], np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    def build():
+        base = base_fn(table.columns)
+        order = np.lexsort((table.columns.ids, -base))
+        return order, base[order]
+
+    return table.memo("by_base", build)
+
+
+def _kth(scores: np.ndarray, limit: int) -> float:
+    if len(scores) < limit:
+        return -np.inf
+    return float(np.partition(scores, len(scores) - limit)[len(scores) - limit])
+
+
+def _contains(sorted_positions: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    if len(sorted_positions) == 0:
+        return np.zeros(len(positions), dtype=bool)
+    idx = np.minimum(np.searchsorted(sorted_positions, positions), len(sorted_positions) - 1)
+    return sorted_positions[idx] == positions
+
+
+def _contextual_top(
+    table: ProviderTable,
+    focus: np.ndarray,
+    score_fn: ScoreFn,
+    base_fn: Callable[[object], np.ndarray],
+    outside_boost: float,
+    min_rating: float,
+    limit: int,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    # Focus rows are scored outright; everything else is visited best base score first and the scan
+    # stops once base + outside_boost can no longer reach the current k-th score.
+    columns = table.columns
+    if min_rating > 0:
+        focus = focus[columns.rating[focus] >= min_rating]
+    scores, base = score_fn(columns.take(focus))
+    positions = [focus]
+    score_parts = [scores]
+    base_parts = [base]
+    all_scores = scores
+
+    order, base_desc = _by_base(table, base_fn)
+    for start in range(0, len(order), SCAN_CHUNK):
+        if base_desc[start] + outside_boost < _kth(all_scores, limit):
+            break
+        chunk = order[start : start + SCAN_CHUNK]
+        chunk = chunk[~_contains(focus, chunk)]
+        if min_rating > 0:
+            chunk = chunk[columns.rating[chunk] >= min_rating]
+        if len(chunk) == 0:
+            continue
+        scores, base = score_fn(columns.take(chunk))
+        positions.append(chunk)
+        score_parts.append(scores)
+        base_parts.append(base)
+        all_scores = np.concatenate(score_parts)
+
+    positions = np.concatenate(positions)
+    all_scores = np.concatenate(score_parts)
+    all_base = np.concatenate(base_parts)
+    best = top_k(all_scores, limit, -all_base, columns.ids[positions])
+    return columns.ids[positions[best]], all_scores[best], len(positions)
+
+
+def _eligible(table: ProviderTable, min_rating: float) -> int:
+    if min_rating <= 0:
+        return len(table.columns)
+    ratings = table.memo("sorted_rating", lambda: np.sort(table.columns.rating))
+    return int(len(ratings) - np.searchsorted(ratings, min_rating, "left"))
+
+
+def recommend_doctors(
+    table: ProviderTable[DoctorColumns],
+    city: str,
+    problem: str,
+    budget: float,
+    min_rating: float,
+    bounds: Bounds,
+    limit: int,
+) -> ContextualResult:
+    columns = table.columns
+    categories = codes_matching(columns.category_names, problem_categories(problem))
+    focus = np.union1d(table.city_positions(city), table.code_positions("category", categories))
+    ids, scores, scored = _contextual_top(
+        table,
+        focus,
+        lambda cols: doctor_contextual_scores(cols, city, problem, budget, bounds),
+        lambda cols: doctor_ai_scores(cols, bounds),
+        DOCTOR_OUTSIDE_BOOST,
+        min_rating,
+        limit,
+    )
+    return ContextualResult(ids=ids, scores=scores, eligible=_eligible(table, min_rating), scored=scored)
+
+
+def recommend_ambulances(
+    table: ProviderTable[AmbulanceColumns], city: str, budget: float, bounds: Bounds, limit: int
+) -> ContextualResult:
+    ids, scores, scored = _contextual_top(
+        table,
+        table.city_positions(city),
+        lambda cols: ambulance_contextual_scores(cols, city, budget, bounds=bounds),
+        lambda cols: ambulance_ai_scores(cols, bounds),
+        AMBULANCE_OUTSIDE_BOOST,
+        0.0,
+        limit,
+    )
+    return ContextualResult(ids=ids, scores=scores, eligible=len(table.columns), scored=scored)
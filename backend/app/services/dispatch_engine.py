@@ -1,44 +1,272 @@
 from __future__ import annotations
 
-from typing import Tuple
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+import threading
 
 import httpx
+import numpy as np
 
 from app.core.config import settings
-from app.services.scoring_engine import haversine_km
+from app.services.batch_scoring import haversine_km_batch
+from app.services.cache import TTLCache
+from app.services.geo_index import geohash
+from app.services.road_router import RoadGraph, route_matrix
 
+LatLng = Tuple[float, float]
+# One row per origin, one column per destination; None where the provider had no route.
+EtaMatrix = List[List["int | None"]]
 
-def _fallback_eta_seconds(km: float) -> int:
-    avg_speed_kmh = 32.0
-    return max(240, int((km / max(avg_speed_kmh, 1.0)) * 3600))
+AVG_SPEED_KMH = 32.0
+MIN_ETA_SECONDS = 240
 
 
-def estimate_eta_seconds(origin: Tuple[float, float], dest: Tuple[float, float]) -> int:
-    km = haversine_km(origin[0], origin[1], dest[0], dest[1])
-    if not settings.google_maps_api_key:
-        return _fallback_eta_seconds(km)
+def haversine_eta_seconds(lat: float, lng: float, dest_lat: np.ndarray, dest_lng: np.ndarray) -> np.ndarray:
+    km = haversine_km_batch(lat, lng, dest_lat, dest_lng)
+    return np.maximum(MIN_ETA_SECONDS, (km / AVG_SPEED_KMH * 3600).astype(np.int64))
 
-    try:
-        url = "https://maps.googleapis.com/maps/api/directions/json"
+
+class EtaProvider(ABC):
+    name = "base"
+    cacheable = True
+
+    @abstractmethod
+    def matrix(self, origins: List[LatLng], destinations: List[LatLng]) -> EtaMatrix:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class HaversineEtaProvider(EtaProvider):
+    # Offline provider: straight-line distance at an average urban ambulance speed.
+    name = "haversine"
+    cacheable = False
+
+    def matrix(self, origins: List[LatLng], destinations: List[LatLng]) -> EtaMatrix:
+        if not origins or not destinations:
+            return [[] for _ in origins]
+        dest = np.asarray(destinations, dtype=np.float64)
+        return [haversine_eta_seconds(lat, lng, dest[:, 0], dest[:, 1]).tolist() for lat, lng in origins]
+
+
+class RoadGraphEtaProvider(EtaProvider):
+    # Offline shortest travel times over a local road graph; points off the network fall back to haversine.
+    name = "road"
+    cacheable = False
+
+    def __init__(self, graph: RoadGraph) -> None:
+        self.graph = graph
+
+    def matrix(self, origins: List[LatLng], destinations: List[LatLng]) -> EtaMatrix:
+        return [
+            [None if seconds is None else max(MIN_ETA_SECONDS, seconds) for seconds in row]
+            for row in route_matrix(self.graph, origins, destinations)
+        ]
+
+
+class GoogleDistanceMatrixProvider(EtaProvider):
+    name = "google"
+    URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+    # Distance Matrix limits: 25 origins, 25 destinations and 100 elements per request.
+    MAX_SIDE = 25
+    MAX_ELEMENTS = 100
+
+    def __init__(self, api_key: str, timeout_seconds: float, pool_size: int) -> None:
+        self.api_key = api_key
+        self._client = httpx.Client(
+            timeout=timeout_seconds,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def matrix(self, origins: List[LatLng], destinations: List[LatLng]) -> EtaMatrix:
+        out: EtaMatrix = [[None] * len(destinations) for _ in origins]
+        dest_step = min(self.MAX_SIDE, len(destinations)) or 1
+        origin_step = max(1, min(self.MAX_SIDE, self.MAX_ELEMENTS // dest_step))
+        for o in range(0, len(origins), origin_step):
+            for d in range(0, len(destinations), dest_step):
+                block = self._request(origins[o : o + origin_step], destinations[d : d + dest_step])
+                for i, row in enumerate(block):
+                    out[o + i][d : d + len(row)] = row
+        return out
+
+    def _request(self, origins: List[LatLng], destinations: List[LatLng]) -> EtaMatrix:
         params = {
-            "origin": f"{origin[0]},{origin[1]}",
-            "destination": f"{dest[0]},{dest[1]}",
-            "key": settings.google_maps_api_key,
+            "origins": "|".join(f"{lat},{lng}" for lat, lng in origins),
+            "destinations": "|".join(f"{lat},{lng}" for lat, lng in destinations),
+            "key": self.api_key,
         }
-        with httpx.Client(timeout=5.0) as client:
-            res = client.get(url, params=params)
+        try:
+            res = self._client.get(self.URL, params=params)
             res.raise_for_status()
-            data = res.json()
-        routes = data.get("routes") or []
-        if not routes:
-            return _fallback_eta_seconds(km)
-        legs = routes[0].get("legs") or []
-        if not legs:
-            return _fallback_eta_seconds(km)
-        duration = legs[0].get("duration", {}).get("value")
-        if duration:
-            return int(duration)
-    except Exception:
-        return _fallback_eta_seconds(km)
-
-    return _fallback_eta_seconds(km)
+            rows = res.json().get("rows") or []
+        except Exception:
+            return [[None] * len(destinations) for _ in origins]
+        block: EtaMatrix = []
+        for i in range(len(origins)):
+            elements = rows[i].get("elements", []) if i < len(rows) else []
+            block.append(
+                [
+                    int(el["duration"]["value"]) if el.get("status") == "OK" and el.get("duration") else None
+                    for el in elements[: len(destinations)]
+                ]
+                + [None] * max(0, len(destinations) - len(elements))
+            )
+        return block
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class EtaService:
+    # Cell-to-cell ETAs are cached per time-of-day bucket. Past the TTL an entry is still served for
+    # `stale_seconds` while a background refresh fetches the new value.
+    def __init__(
+        self,
+        provider: EtaProvider,
+        cache: TTLCache,
+        cell_precision: int,
+        bucket_minutes: int,
+    ) -> None:
+        self.provider = provider
+        self.cache = cache
+        self.cell_precision = cell_precision
+        self.bucket_minutes = bucket_minutes
+        self._fallback = HaversineEtaProvider()
+        self._refreshing: Set[Tuple] = set()
+        self._refresh_lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eta-refresh")
+
+    def _key(self, origin: LatLng, dest: LatLng, bucket: int) -> Tuple:
+        return (
+            self.provider.name,
+            geohash(origin[0], origin[1], self.cell_precision),
+            geohash(dest[0], dest[1], self.cell_precision),
+            bucket,
+        )
+
+    def _bucket(self) -> int:
+        now = datetime.utcnow()
+        return (now.hour * 60 + now.minute) // max(1, self.bucket_minutes)
+
+    def eta(self, origin: LatLng, dest: LatLng) -> int:
+        return self.matrix([origin], [dest])[0][0]
+
+    def matrix(self, origins: List[LatLng], destinations: List[LatLng]) -> List[List[int]]:
+        if self.provider.cacheable:
+            out = self._cached_matrix(origins, destinations)
+        else:
+            out = self.provider.matrix(origins, destinations)
+
+        fallback = None
+        for i, row in enumerate(out):
+            for j, value in enumerate(row):
+                if value is None:
+                    if fallback is None:
+                        fallback = self._fallback.matrix(origins, destinations)
+                    row[j] = fallback[i][j]
+        return out
+
+    def _cached_matrix(self, origins: List[LatLng], destinations: List[LatLng]) -> EtaMatrix:
+        bucket = self._bucket()
+        out: List[List[int | None]] = [[None] * len(destinations) for _ in origins]
+        missing: List[Tuple[int, int]] = []
+        stale: List[Tuple[int, int]] = []
+        for i, origin in enumerate(origins):
+            for j, dest in enumerate(destinations):
+                found = self.cache.lookup(self._key(origin, dest, bucket))
+                if found is None:
+                    missing.append((i, j))
+                    continue
+                out[i][j] = found[0]
+                if found[1]:
+                    stale.append((i, j))
+
+        if missing:
+            self._fetch(origins, destinations, missing, bucket, out)
+        if stale:
+            self._schedule_refresh(origins, destinations, stale, bucket)
+        return out
+
+    def _fetch(
+        self,
+        origins: List[LatLng],
+        destinations: List[LatLng],
+        pairs: List[Tuple[int, int]],
+        bucket: int,
+        out: List[List[int | None]],
+    ) -> None:
+        # One provider call covers every origin and destination that has at least one uncached pair.
+        origin_idx = sorted({i for i, _ in pairs})
+        dest_idx = sorted({j for _, j in pairs})
+        block = self.provider.matrix([origins[i] for i in origin_idx], [destinations[j] for j in dest_idx])
+        for a, i in enumerate(origin_idx):
+            for b, j in enumerate(dest_idx):
+                value = block[a][b]
+                if value is None:
+                    continue
+                self.cache.set(self._key(origins[i], destinations[j], bucket), value)
+                if out[i][j] is None:
+                    out[i][j] = value
+
+    def _schedule_refresh(
+        self, origins: List[LatLng], destinations: List[LatLng], pairs: List[Tuple[int, int]], bucket: int
+    ) -> None:
+        with self._refresh_lock:
+            pending = []
+            for i, j in pairs:
+                key = self._key(origins[i], destinations[j], bucket)
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    pending.append((i, j))
+        if pending:
+            self._refresher.submit(self._refresh, list(origins), list(destinations), pending, bucket)
+
+    def _refresh(
+        self, origins: List[LatLng], destinations: List[LatLng], pairs: List[Tuple[int, int]], bucket: int
+    ) -> None:
+        try:
+            scratch: List[List[int | None]] = [[None] * len(destinations) for _ in origins]
+            self._fetch(origins, destinations, pairs, bucket, scratch)
+        finally:
+            with self._refresh_lock:
+                for i, j in pairs:
+                    self._refreshing.discard(self._key(origins[i], destinations[j], bucket))
+
+    def close(self) -> None:
+        self._refresher.shutdown(wait=False)
+        self.provider.close()
+
+    def stats(self) -> Dict:
+        return {"provider": self.provider.name, **self.cache.stats()}
+
+
+def build_eta_provider() -> EtaProvider:
+    name = settings.eta_provider
+    if name == "auto":
+        name = "google" if settings.google_maps_api_key else "road" if settings.road_graph_path else "haversine"
+    if name == "google" and settings.google_maps_api_key:
+        return GoogleDistanceMatrixProvider(
+            settings.google_maps_api_key, settings.eta_timeout_seconds, settings.eta_pool_size
+        )
+    if name == "road" and settings.road_graph_path:
+        return RoadGraphEtaProvider(RoadGraph.load(settings.road_graph_path))
+    return HaversineEtaProvider()
+
+
+eta_service = EtaService(
+    provider=build_eta_provider(),
+    cache=TTLCache(
+        maxsize=settings.eta_cache_size,
+        ttl_seconds=settings.eta_cache_ttl_seconds,
+        stale_seconds=settings.eta_cache_stale_seconds,
+    ),
+    cell_precision=settings.eta_cache_geohash_precision,
+    bucket_minutes=settings.eta_bucket_minutes,
+)
+
+
+def estimate_eta_seconds(origin: LatLng, dest: LatLng) -> int:
+    return eta_service.eta(origin, dest)
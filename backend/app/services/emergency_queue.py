@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+import heapq
+import itertools
+import threading
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Emergency
+
+EPOCH = datetime(2020, 1, 1)
+# Discarded entries stay in the heap until popped; past this many extra entries the heap is rebuilt.
+COMPACT_SLACK = 1024
+
+
+@dataclass
+class QueuedEmergency:
+    emergency_id: str
+    severity: str
+    severity_score: int
+    created_at: datetime
+
+
+@dataclass
+class Lease:
+    lease_id: str
+    consumer: str
+    items: Dict[str, QueuedEmergency]
+    expires_at: datetime
+
+
+class EmergencyQueue:
+    # Priority grows by `aging_points_per_minute` for every minute an emergency waits, so a LOW case
+    # eventually outranks newer severe ones. score + rate * (now - created) orders the same as
+    # score - rate * created at any instant, which lets the heap key stay fixed. Leased entries leave the
+    # heap until acked (gone for good) or released / expired (pushed back with their original key).
+    def __init__(self, aging_points_per_minute: float, lease_seconds: int) -> None:
+        self.aging_points_per_minute = aging_points_per_minute
+        self.lease_seconds = lease_seconds
+        self._heap: List[Tuple[float, int, str]] = []
+        self._queued: Dict[str, QueuedEmergency] = {}
+        self._leases: Dict[str, Lease] = {}
+        self._leased: Dict[str, str] = {}
+        self._expiry: List[Tuple[datetime, str]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _key(self, item: QueuedEmergency) -> float:
+        minutes = (item.created_at - EPOCH).total_seconds() / 60.0
+        return -(item.severity_score - self.aging_points_per_minute * minutes)
+
+    def priority(self, item: QueuedEmergency, now: datetime) -> float:
+        return item.severity_score + self.aging_points_per_minute * (now - item.created_at).total_seconds() / 60.0
+
+    def _push(self, item: QueuedEmergency) -> None:
+        self._queued[item.emergency_id] = item
+        heapq.heappush(self._heap, (self._key(item), next(self._seq), item.emergency_id))
+
+    def push(self, item: QueuedEmergency) -> None:
+        with self._lock:
+            if item.emergency_id not in self._queued and item.emergency_id not in self._leased:
+                self._push(item)
+
+    def discard(self, emergency_id: str) -> None:
+        # Dispatched through another path; a heap entry without a queued item is skipped when popped.
+        with self._lock:
+            self._queued.pop(emergency_id, None)
+            lease_id = self._leased.pop(emergency_id, None)
+            if lease_id is not None:
+                lease = self._leases[lease_id]
+                lease.items.pop(emergency_id, None)
+                if not lease.items:
+                    self._leases.pop(lease_id, None)
+            if len(self._heap) > 2 * len(self._queued) + COMPACT_SLACK:
+                self._heap = [entry for entry in self._heap if entry[2] in self._queued]
+                heapq.heapify(self._heap)
+
+    def rebuild(self, db: Session) -> int:
+        rows = db.execute(
+            select(Emergency.id, Emergency.severity, Emergency.severity_score, Emergency.created_at).where(
+                Emergency.status == "OPEN"
+            )
+        ).all()
+        with self._lock:
+            self._queued = {
+                row.id: QueuedEmergency(row.id, row.severity, row.severity_score or 0, row.created_at or EPOCH)
+                for row in rows
+            }
+            self._heap = [(self._key(item), next(self._seq), item.emergency_id) for item in self._queued.values()]
+            heapq.heapify(self._heap)
+            self._leases.clear()
+            self._leased.clear()
+            self._expiry.clear()
+        return len(rows)
+
+    def _expire(self, now: datetime) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            _, lease_id = heapq.heappop(self._expiry)
+            lease = self._leases.get(lease_id)
+            if lease is not None and lease.expires_at <= now:
+                self._return(lease)
+
+    def _return(self, lease: Lease, emergency_ids: List[str] | None = None) -> List[str]:
+        ids = list(lease.items) if emergency_ids is None else [e for e in emergency_ids if e in lease.items]
+        for emergency_id in ids:
+            self._leased.pop(emergency_id, None)
+            self._push(lease.items.pop(emergency_id))
+        if not lease.items:
+            self._leases.pop(lease.lease_id, None)
+        return ids
+
+    def lease(self, consumer: str, max_items: int, lease_seconds: int | None = None) -> Lease | None:
+        now = datetime.utcnow()
+        with self._lock:
+            self._expire(now)
+            items: Dict[str, QueuedEmergency] = {}
+            while self._heap and len(items) < max_items:
+                _, _, emergency_id = heapq.heappop(self._heap)
+                item = self._queued.pop(emergency_id, None)
+                if item is not None:
+                    items[emergency_id] = item
+            if not items:
+                return None
+            lease = Lease(
+                lease_id=str(uuid.uuid4()),
+                consumer=consumer,
+                items=items,
+                expires_at=now + timedelta(seconds=lease_seconds or self.lease_seconds),
+            )
+            self._leases[lease.lease_id] = lease
+            for emergency_id in items:
+                self._leased[emergency_id] = lease.lease_id
+            heapq.heappush(self._expiry, (lease.expires_at, lease.lease_id))
+            return lease
+
+    def ack(self, lease_id: str, emergency_ids: List[str] | None = None) -> List[str] | None:
+        with self._lock:
+            self._expire(datetime.utcnow())
+            lease = self._leases.get(lease_id)
+            if lease is None:
+                return None
+            ids = list(lease.items) if emergency_ids is None else [e for e in emergency_ids if e in lease.items]
+            for emergency_id in ids:
+                lease.items.pop(emergency_id)
+                self._leased.pop(emergency_id, None)
+            if not lease.items:
+                self._leases.pop(lease_id, None)
+            return ids
+
+    def release(self, lease_id: str, emergency_ids: List[str] | None = None) -> List[str] | None:
+        with self._lock:
+            self._expire(datetime.utcnow())
+            lease = self._leases.get(lease_id)
+            if lease is None:
+                return None
+            return self._return(lease, emergency_ids)
+
+    def extend(self, lease_id: str, lease_seconds: int | None = None) -> Lease | None:
+        with self._lock:
+            now = datetime.utcnow()
+            self._expire(now)
+            lease = self._leases.get(lease_id)
+            if lease is None:
+                return None
+            lease.expires_at = now + timedelta(seconds=lease_seconds or self.lease_seconds)
+            heapq.heappush(self._expiry, (lease.expires_at, lease.lease_id))
+            return lease
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._expire(datetime.utcnow())
+            return {
+                "queued": len(self._queued),
+                "leased": len(self._leased),
+                "leases": len(self._leases),
+                "heap_entries": len(self._heap),
+            }
+
+
+emergency_queue = EmergencyQueue(
+    aging_points_per_minute=settings.queue_aging_points_per_minute,
+    lease_seconds=settings.queue_lease_seconds,
+)
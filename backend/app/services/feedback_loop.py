@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.db.models import AnalyticsEvent, FeedbackOutcome
+from app.services.cache import ranking_cache
 
 DEFAULT_ADJUSTMENTS: Dict[str, float] = {
     "experience": 1.0,
@@ -26,15 +27,19 @@ DEFAULT_ADJUSTMENTS: Dict[str, float] = {
 }
 
 
-def load_adjustments(db: Session) -> Dict[str, float]:
+def load_adjustments_versioned(db: Session) -> Tuple[Dict[str, float], str]:
     event = db.scalars(
         select(AnalyticsEvent)
         .where(AnalyticsEvent.event_type == "weight_update")
         .order_by(AnalyticsEvent.created_at.desc())
     ).first()
     if event and isinstance(event.payload, dict):
-        return {**DEFAULT_ADJUSTMENTS, **event.payload}
-    return DEFAULT_ADJUSTMENTS.copy()
+        return {**DEFAULT_ADJUSTMENTS, **event.payload}, event.id
+    return DEFAULT_ADJUSTMENTS.copy(), "default"
+
+
+def load_adjustments(db: Session) -> Dict[str, float]:
+    return load_adjustments_versioned(db)[0]
 
 
 def update_adjustments(db: Session, feedback: FeedbackOutcome) -> Dict[str, float]:
@@ -58,4 +63,5 @@ def update_adjustments(db: Session, feedback: FeedbackOutcome) -> Dict[str, floa
     )
     db.add(event)
     db.commit()
+    ranking_cache.clear()
     return adjustments
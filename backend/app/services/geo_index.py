@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import Tuple
+import math
+
+import numpy as np
+
+from app.services.batch_scoring import haversine_km_batch
+
+KM_PER_DEGREE = 6371.0 * math.pi / 180.0
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lng: float, precision: int = 6) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                value = value * 2 + 1
+                lng_lo = mid
+            else:
+                value = value * 2
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = value * 2 + 1
+                lat_lo = mid
+            else:
+                value = value * 2
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+class GridIndex:
+    def __init__(self, latitude: np.ndarray, longitude: np.ndarray, cell_deg: float = 0.1) -> None:
+        self.cell_deg = cell_deg
+        self.columns = int(round(360.0 / cell_deg))
+        self.latitude = latitude
+        self.longitude = longitude
+
+        located = ~((latitude == 0.0) & (longitude == 0.0))
+        self.unlocated = np.flatnonzero(~located)
+        rows = np.flatnonzero(located)
+        cell_y = np.floor(latitude[rows] / cell_deg).astype(np.int64)
+        cell_x = np.floor(longitude[rows] / cell_deg).astype(np.int64) % self.columns
+        keys = cell_y * self.columns + cell_x
+
+        order = np.argsort(keys, kind="stable")
+        self._positions = rows[order]
+        sorted_keys = keys[order]
+        unique_keys, self._starts = np.unique(sorted_keys, return_index=True)
+        self._ends = np.append(self._starts[1:], len(sorted_keys))
+        self._cell_y = unique_keys // self.columns
+        self._cell_x = unique_keys % self.columns
+
+    def __len__(self) -> int:
+        return len(self.latitude)
+
+    def _cells_in_box(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        dlat = radius_km / KM_PER_DEGREE
+        y_lo = math.floor((lat - dlat) / self.cell_deg)
+        y_hi = math.floor((lat + dlat) / self.cell_deg)
+        mask = (self._cell_y >= y_lo) & (self._cell_y <= y_hi)
+
+        cos_lat = min(math.cos(math.radians(lat - dlat)), math.cos(math.radians(lat + dlat)))
+        if cos_lat <= 0.0 or abs(lat) + dlat >= 90.0:
+            return np.flatnonzero(mask)
+        dlng = radius_km / (KM_PER_DEGREE * cos_lat)
+        if dlng >= 180.0:
+            return np.flatnonzero(mask)
+        x_lo = math.floor((lng - dlng) / self.cell_deg) % self.columns
+        x_hi = math.floor((lng + dlng) / self.cell_deg) % self.columns
+        if x_lo <= x_hi:
+            mask &= (self._cell_x >= x_lo) & (self._cell_x <= x_hi)
+        else:
+            mask &= (self._cell_x >= x_lo) | (self._cell_x <= x_hi)
+        return np.flatnonzero(mask)
+
+    def within(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        cells = self._cells_in_box(lat, lng, radius_km)
+        if len(cells) == 0:
+            return self.unlocated
+        positions = np.concatenate([self._positions[self._starts[c] : self._ends[c]] for c in cells])
+        km = haversine_km_batch(lat, lng, self.latitude[positions], self.longitude[positions])
+        positions = positions[km <= radius_km]
+        return np.sort(np.concatenate((positions, self.unlocated)))
+
+    def nearby(
+        self,
+        patient_loc: Tuple[float, float],
+        radius_km: float,
+        min_candidates: int,
+        max_radius_km: float,
+        bounds: slice | None = None,
+        mask: np.ndarray | None = None,
+    ) -> np.ndarray | None:
+        # `mask` marks the rows that may be returned; only those count towards min_candidates.
+        lat, lng = patient_loc
+        if lat == 0.0 and lng == 0.0:
+            return None
+        radius = radius_km
+        while True:
+            found = self.within(lat, lng, radius)
+            if bounds is not None:
+                found = found[(found >= bounds.start) & (found < bounds.stop)]
+            if mask is not None:
+                found = found[mask[found]]
+            if len(found) >= min_candidates:
+                return found
+            if radius >= max_radius_km:
+                return None
+            radius = min(radius * 2, max_radius_km)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Set, Tuple
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app.core.config import settings
+
+
+class CircuitBreaker:
+    # Closed until `failure_threshold` consecutive failures, then open for `reset_seconds`; after that
+    # a single trial call is let through (half-open) and its outcome closes or re-opens the breaker.
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self._failures, "rejected": self.rejected}
+
+
+class LlmTriageClient:
+    # One pooled AsyncClient for the life of the app; connections to the ai-service are reused across triages.
+    # Once `batch_backlog` single calls are in flight, further complaints are coalesced into /triage/batch calls.
+    def __init__(
+        self,
+        timeout_seconds: float,
+        pool_size: int,
+        breaker: CircuitBreaker,
+        batch_backlog: int,
+        batch_size: int,
+        batch_wait_seconds: float,
+    ) -> None:
+        self.timeout_seconds = timeout_seconds
+        self.pool_size = pool_size
+        self.breaker = breaker
+        self.batch_backlog = batch_backlog
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        self._client: httpx.AsyncClient | None = None
+        self._inflight = 0
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._batches: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.ai_service_url) and settings.enable_llm_triage
+
+    def start(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=settings.ai_service_url,
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def triage(self, text: str) -> Dict | None:
+        if not self.enabled or self._client is None:
+            return None
+        if self.batch_backlog > 0 and self._inflight >= self.batch_backlog:
+            return await self._enqueue(text)
+        return await self._post("/triage", {"complaint_text": text})
+
+    async def _post(self, path: str, body: Dict) -> Dict | None:
+        if not self.breaker.allow():
+            return None
+        self._inflight += 1
+        try:
+            res = await self._client.post(path, json=body)
+            res.raise_for_status()
+            payload = res.json()
+        except asyncio.CancelledError:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            return None
+        finally:
+            self._inflight -= 1
+        self.breaker.record_success()
+        return payload
+
+    async def _enqueue(self, text: str) -> Dict | None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_wait_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _send_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        results: List[Dict | None] = [None] * len(batch)
+        try:
+            payload = await self._post("/triage/batch", {"complaint_texts": [text for text, _ in batch]})
+            if payload and len(payload.get("results", [])) == len(batch):
+                results = payload["results"]
+        finally:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+llm_client = LlmTriageClient(
+    timeout_seconds=settings.llm_timeout_seconds,
+    pool_size=settings.llm_pool_size,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.llm_breaker_failures,
+        reset_seconds=settings.llm_breaker_reset_seconds,
+    ),
+    batch_backlog=settings.llm_batch_backlog,
+    batch_size=settings.llm_batch_size,
+    batch_wait_seconds=settings.llm_batch_wait_ms / 1000.0,
+)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Tuple
+import threading
+
+import numpy as np
+
+DOCTOR_STAT_FIELDS = (
+    "rating",
+    "experience_years",
+    "response_minutes",
+    "consultation_fee",
+    "reviews_count",
+    "total_patients_served",
+)
+AMBULANCE_STAT_FIELDS = ("response_minutes", "rating", "cost_per_km", "base_price")
+
+Bounds = Dict[str, Tuple[float, float]]
+
+
+class ValueCounter:
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self._low: float | None = None
+        self._high: float | None = None
+
+    def apply(self, values: np.ndarray, counts: np.ndarray) -> None:
+        stale = False
+        for value, count in zip(values.tolist(), counts.tolist()):
+            total = self.counts[value] + count
+            if total > 0:
+                self.counts[value] = total
+                if count > 0 and self._low is not None:
+                    self._low = min(self._low, value)
+                    self._high = max(self._high, value)
+            else:
+                del self.counts[value]
+                stale = stale or value == self._low or value == self._high
+        if stale or self._low is None:
+            self._low = min(self.counts) if self.counts else None
+            self._high = max(self.counts) if self.counts else None
+
+    def bounds(self) -> Tuple[float, float]:
+        if self._low is None:
+            return 0.0, 1.0
+        return float(self._low), float(self._high)
+
+
+class PopulationStats:
+    # Value counts per attribute, globally and per city, kept in step with the provider snapshot.
+    def __init__(self, fields: Tuple[str, ...]) -> None:
+        self.fields = fields
+        self._scopes: Dict[str | None, Dict[str, ValueCounter]] = {}
+        self._bounds: Dict[str | None, Bounds] = {}
+        self._lock = threading.Lock()
+        self._ids = np.empty(0, dtype=np.int64)
+        self._cities = np.empty(0, dtype=object)
+        self._values = np.empty((0, len(fields)))
+
+    def _scope(self, city: str | None) -> Dict[str, ValueCounter]:
+        if city not in self._scopes:
+            self._scopes[city] = {name: ValueCounter() for name in self.fields}
+        return self._scopes[city]
+
+    def _apply(self, cities: np.ndarray, values: np.ndarray, sign: int) -> None:
+        if len(values) == 0:
+            return
+        groups = [(None, values)] + [(city, values[cities == city]) for city in np.unique(cities).tolist()]
+        for city, rows in groups:
+            scope = self._scope(city)
+            for col, name in enumerate(self.fields):
+                distinct, counts = np.unique(rows[:, col], return_counts=True)
+                scope[name].apply(distinct, counts * sign)
+
+    def sync(self, columns) -> int:
+        # Only rows that were added, removed or changed since the last sync touch the counters.
+        order = np.argsort(columns.ids, kind="stable")
+        ids = columns.ids[order]
+        cities = np.asarray(columns.city_names, dtype=object)[columns.city[order]] if len(ids) else self._cities[:0]
+        values = np.column_stack([getattr(columns, name)[order].astype(np.float64) for name in self.fields])
+        values = values.reshape(len(ids), len(self.fields))
+
+        with self._lock:
+            _, old_pos, new_pos = np.intersect1d(self._ids, ids, assume_unique=True, return_indices=True)
+            same = (self._cities[old_pos] == cities[new_pos]) & (self._values[old_pos] == values[new_pos]).all(axis=1)
+            old_keep = np.zeros(len(self._ids), dtype=bool)
+            old_keep[old_pos[same]] = True
+            new_keep = np.zeros(len(ids), dtype=bool)
+            new_keep[new_pos[same]] = True
+
+            self._apply(self._cities[~old_keep], self._values[~old_keep], -1)
+            self._apply(cities[~new_keep], values[~new_keep], 1)
+            self._ids, self._cities, self._values = ids, cities, values
+            self._bounds = {
+                city: {name: counter.bounds() for name, counter in scope.items()}
+                for city, scope in self._scopes.items()
+            }
+            return int((~old_keep).sum() + (~new_keep).sum())
+
+    def bounds(self, city: str | None = None) -> Bounds:
+        found = self._bounds.get(city)
+        if found is None:
+            return {name: (0.0, 1.0) for name in self.fields}
+        return found
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Generic, List, Sequence, Tuple, TypeVar
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Ambulance, Doctor, Hospital, HospitalSpecialization, ProviderReservation
+from app.services.batch_scoring import AmbulanceColumns, DoctorColumns, HospitalColumns
+from app.services.cache import ranking_cache
+from app.services.geo_index import GridIndex
+from app.services.population_stats import AMBULANCE_STAT_FIELDS, DOCTOR_STAT_FIELDS, PopulationStats
+
+DOCTOR_FIELDS = (
+    Doctor.id,
+    Doctor.city,
+    Doctor.latitude,
+    Doctor.longitude,
+    Doctor.experience_years,
+    Doctor.rating,
+    Doctor.rating_count,
+    Doctor.reviews_count,
+    Doctor.total_patients_served,
+    Doctor.response_time_minutes,
+    Doctor.response_time_seconds,
+    Doctor.is_available,
+    Doctor.availability_status,
+    Doctor.verified_status,
+    Doctor.category,
+    Doctor.consultation_fee,
+    Doctor.success_rate,
+)
+
+AMBULANCE_FIELDS = (
+    Ambulance.id,
+    Ambulance.city,
+    Ambulance.latitude,
+    Ambulance.longitude,
+    Ambulance.rating,
+    Ambulance.response_time_minutes,
+    Ambulance.response_time_seconds,
+    Ambulance.is_available,
+    Ambulance.availability_status,
+    Ambulance.verified_status,
+    Ambulance.vehicle_type,
+    Ambulance.has_icu,
+    Ambulance.has_ventilator,
+    Ambulance.has_oxygen,
+    Ambulance.driver_score,
+    Ambulance.base_price,
+    Ambulance.cost_per_km,
+)
+
+HOSPITAL_FIELDS = (
+    Hospital.id,
+    Hospital.city,
+    Hospital.latitude,
+    Hospital.longitude,
+    Hospital.icu_beds_available,
+    Hospital.emergency_wait_minutes,
+    Hospital.success_rate,
+    Hospital.avg_cost_index,
+    Hospital.is_available,
+)
+
+ColumnsT = TypeVar("ColumnsT", DoctorColumns, AmbulanceColumns, HospitalColumns)
+
+
+@dataclass
+class ProviderTable(Generic[ColumnsT]):
+    columns: ColumnsT
+    city_slices: Dict[str, slice] = field(default_factory=dict)
+    geo: GridIndex = field(init=False)
+    _memo: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+
+    reserved: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.geo = GridIndex(self.columns.latitude, self.columns.longitude, settings.geo_cell_degrees)
+        # Held by an active dispatch or booking lease; kept apart from the roster flag is_available.
+        self.reserved = np.zeros(len(self.columns), dtype=bool)
+        # Rows are loaded ordered by city, so every city is one contiguous block of the arrays.
+        codes = self.columns.city
+        if len(codes) == 0:
+            return
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+        ends = np.concatenate((starts[1:], [len(codes)]))
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            self.city_slices[self.columns.city_names[codes[start]]] = slice(start, end)
+
+    def for_city(self, city: str | None) -> ColumnsT:
+        if not city:
+            return self.columns
+        return self.columns.take(self.city_slices.get(city, slice(0, 0)))
+
+    def memo(self, key: str, build: Callable[[], Any]) -> Any:
+        # Derived arrays live as long as the snapshot they were computed from.
+        if key not in self._memo:
+            self._memo[key] = build()
+        return self._memo[key]
+
+    def position(self, provider_id: int) -> int | None:
+        ids = self.columns.ids
+        order = self.memo("id_order", lambda: np.argsort(ids, kind="stable"))
+        at = int(np.searchsorted(ids, provider_id, sorter=order))
+        if at < len(ids) and ids[order[at]] == provider_id:
+            return int(order[at])
+        return None
+
+    def set_reserved(self, provider_id: int, reserved: bool) -> bool:
+        pos = self.position(provider_id)
+        if pos is None or bool(self.reserved[pos]) == reserved:
+            return False
+        self.reserved[pos] = reserved
+        return True
+
+    def city_positions(self, city: str) -> np.ndarray:
+        wanted = city.strip().lower()
+        blocks = [np.arange(sl.start, sl.stop) for name, sl in self.city_slices.items() if name.strip().lower() == wanted]
+        return np.concatenate(blocks) if blocks else np.empty(0, dtype=np.int64)
+
+    def code_positions(self, attribute: str, codes: Sequence[int]) -> np.ndarray:
+        def build():
+            values = getattr(self.columns, attribute)
+            order = np.argsort(values, kind="stable")
+            return order, values[order]
+
+        order, sorted_codes = self.memo(f"{attribute}_index", build)
+        blocks = [
+            order[np.searchsorted(sorted_codes, code, "left") : np.searchsorted(sorted_codes, code, "right")]
+            for code in codes
+        ]
+        return np.sort(np.concatenate(blocks)) if blocks else np.empty(0, dtype=np.int64)
+
+    def nearby(
+        self,
+        city: str | None,
+        patient_loc: Tuple[float, float],
+        radius_km: float,
+        min_candidates: int,
+        skip_reserved: bool = False,
+    ) -> ColumnsT:
+        # With skip_reserved only unreserved rows count towards min_candidates, so a search around a busy
+        # fleet widens its radius instead of coming back short.
+        mask = ~self.reserved if skip_reserved and self.reserved.any() else None
+        bounds = None
+        if city:
+            bounds = self.city_slices.get(city)
+            if bounds is None:
+                return self._fallback(city, mask)
+        found = self.geo.nearby(patient_loc, radius_km, min_candidates, settings.geo_max_radius_km, bounds, mask)
+        if found is None:
+            return self._fallback(city, mask)
+        return self.columns.take(found)
+
+    def _fallback(self, city: str | None, mask: np.ndarray | None) -> ColumnsT:
+        if mask is None:
+            return self.for_city(city)
+        positions = np.arange(len(self.columns))
+        if city:
+            positions = positions[self.city_slices.get(city, slice(0, 0))]
+        return self.columns.take(positions[mask[positions]])
+
+
+@dataclass
+class SnapshotState:
+    version: int
+    loaded_at: datetime
+    loaded_monotonic: float
+    generation: int
+    doctors: ProviderTable[DoctorColumns]
+    ambulances: ProviderTable[AmbulanceColumns]
+    hospitals: ProviderTable[HospitalColumns]
+
+
+def _load_specializations(db: Session) -> Dict[int, List[str]]:
+    rows = db.execute(select(HospitalSpecialization.hospital_id, HospitalSpecialization.specialization)).all()
+    result: Dict[int, List[str]] = {}
+    for hospital_id, specialization in rows:
+        result.setdefault(hospital_id, []).append(specialization)
+    return result
+
+
+def load_rows(db: Session, model, ids: Sequence[int]) -> list:
+    rows = {row.id: row for row in db.scalars(select(model).where(model.id.in_(list(ids))))}
+    return [rows[target_id] for target_id in ids if target_id in rows]
+
+
+class ProviderSnapshot:
+    def __init__(self, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._state: SnapshotState | None = None
+        self._generation = 0
+        self._version = 0
+        self._listeners: List[Callable[[], None]] = []
+        self.doctor_stats = PopulationStats(DOCTOR_STAT_FIELDS)
+        self.ambulance_stats = PopulationStats(AMBULANCE_STAT_FIELDS)
+
+    @property
+    def version(self) -> int:
+        return self._state.version if self._state else 0
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.append(callback)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+        ranking_cache.clear()
+        for callback in self._listeners:
+            callback()
+
+    def set_reserved(self, provider_type: str, provider_id: int, reserved: bool) -> None:
+        # Claims and releases flip the live reserved mask so ranking sees them without reloading; the new
+        # version keeps cached rankings from before the change from being served.
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            table = state.doctors if provider_type == "DOCTOR" else state.ambulances
+            if not table.set_reserved(provider_id, reserved):
+                return
+            self._version += 1
+            state.version = self._version
+
+    def _is_stale(self, state: SnapshotState | None) -> bool:
+        if state is None or state.generation != self._generation:
+            return True
+        return self.ttl_seconds > 0 and time.monotonic() - state.loaded_monotonic > self.ttl_seconds
+
+    def current(self, db: Session) -> SnapshotState:
+        state = self._state
+        if self._is_stale(state):
+            with self._lock:
+                state = self._state
+                if self._is_stale(state):
+                    state = self._load(db)
+                    self._state = state
+        return state
+
+    def refresh(self, db: Session) -> SnapshotState:
+        with self._lock:
+            self._state = self._load(db)
+            return self._state
+
+    def _load(self, db: Session) -> SnapshotState:
+        generation = self._generation
+        doctors = db.execute(select(*DOCTOR_FIELDS).order_by(Doctor.city, Doctor.id)).all()
+        ambulances = db.execute(select(*AMBULANCE_FIELDS).order_by(Ambulance.city, Ambulance.id)).all()
+        hospitals = db.execute(select(*HOSPITAL_FIELDS).order_by(Hospital.city, Hospital.id)).all()
+        self._version += 1
+        state = SnapshotState(
+            version=self._version,
+            loaded_at=datetime.utcnow(),
+            loaded_monotonic=time.monotonic(),
+            generation=generation,
+            doctors=ProviderTable(DoctorColumns.from_rows(doctors)),
+            ambulances=ProviderTable(AmbulanceColumns.from_rows(ambulances)),
+            hospitals=ProviderTable(HospitalColumns.from_rows(hospitals, _load_specializations(db))),
+        )
+        tables = {"DOCTOR": state.doctors, "AMBULANCE": state.ambulances}
+        active = db.execute(
+            select(ProviderReservation.provider_type, ProviderReservation.provider_id).where(
+                ProviderReservation.status == "ACTIVE", ProviderReservation.expires_at >= datetime.utcnow()
+            )
+        )
+        for provider_type, provider_id in active:
+            if provider_type in tables:
+                tables[provider_type].set_reserved(provider_id, True)
+        self.doctor_stats.sync(state.doctors.columns)
+        self.ambulance_stats.sync(state.ambulances.columns)
+        return state
+
+
+provider_snapshot = ProviderSnapshot(ttl_seconds=settings.provider_snapshot_ttl_seconds)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Dict, Sequence
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Emergency, RankingScore
+
+# Breakdowns are stored as a list in this order per target type instead of a dict of repeated keys.
+BREAKDOWN_FIELDS: Dict[str, tuple] = {
+    "doctor": ("experience", "bayesian", "distance", "response", "availability", "emergency_match", "budget", "success"),
+    "ambulance": ("distance", "response", "availability", "equipment", "driver", "cost"),
+    "hospital": ("icu", "wait", "success", "distance", "specialty", "cost"),
+}
+
+
+def encode_breakdown(target_type: str, breakdown: Dict[str, float]) -> list | dict:
+    fields = BREAKDOWN_FIELDS.get(target_type)
+    if fields is None or not set(breakdown) <= set(fields):
+        return breakdown
+    return [breakdown.get(name) for name in fields]
+
+
+def decode_breakdown(target_type: str, stored: list | dict | None) -> Dict[str, float]:
+    if isinstance(stored, dict):
+        return stored
+    if not stored:
+        return {}
+    fields = BREAKDOWN_FIELDS[target_type]
+    return {name: value for name, value in zip(fields, stored) if value is not None}
+
+
+def compact_ranking_scores(db: Session, emergency_ids: Sequence[str] | None = None) -> int:
+    # Once an emergency is resolved only the latest explanation per target is still reachable through why-ranked.
+    ranked = (
+        select(
+            RankingScore.id,
+            func.row_number()
+            .over(
+                partition_by=(RankingScore.emergency_id, RankingScore.target_type, RankingScore.target_id),
+                order_by=(RankingScore.created_at.desc(), RankingScore.id.desc()),
+            )
+            .label("position"),
+        )
+        .join(Emergency, Emergency.id == RankingScore.emergency_id)
+        .where(Emergency.status == "RESOLVED")
+    )
+    if emergency_ids is not None:
+        ranked = ranked.where(RankingScore.emergency_id.in_(list(emergency_ids)))
+    ranked = ranked.subquery()
+    stale = select(ranked.c.id).where(ranked.c.position > 1)
+    result = db.execute(delete(RankingScore).where(RankingScore.id.in_(stale)))
+    db.commit()
+    return result.rowcount or 0
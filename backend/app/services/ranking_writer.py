@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+import logging
+import queue
+import threading
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import RankingScore
+from app.db.session import SessionLocal
+from app.services.ranking_explanations import encode_breakdown
+
+logger = logging.getLogger(__name__)
+
+PendingKey = Tuple[str, str, int]
+
+
+def ranking_record(emergency_id: str, target_type: str, target_id: int, score_total: float, breakdown: dict) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "emergency_id": emergency_id,
+        "target_type": target_type,
+        "target_id": target_id,
+        "score_total": score_total,
+        "breakdown": encode_breakdown(target_type, breakdown),
+        "created_at": datetime.utcnow(),
+    }
+
+
+class RankingScoreWriter:
+    def __init__(self, mode: str, queue_size: int, batch_size: int, flush_seconds: float, retries: int) -> None:
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.retries = retries
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._pending: Dict[PendingKey, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._requeued: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.mode != "async" or self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ranking-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def submit(self, db: Session, records: List[Dict[str, Any]]) -> None:
+        # Rows that cannot be queued are inserted on the caller's session and committed with the request.
+        overflow = records
+        if self.running:
+            overflow = []
+            for record in records:
+                with self._pending_lock:
+                    key = (record["emergency_id"], record["target_type"], record["target_id"])
+                    self._pending[key] = record
+                try:
+                    self._queue.put_nowait(record)
+                except queue.Full:
+                    self._forget([record])
+                    overflow.append(record)
+        if overflow:
+            db.execute(insert(RankingScore), overflow)
+
+    def pending(self, emergency_id: str, target_type: str, target_id: int) -> Dict[str, Any] | None:
+        with self._pending_lock:
+            return self._pending.get((emergency_id, target_type, target_id))
+
+    def flush(self) -> None:
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            if not self._write_with_retry(batch):
+                # Shutting down: whatever is still queued cannot be written either.
+                batch.extend(self._drain_all())
+                logger.error("Dropping %d ranking rows that could not be written on flush", len(batch))
+                self._forget(batch)
+                return
+
+    def _drain(self, block: bool) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=self.flush_seconds))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _drain_all(self) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return rows
+            rows.extend(batch)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._drain(block=True)
+            if batch and not self._write_with_retry(batch):
+                self._requeue(batch)
+
+    def _write_with_retry(self, batch: List[Dict[str, Any]]) -> bool:
+        for attempt in range(1, self.retries + 1):
+            try:
+                self._write(batch)
+                return True
+            except Exception:
+                logger.exception("Writing %d ranking rows failed (attempt %d/%d)", len(batch), attempt, self.retries)
+                if attempt < self.retries:
+                    self._stop.wait(self.flush_seconds * attempt)
+        return False
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        # A failed batch goes to the back of the queue and stays pending (visible to why-ranked), so a short
+        # database outage loses nothing. Rows are given up once they have been requeued `retries` times or
+        # no longer fit in the queue.
+        dropped = []
+        for record in batch:
+            count = self._requeued.get(record["id"], 0) + 1
+            if count > self.retries:
+                dropped.append(record)
+                continue
+            try:
+                self._queue.put_nowait(record)
+                self._requeued[record["id"]] = count
+            except queue.Full:
+                dropped.append(record)
+        if dropped:
+            logger.error("Dropping %d ranking rows after repeated write failures", len(dropped))
+            self._forget(dropped)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        with SessionLocal() as db:
+            db.execute(insert(RankingScore), batch)
+            db.commit()
+        self._forget(batch)
+
+    def _forget(self, records: List[Dict[str, Any]]) -> None:
+        with self._pending_lock:
+            for record in records:
+                self._requeued.pop(record["id"], None)
+                key = (record["emergency_id"], record["target_type"], record["target_id"])
+                if self._pending.get(key) is record:
+                    del self._pending[key]
+
+
+ranking_writer = RankingScoreWriter(
+    mode=settings.ranking_write_mode,
+    queue_size=settings.ranking_write_queue_size,
+    batch_size=settings.ranking_write_batch_size,
+    flush_seconds=settings.ranking_write_flush_seconds,
+    retries=settings.ranking_write_retries,
+)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Iterable, List
+import threading
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import ProviderReservation
+from app.db.session import SessionLocal
+from app.services.provider_snapshot import provider_snapshot
+
+RESERVABLE = {"AMBULANCE", "DOCTOR"}
+
+
+class ProviderUnavailable(Exception):
+    pass
+
+
+def claim(
+    db: Session, provider_type: str, provider_id: int, holder: str, lease_seconds: int | None = None
+) -> ProviderReservation | None:
+    # The unique index on ACTIVE reservations is the claim: of two concurrent dispatches only the first
+    # insert succeeds (Postgres makes the second wait for the first to commit; SQLite serialises writers).
+    # The roster flag is_available is not touched, so on-call and off-shift providers rank and dispatch as
+    # before. Nothing is committed here so the claim lands with the caller's assignment rows.
+    if provider_type not in RESERVABLE:
+        return None
+    now = datetime.utcnow()
+    # A lapsed lease the sweeper has not reached yet must not block the provider.
+    db.execute(
+        update(ProviderReservation)
+        .where(
+            ProviderReservation.provider_type == provider_type,
+            ProviderReservation.provider_id == provider_id,
+            ProviderReservation.status == "ACTIVE",
+            ProviderReservation.expires_at < now,
+        )
+        .values(status="EXPIRED", released_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    reservation = ProviderReservation(
+        provider_type=provider_type,
+        provider_id=provider_id,
+        holder=holder,
+        status="ACTIVE",
+        claimed_at=now,
+        expires_at=now + timedelta(seconds=lease_seconds or settings.reservation_lease_seconds),
+    )
+    try:
+        with db.begin_nested():
+            db.add(reservation)
+    except IntegrityError:
+        raise ProviderUnavailable(f"{provider_type.title()} {provider_id} is already reserved")
+    return reservation
+
+
+def release(db: Session, reservations: Iterable[ProviderReservation], status: str = "RELEASED") -> List[ProviderReservation]:
+    released = []
+    now = datetime.utcnow()
+    for reservation in reservations:
+        if reservation.status != "ACTIVE":
+            continue
+        reservation.status = status
+        reservation.released_at = now
+        released.append(reservation)
+    return released
+
+
+def release_for_tracking(db: Session, tracking_id: int) -> List[ProviderReservation]:
+    active = db.scalars(
+        select(ProviderReservation).where(
+            ProviderReservation.tracking_id == tracking_id, ProviderReservation.status == "ACTIVE"
+        )
+    )
+    return release(db, list(active))
+
+
+def release_expired(db: Session) -> List[ProviderReservation]:
+    expired = db.scalars(
+        select(ProviderReservation).where(
+            ProviderReservation.status == "ACTIVE", ProviderReservation.expires_at < datetime.utcnow()
+        )
+    )
+    return release(db, list(expired), status="EXPIRED")
+
+
+def publish(reservations: Iterable[ProviderReservation | None]) -> None:
+    # Call after commit: mirrors the committed reservations into the in-memory snapshot ranking reads.
+    for reservation in reservations:
+        if reservation is not None:
+            provider_snapshot.set_reserved(
+                reservation.provider_type, reservation.provider_id, reservation.status == "ACTIVE"
+            )
+
+
+class LeaseSweeper:
+    # Returns providers whose lease ran out (the trip was never marked ARRIVED) to the available pool.
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="lease-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def sweep(self) -> int:
+        with SessionLocal() as db:
+            expired = release_expired(db)
+            db.commit()
+            publish(expired)
+        return len(expired)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.sweep()
+            except Exception:
+                # Leases stay claimed until the next pass.
+                continue
+
+
+lease_sweeper = LeaseSweeper(interval_seconds=settings.reservation_sweep_seconds)
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+import heapq
+import math
+
+import numpy as np
+
+from app.services.batch_scoring import haversine_km_batch
+from app.services.geo_index import GridIndex
+
+LatLng = Tuple[float, float]
+
+SNAP_CELL_DEGREES = 0.01
+SNAP_MAX_KM = 5.0
+# Speed assumed for the stretch between a point and the road node it snaps to.
+ACCESS_SPEED_KMH = 20.0
+# Witness searches during contraction give up after this many settled nodes; a missed witness only
+# costs an unnecessary shortcut, never a wrong answer.
+WITNESS_SETTLE_LIMIT = 60
+BACKWARD_CACHE_SIZE = 4096
+
+
+def _csr(size: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> Tuple[list, list, list]:
+    order = np.argsort(sources, kind="stable")
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=size)))).astype(np.int64)
+    return indptr.tolist(), targets[order].tolist(), weights[order].tolist()
+
+
+class RoadGraph:
+    # Directed road network with travel times in seconds, answered with a contraction hierarchy.
+    # Files are .npz archives with node_lat, node_lng, edge_from, edge_to and edge_seconds (from an
+    # OSM extract); save() adds the hierarchy (ch_rank, ch_from, ch_to, ch_seconds) so load() can skip
+    # the contraction step.
+    def __init__(
+        self,
+        node_lat: np.ndarray,
+        node_lng: np.ndarray,
+        edge_from: np.ndarray,
+        edge_to: np.ndarray,
+        edge_seconds: np.ndarray,
+        hierarchy: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] | None = None,
+    ) -> None:
+        self.node_lat = np.asarray(node_lat, dtype=np.float64)
+        self.node_lng = np.asarray(node_lng, dtype=np.float64)
+        self.edge_from = np.asarray(edge_from, dtype=np.int64)
+        self.edge_to = np.asarray(edge_to, dtype=np.int64)
+        self.edge_seconds = np.asarray(edge_seconds, dtype=np.float64)
+        self._grid = GridIndex(self.node_lat, self.node_lng, cell_deg=SNAP_CELL_DEGREES)
+
+        if hierarchy is None:
+            hierarchy = contract(len(self.node_lat), self.edge_from, self.edge_to, self.edge_seconds)
+        self.rank, ch_from, ch_to, ch_seconds = (np.asarray(a) for a in hierarchy)
+        self.rank = self.rank.astype(np.int64)
+        ch_from = ch_from.astype(np.int64)
+        ch_to = ch_to.astype(np.int64)
+        ch_seconds = ch_seconds.astype(np.float64)
+
+        # Forward searches only climb to higher-ranked nodes; backward searches climb the reversed edges.
+        size = len(self.node_lat)
+        up = self.rank[ch_to] > self.rank[ch_from]
+        self._up = _csr(size, ch_from[up], ch_to[up], ch_seconds[up])
+        self._down = _csr(size, ch_to[~up], ch_from[~up], ch_seconds[~up])
+        self._hierarchy = (self.rank, ch_from, ch_to, ch_seconds)
+        # Backward search spaces depend only on the target node, and dispatch targets repeat.
+        self._backward = lru_cache(maxsize=BACKWARD_CACHE_SIZE)(lambda target: self._upward(self._down, target))
+
+    def __len__(self) -> int:
+        return len(self.node_lat)
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        with np.load(path) as data:
+            hierarchy = None
+            if "ch_rank" in data:
+                hierarchy = (data["ch_rank"], data["ch_from"], data["ch_to"], data["ch_seconds"])
+            return cls(
+                data["node_lat"], data["node_lng"], data["edge_from"], data["edge_to"], data["edge_seconds"], hierarchy
+            )
+
+    def save(self, path: str) -> None:
+        rank, ch_from, ch_to, ch_seconds = self._hierarchy
+        np.savez_compressed(
+            path,
+            node_lat=self.node_lat,
+            node_lng=self.node_lng,
+            edge_from=self.edge_from,
+            edge_to=self.edge_to,
+            edge_seconds=self.edge_seconds,
+            ch_rank=rank,
+            ch_from=ch_from,
+            ch_to=ch_to,
+            ch_seconds=ch_seconds,
+        )
+
+    def snap(self, point: LatLng) -> Tuple[int, float] | None:
+        # Nearest node and the seconds needed to reach it off-network; None when nothing is within SNAP_MAX_KM.
+        lat, lng = point
+        radius = 0.5
+        while radius <= SNAP_MAX_KM:
+            found = self._grid.within(lat, lng, radius)
+            found = found[~((self.node_lat[found] == 0.0) & (self.node_lng[found] == 0.0))]
+            if len(found):
+                km = haversine_km_batch(lat, lng, self.node_lat[found], self.node_lng[found])
+                best = int(np.argmin(km))
+                return int(found[best]), float(km[best]) / ACCESS_SPEED_KMH * 3600.0
+            radius *= 2
+        return None
+
+    def _upward(self, graph: Tuple[list, list, list], source: int) -> Dict[int, float]:
+        indptr, indices, weights = graph
+        settled: Dict[int, float] = {}
+        best = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled[node] = cost
+            for e in range(indptr[node], indptr[node + 1]):
+                nxt = indices[e]
+                new_cost = cost + weights[e]
+                if new_cost < best.get(nxt, math.inf):
+                    best[nxt] = new_cost
+                    heapq.heappush(heap, (new_cost, nxt))
+        return settled
+
+    def shortest_seconds(self, source: int, target: int) -> float | None:
+        return self.one_to_many(source, [target])[0]
+
+    def one_to_many(self, source: int, targets: Sequence[int]) -> List[float | None]:
+        # Every shortest path climbs the hierarchy from the source and descends to the target, so it
+        # meets at a node both upward searches settle.
+        forward = self._upward(self._up, source)
+        out: List[float | None] = []
+        for target in targets:
+            backward = self._backward(target)
+            if len(backward) > len(forward):
+                best = min((cost + backward[n] for n, cost in forward.items() if n in backward), default=math.inf)
+            else:
+                best = min((cost + forward[n] for n, cost in backward.items() if n in forward), default=math.inf)
+            out.append(None if best == math.inf else best)
+        return out
+
+    def dijkstra(self, source: int) -> np.ndarray:
+        # Plain search over the original edges; the reference the hierarchy is checked against.
+        indptr, indices, weights = _csr(len(self), self.edge_from, self.edge_to, self.edge_seconds)
+        dist = np.full(len(self), np.inf)
+        best = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if dist[node] != np.inf:
+                continue
+            dist[node] = cost
+            for e in range(indptr[node], indptr[node + 1]):
+                nxt = indices[e]
+                new_cost = cost + weights[e]
+                if new_cost < best.get(nxt, math.inf):
+                    best[nxt] = new_cost
+                    heapq.heappush(heap, (new_cost, nxt))
+        return dist
+
+
+def _witness(
+    out_adj: List[Dict[int, float]], source: int, skip: int, limit: float, targets: Dict[int, float]
+) -> Dict[int, float]:
+    best = {source: 0.0}
+    heap = [(0.0, source)]
+    pending = len(targets)
+    settled = 0
+    while heap and pending and settled < WITNESS_SETTLE_LIMIT:
+        cost, node = heapq.heappop(heap)
+        if cost > best[node]:
+            continue
+        if cost > limit:
+            break
+        settled += 1
+        if node in targets:
+            pending -= 1
+        for nxt, weight in out_adj[node].items():
+            if nxt == skip:
+                continue
+            new_cost = cost + weight
+            if new_cost < best.get(nxt, math.inf):
+                best[nxt] = new_cost
+                heapq.heappush(heap, (new_cost, nxt))
+    return best
+
+
+def _shortcuts(out_adj: List[Dict[int, float]], in_adj: List[Dict[int, float]], node: int) -> List[Tuple[int, int, float]]:
+    found = []
+    outgoing = out_adj[node]
+    if not outgoing:
+        return found
+    max_out = max(outgoing.values())
+    for src, w_in in in_adj[node].items():
+        targets = {dst: w_in + w_out for dst, w_out in outgoing.items() if dst != src}
+        if not targets:
+            continue
+        reach = _witness(out_adj, src, node, w_in + max_out, targets)
+        for dst, via in targets.items():
+            if reach.get(dst, math.inf) > via:
+                found.append((src, dst, via))
+    return found
+
+
+def contract(
+    size: int, edge_from: np.ndarray, edge_to: np.ndarray, edge_seconds: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Offline preprocessing. Nodes are contracted least important first (edge difference plus contracted
+    # neighbours, lazily re-evaluated); each contraction adds the shortcuts that keep distances among the
+    # remaining nodes exact. Returns the node ranks and every original and shortcut edge.
+    out_adj: List[Dict[int, float]] = [{} for _ in range(size)]
+    in_adj: List[Dict[int, float]] = [{} for _ in range(size)]
+    for src, dst, seconds in zip(edge_from.tolist(), edge_to.tolist(), edge_seconds.tolist()):
+        if src != dst and seconds < out_adj[src].get(dst, math.inf):
+            out_adj[src][dst] = seconds
+            in_adj[dst][src] = seconds
+
+    removed_neighbours = [0] * size
+
+    def priority(node: int) -> Tuple[int, List[Tuple[int, int, float]]]:
+        shortcuts = _shortcuts(out_adj, in_adj, node)
+        degree = len(out_adj[node]) + len(in_adj[node])
+        return len(shortcuts) - degree + removed_neighbours[node], shortcuts
+
+    heap = [(priority(node)[0], node) for node in range(size)]
+    heapq.heapify(heap)
+    rank = np.zeros(size, dtype=np.int64)
+    ch_from: List[int] = []
+    ch_to: List[int] = []
+    ch_seconds: List[float] = []
+    done = [False] * size
+    next_rank = 0
+    while heap:
+        _, node = heapq.heappop(heap)
+        if done[node]:
+            continue
+        current, shortcuts = priority(node)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, node))
+            continue
+
+        for src, dst, seconds in shortcuts:
+            if seconds < out_adj[src].get(dst, math.inf):
+                out_adj[src][dst] = seconds
+                in_adj[dst][src] = seconds
+        for dst, seconds in out_adj[node].items():
+            ch_from.append(node)
+            ch_to.append(dst)
+            ch_seconds.append(seconds)
+            del in_adj[dst][node]
+            removed_neighbours[dst] += 1
+        for src, seconds in in_adj[node].items():
+            ch_from.append(src)
+            ch_to.append(node)
+            ch_seconds.append(seconds)
+            del out_adj[src][node]
+            removed_neighbours[src] += 1
+        out_adj[node] = {}
+        in_adj[node] = {}
+        done[node] = True
+        rank[node] = next_rank
+        next_rank += 1
+
+    return rank, np.array(ch_from, dtype=np.int64), np.array(ch_to, dtype=np.int64), np.array(ch_seconds)
+
+
+def route_matrix(graph: RoadGraph, origins: List[LatLng], destinations: List[LatLng]) -> List[List[int | None]]:
+    origin_snaps = [graph.snap(point) for point in origins]
+    dest_snaps = [graph.snap(point) for point in destinations]
+    targets = sorted({snap[0] for snap in dest_snaps if snap is not None})
+    out: List[List[int | None]] = []
+    for origin_snap in origin_snaps:
+        if origin_snap is None or not targets:
+            out.append([None] * len(destinations))
+            continue
+        source, access = origin_snap
+        found = dict(zip(targets, graph.one_to_many(source, targets)))
+        row: List[int | None] = []
+        for dest_snap in dest_snaps:
+            seconds = found.get(dest_snap[0]) if dest_snap is not None else None
+            row.append(None if seconds is None else int(round(access + seconds + dest_snap[1])))
+        out.append(row)
+    return out
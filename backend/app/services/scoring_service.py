@@ -2,7 +2,12 @@ from __future__ import annotations
 
 from collections.abc import Iterable
 
+import numpy as np
+
 from app.db.models import Ambulance, Doctor
+from app.services.batch_scoring import AmbulanceColumns, DoctorColumns, codes_matching, round2
+from app.services.population_stats import Bounds
+from app.services.topk import top_k
 
 
 PROBLEM_TO_CATEGORY = {
@@ -39,13 +44,21 @@ def _specialization_boost(problem: str, category: str) -> float:
     return 0.0
 
 
-def score_doctors(doctors: list[Doctor]) -> list[Doctor]:
-    r_min, r_max = _range(d.rating for d in doctors)
-    e_min, e_max = _range(d.experience_years for d in doctors)
-    rt_min, rt_max = _range(d.response_time_minutes for d in doctors)
-    f_min, f_max = _range(d.consultation_fee for d in doctors)
-    rev_min, rev_max = _range(d.reviews_count for d in doctors)
-    p_min, p_max = _range(d.total_patients_served for d in doctors)
+def score_doctors(doctors: list[Doctor], bounds: Bounds | None = None) -> list[Doctor]:
+    if bounds:
+        r_min, r_max = bounds["rating"]
+        e_min, e_max = bounds["experience_years"]
+        rt_min, rt_max = bounds["response_minutes"]
+        f_min, f_max = bounds["consultation_fee"]
+        rev_min, rev_max = bounds["reviews_count"]
+        p_min, p_max = bounds["total_patients_served"]
+    else:
+        r_min, r_max = _range(d.rating for d in doctors)
+        e_min, e_max = _range(d.experience_years for d in doctors)
+        rt_min, rt_max = _range(d.response_time_minutes for d in doctors)
+        f_min, f_max = _range(d.consultation_fee for d in doctors)
+        rev_min, rev_max = _range(d.reviews_count for d in doctors)
+        p_min, p_max = _range(d.total_patients_served for d in doctors)
 
     for d in doctors:
         score = (
@@ -62,11 +75,17 @@ def score_doctors(doctors: list[Doctor]) -> list[Doctor]:
     return sorted(doctors, key=lambda x: x.ai_score, reverse=True)
 
 
-def score_ambulances(ambulances: list[Ambulance]) -> list[Ambulance]:
-    rt_min, rt_max = _range(a.response_time_minutes for a in ambulances)
-    r_min, r_max = _range(a.rating for a in ambulances)
-    c_min, c_max = _range(a.cost_per_km for a in ambulances)
-    b_min, b_max = _range(a.base_price for a in ambulances)
+def score_ambulances(ambulances: list[Ambulance], bounds: Bounds | None = None) -> list[Ambulance]:
+    if bounds:
+        rt_min, rt_max = bounds["response_minutes"]
+        r_min, r_max = bounds["rating"]
+        c_min, c_max = bounds["cost_per_km"]
+        b_min, b_max = bounds["base_price"]
+    else:
+        rt_min, rt_max = _range(a.response_time_minutes for a in ambulances)
+        r_min, r_max = _range(a.rating for a in ambulances)
+        c_min, c_max = _range(a.cost_per_km for a in ambulances)
+        b_min, b_max = _range(a.base_price for a in ambulances)
 
     for a in ambulances:
         affordability = 0.6 * _norm(a.cost_per_km, c_min, c_max, reverse=True) + 0.4 * _norm(
@@ -84,8 +103,10 @@ def score_ambulances(ambulances: list[Ambulance]) -> list[Ambulance]:
     return sorted(ambulances, key=lambda x: x.ai_score, reverse=True)
 
 
-def score_doctors_contextual(doctors: list[Doctor], city: str, problem: str, budget: float) -> list[Doctor]:
-    ranked = score_doctors(doctors)
+def score_doctors_contextual(
+    doctors: list[Doctor], city: str, problem: str, budget: float, bounds: Bounds | None = None
+) -> list[Doctor]:
+    ranked = score_doctors(doctors, bounds=bounds)
     city_lower = city.strip().lower()
     for d in ranked:
         context_boost = 0.0
@@ -99,9 +120,9 @@ def score_doctors_contextual(doctors: list[Doctor], city: str, problem: str, bud
 
 
 def score_ambulances_contextual(
-    ambulances: list[Ambulance], city: str, budget: float, urgency: str = "high"
+    ambulances: list[Ambulance], city: str, budget: float, urgency: str = "high", bounds: Bounds | None = None
 ) -> list[Ambulance]:
-    ranked = score_ambulances(ambulances)
+    ranked = score_ambulances(ambulances, bounds=bounds)
     city_lower = city.strip().lower()
     urgency_boost = 0.04 if urgency.lower() in {"critical", "high"} else 0.02
 
@@ -116,3 +137,98 @@ def score_ambulances_contextual(
         a.ai_score = round(min(100.0, a.ai_score + context_boost * 100), 2)
 
     return sorted(ranked, key=lambda x: x.ai_score, reverse=True)
+
+
+def _range_array(values: np.ndarray) -> tuple[float, float]:
+    if len(values) == 0:
+        return 0.0, 1.0
+    return float(values.min()), float(values.max())
+
+
+def _norm_array(values: np.ndarray, bounds: tuple[float, float], reverse: bool = False) -> np.ndarray:
+    min_v, max_v = bounds
+    if max_v == min_v:
+        return np.ones(len(values))
+    raw = (values - min_v) / (max_v - min_v)
+    return 1 - raw if reverse else raw
+
+
+def _flag(values: np.ndarray) -> np.ndarray:
+    return np.where(values, 1.0, 0.0)
+
+
+def _city_mask(city_codes: np.ndarray, city_names: tuple[str, ...], city: str) -> np.ndarray:
+    city_lower = city.strip().lower()
+    return np.isin(city_codes, [idx for idx, name in enumerate(city_names) if name.strip().lower() == city_lower])
+
+
+def _column_bounds(columns, bounds: Bounds | None, name: str) -> tuple[float, float]:
+    return bounds[name] if bounds else _range_array(getattr(columns, name))
+
+
+def doctor_ai_scores(columns: DoctorColumns, bounds: Bounds | None = None) -> np.ndarray:
+    score = (
+        0.30 * _norm_array(columns.rating, _column_bounds(columns, bounds, "rating"))
+        + 0.20 * _norm_array(columns.experience_years, _column_bounds(columns, bounds, "experience_years"))
+        + 0.15
+        * _norm_array(columns.response_minutes, _column_bounds(columns, bounds, "response_minutes"), reverse=True)
+        + 0.15
+        * _norm_array(columns.consultation_fee, _column_bounds(columns, bounds, "consultation_fee"), reverse=True)
+        + 0.10 * _norm_array(columns.reviews_count, _column_bounds(columns, bounds, "reviews_count"))
+        + 0.05 * _norm_array(columns.total_patients_served, _column_bounds(columns, bounds, "total_patients_served"))
+        + 0.05 * _flag(columns.verified)
+    ) * 100
+    return round2(score)
+
+
+def ambulance_ai_scores(columns: AmbulanceColumns, bounds: Bounds | None = None) -> np.ndarray:
+    cost = _norm_array(columns.cost_per_km, _column_bounds(columns, bounds, "cost_per_km"), reverse=True)
+    base_price = _norm_array(columns.base_price, _column_bounds(columns, bounds, "base_price"), reverse=True)
+    affordability = 0.6 * cost + 0.4 * base_price
+    score = (
+        0.35 * _norm_array(columns.response_minutes, _column_bounds(columns, bounds, "response_minutes"), reverse=True)
+        + 0.25 * _norm_array(columns.rating, _column_bounds(columns, bounds, "rating"))
+        + 0.20 * affordability
+        + 0.10 * _flag(columns.on_duty)
+        + 0.10 * _flag(columns.verified)
+    ) * 100
+    return round2(score)
+
+
+def problem_categories(problem: str) -> set[str]:
+    p = problem.strip().lower()
+    boosted = set()
+    for keyword, categories in PROBLEM_TO_CATEGORY.items():
+        if keyword in p:
+            boosted.update(c.lower() for c in categories)
+    return boosted
+
+
+def doctor_contextual_scores(
+    columns: DoctorColumns, city: str, problem: str, budget: float, bounds: Bounds | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    base = doctor_ai_scores(columns, bounds)
+    boosted = problem_categories(problem)
+
+    context_boost = np.zeros(len(columns))
+    context_boost += np.where(_city_mask(columns.city, columns.city_names, city), 0.07, 0.0)
+    context_boost += np.where(np.isin(columns.category, codes_matching(columns.category_names, boosted)), 0.08, 0.0)
+    context_boost += np.where(columns.consultation_fee <= budget, 0.05, 0.0)
+    return round2(np.minimum(100.0, base + context_boost * 100)), base
+
+
+def ambulance_contextual_scores(
+    columns: AmbulanceColumns, city: str, budget: float, urgency: str = "high", bounds: Bounds | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    base = ambulance_ai_scores(columns, bounds)
+    urgency_boost = 0.04 if urgency.lower() in {"critical", "high"} else 0.02
+
+    context_boost = np.zeros(len(columns))
+    context_boost += np.where(_city_mask(columns.city, columns.city_names, city), 0.08, 0.0)
+    context_boost += np.where(columns.base_price <= budget, 0.05, 0.0)
+    context_boost += np.where(columns.advanced_vehicle, urgency_boost, 0.0)
+    return round2(np.minimum(100.0, base + context_boost * 100)), base
+
+
+def contextual_order(scores: np.ndarray, base: np.ndarray, ids: np.ndarray, limit: int) -> list[int]:
+    return top_k(scores, limit, -base, ids).tolist()
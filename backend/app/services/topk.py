@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def top_k(scores: np.ndarray, k: int, *tiebreaks: np.ndarray) -> np.ndarray:
+    # Indices of the k best rows: highest score first, ties ordered by each tiebreak array ascending.
+    scores = np.asarray(scores)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        kth = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(n)
+    keys = [np.asarray(t)[candidates] for t in reversed(tiebreaks)] + [-scores[candidates]]
+    return candidates[np.lexsort(keys)][:k]
+
+
+def prune_below_kth(lower: np.ndarray, upper: np.ndarray, k: int, margin: float = 0.05) -> np.ndarray | None:
+    # Rows whose upper bound cannot reach the k-th best lower bound are dropped; None keeps everything.
+    n = len(lower)
+    if k <= 0 or k >= n:
+        return None
+    kth = np.partition(lower, n - k)[n - k]
+    keep = np.flatnonzero(upper + margin >= kth)
+    return keep if len(keep) < n else None
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from typing import Dict, List, Set
+import asyncio
+import base64
+import hashlib
+import json
 import re
-from typing import Dict, List
 
-import httpx
+from cryptography.fernet import Fernet
 
 from app.core.config import settings
+from app.services.cache import TTLCache
+from app.services.llm_client import llm_client
 
 HIGH_RISK_PHRASES = [
     "chest pain",
@@ -54,27 +60,52 @@ HOSPITAL_TYPE_MAP = {
 }
 
 
-def _find_risk_flags(text: str) -> List[str]:
-    flags = []
-    lowered = text.lower()
-    for phrase in HIGH_RISK_PHRASES:
-        if phrase in lowered:
-            flags.append(phrase)
-    return flags
+SEVERE_WORDS = ["severe", "unconscious", "bleeding", "breathing", "stroke", "heart"]
+ACUTE_WORDS = ["sudden", "intense", "unbearable", "collapse"]
+RISK_FACTORS = ["diabetes", "hypertension", "smoker", "obese"]
+MEDICATIONS = ["aspirin", "insulin", "metformin", "statin"]
 
+SYMPTOM_PATTERN = re.compile(r"[^,;]+")
+DURATION_PATTERN = re.compile(r"(\d+)\s*(minutes|minute|hours|hour|days|day|weeks|week)")
+BP_PATTERN = re.compile(r"(\d{2,3})\s*/\s*(\d{2,3})")
+HR_PATTERN = re.compile(r"hr\s*(\d{2,3})")
+SPO2_PATTERN = re.compile(r"spo2\s*(\d{2,3})")
 
-def _detect_emergency_type(text: str) -> str:
-    lowered = text.lower()
+
+class TermIndex:
+    # Phrases shared between rule tables ("bleeding", "chest pain", ...) are searched at most once per
+    # complaint, and only when a rule actually asks for them.
+    def __init__(self, lowered: str) -> None:
+        self.lowered = lowered
+        self._seen: Dict[str, bool] = {}
+
+    def __contains__(self, term: str) -> bool:
+        hit = self._seen.get(term)
+        if hit is None:
+            hit = self._seen[term] = term in self.lowered
+        return hit
+
+
+def _find_risk_flags(found: TermIndex) -> List[str]:
+    return [phrase for phrase in HIGH_RISK_PHRASES if phrase in found]
+
+
+def _detect_emergency_type(found: TermIndex) -> str:
     for emergency_type, keywords in EMERGENCY_TYPE_KEYWORDS.items():
-        if any(keyword in lowered for keyword in keywords):
+        if any(keyword in found for keyword in keywords):
             return emergency_type
     return "Other"
 
 
-def _extract_entities(text: str) -> Dict:
-    lowered = text.lower()
-    symptoms = [s.strip() for s in re.split(r"[,;]", lowered) if s.strip()]
-    duration_match = re.search(r"(\d+)\s*(minutes|minute|hours|hour|days|day|weeks|week)", lowered)
+def _extract_entities(lowered: str, found: TermIndex) -> Dict:
+    symptoms = []
+    for part in SYMPTOM_PATTERN.finditer(lowered):
+        symptom = part.group().strip()
+        if symptom:
+            symptoms.append(symptom)
+            if len(symptoms) == 8:
+                break
+    duration_match = DURATION_PATTERN.search(lowered)
     duration = duration_match.group(0) if duration_match else "unknown"
 
     vitals = {
@@ -82,23 +113,23 @@ def _extract_entities(text: str) -> Dict:
         "hr": None,
         "spo2": None,
     }
-    bp_match = re.search(r"(\d{2,3})\s*/\s*(\d{2,3})", lowered)
+    bp_match = BP_PATTERN.search(lowered)
     if bp_match:
         vitals["bp"] = f"{bp_match.group(1)}/{bp_match.group(2)}"
 
-    hr_match = re.search(r"hr\s*(\d{2,3})", lowered)
+    hr_match = HR_PATTERN.search(lowered)
     if hr_match:
         vitals["hr"] = hr_match.group(1)
 
-    spo2_match = re.search(r"spo2\s*(\d{2,3})", lowered)
+    spo2_match = SPO2_PATTERN.search(lowered)
     if spo2_match:
         vitals["spo2"] = spo2_match.group(1)
 
-    risk_factors = [rf for rf in ["diabetes", "hypertension", "smoker", "obese"] if rf in lowered]
-    medications = [med for med in ["aspirin", "insulin", "metformin", "statin"] if med in lowered]
+    risk_factors = [rf for rf in RISK_FACTORS if rf in found]
+    medications = [med for med in MEDICATIONS if med in found]
 
     return {
-        "symptoms": symptoms[:8],
+        "symptoms": symptoms,
         "duration": duration,
         "vitals": vitals,
         "risk_factors": risk_factors,
@@ -106,12 +137,11 @@ def _extract_entities(text: str) -> Dict:
     }
 
 
-def _severity_from_text(text: str, risk_flags: List[str]) -> tuple[str, int]:
-    lowered = text.lower()
+def _severity_from_text(found: TermIndex, risk_flags: List[str]) -> tuple[str, int]:
     score = 20
-    if any(word in lowered for word in ["severe", "unconscious", "bleeding", "breathing", "stroke", "heart"]):
+    if any(word in found for word in SEVERE_WORDS):
         score += 35
-    if any(word in lowered for word in ["sudden", "intense", "unbearable", "collapse"]):
+    if any(word in found for word in ACUTE_WORDS):
         score += 20
     if risk_flags:
         score += 30
@@ -133,27 +163,13 @@ def _recommendations(emergency_type: str, severity: str) -> Dict:
     }
 
 
-def _call_llm_service(text: str) -> Dict | None:
-    if not settings.ai_service_url or not settings.enable_llm_triage:
-        return None
-    try:
-        with httpx.Client(timeout=8.0) as client:
-            res = client.post(f"{settings.ai_service_url}/triage", json={"complaint_text": text})
-            res.raise_for_status()
-            return res.json()
-    except Exception:
-        return None
-
-
-def triage(text: str) -> Dict:
-    llm = _call_llm_service(text)
-    if llm:
-        return llm
-
-    risk_flags = _find_risk_flags(text)
-    emergency_type = _detect_emergency_type(text)
-    severity, score = _severity_from_text(text, risk_flags)
-    entities = _extract_entities(text)
+def rule_based_triage(text: str) -> Dict:
+    lowered = text.lower()
+    found = TermIndex(lowered)
+    risk_flags = _find_risk_flags(found)
+    emergency_type = _detect_emergency_type(found)
+    severity, score = _severity_from_text(found, risk_flags)
+    entities = _extract_entities(lowered, found)
     recommended = _recommendations(emergency_type, severity)
 
     escalation = {
@@ -172,4 +188,89 @@ def triage(text: str) -> Dict:
         "risk_flags": risk_flags,
         "escalation": escalation,
         "confidence": confidence,
+        "triage_source": "rules",
     }
+
+
+_background: Set[asyncio.Task] = set()
+# Keyed by a digest of the lowercased complaint, which is exactly the text the rules see (whitespace and
+# punctuation both change phrase matches), so equal keys mean equal rule results. Cached copies never hold
+# `entities` in the clear (symptoms quote the complaint): rule entities are rebuilt from the request text on
+# a hit, and LLM entities are stored encrypted under a key derived from the complaint itself.
+llm_triage_cache = TTLCache(maxsize=settings.triage_cache_size, ttl_seconds=settings.triage_cache_ttl_seconds)
+rule_triage_cache = TTLCache(maxsize=settings.triage_cache_size, ttl_seconds=settings.triage_cache_ttl_seconds)
+
+
+def complaint_digest(text: str) -> str:
+    return hashlib.sha256(text.lower().encode("utf-8")).hexdigest()
+
+
+def _without_text(result: Dict) -> Dict:
+    return {key: value for key, value in result.items() if key != "entities"}
+
+
+def _with_entities(cached: Dict, text: str) -> Dict:
+    lowered = text.lower()
+    return {**cached, "entities": _extract_entities(lowered, TermIndex(lowered))}
+
+
+def _entities_cipher(text: str) -> Fernet:
+    # Derived with its own prefix so the cache key does not reveal it; only a request carrying the same
+    # complaint can read the entities back.
+    digest = hashlib.sha256(b"triage-entities\0" + text.lower().encode("utf-8")).digest()
+    return Fernet(base64.urlsafe_b64encode(digest))
+
+
+def _sealed(result: Dict, text: str) -> Dict:
+    entities = json.dumps(result.get("entities")).encode("utf-8")
+    return {**_without_text(result), "entities_sealed": _entities_cipher(text).encrypt(entities)}
+
+
+def _unsealed(cached: Dict, text: str) -> Dict:
+    result = {key: value for key, value in cached.items() if key != "entities_sealed"}
+    entities = json.loads(_entities_cipher(text).decrypt(cached["entities_sealed"]))
+    if entities is not None:
+        result["entities"] = entities
+    return result
+
+
+def _rules(text: str, key: str) -> Dict:
+    cached = rule_triage_cache.get(key)
+    if cached is not None:
+        return _with_entities(cached, text)
+    result = rule_based_triage(text)
+    rule_triage_cache.set(key, _without_text(result))
+    return result
+
+
+async def _llm(text: str, key: str) -> Dict | None:
+    result = await llm_client.triage(text)
+    if result:
+        llm_triage_cache.set(key, _sealed(result, text))
+    return result
+
+
+async def triage(text: str) -> Dict:
+    key = complaint_digest(text)
+    if not llm_client.enabled:
+        return _rules(text, key)
+    cached = llm_triage_cache.get(key)
+    if cached is not None:
+        return {**_unsealed(cached, text), "triage_source": "llm"}
+
+    llm_task = asyncio.ensure_future(_llm(text, key))
+    if settings.llm_triage_mode != "hedged":
+        llm = await llm_task
+        return {**llm, "triage_source": "llm"} if llm else _rules(text, key)
+
+    # Hedged: the rules run alongside the LLM call and answer if it misses the deadline or fails.
+    rules = await asyncio.to_thread(_rules, text, key)
+    done, _ = await asyncio.wait({llm_task}, timeout=settings.llm_triage_deadline_seconds)
+    if llm_task in done and llm_task.result():
+        return {**llm_task.result(), "triage_source": "llm"}
+    if llm_task not in done:
+        # Left to finish so its outcome still feeds the circuit breaker and the LLM cache; the pool timeout bounds it.
+        _background.add(llm_task)
+        llm_task.add_done_callback(_background.discard)
+        return {**rules, "triage_source": "rules_hedged"}
+    return rules
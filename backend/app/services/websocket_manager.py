@@ -1,21 +1,85 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Awaitable, Callable, Dict, List
+import asyncio
+import logging
+
 from fastapi import WebSocket
 
+logger = logging.getLogger(__name__)
+
+# Produces the payload for one tick of a tracking id; None means the session no longer exists.
+TickFn = Callable[[int], Awaitable["dict | None"]]
+
 
 class TrackingConnectionManager:
-    def __init__(self) -> None:
+    # One ticker task per tracking id computes the status once and fans it out to every subscriber;
+    # the task starts with the first subscriber and is cancelled when the last one leaves.
+    def __init__(self, interval_seconds: float = 2.0, max_failures: int = 3) -> None:
+        self.interval_seconds = interval_seconds
+        self.max_failures = max_failures
         self.active: Dict[int, List[WebSocket]] = {}
+        self._tickers: Dict[int, asyncio.Task] = {}
 
     async def connect(self, tracking_id: int, websocket: WebSocket) -> None:
         await websocket.accept()
         self.active.setdefault(tracking_id, []).append(websocket)
 
+    def subscribe(self, tracking_id: int, tick: TickFn) -> None:
+        task = self._tickers.get(tracking_id)
+        if task is None or task.done():
+            self._tickers[tracking_id] = asyncio.create_task(self._run(tracking_id, tick))
+
     def disconnect(self, tracking_id: int, websocket: WebSocket) -> None:
         if tracking_id in self.active and websocket in self.active[tracking_id]:
             self.active[tracking_id].remove(websocket)
+        if not self.active.get(tracking_id):
+            self.active.pop(tracking_id, None)
+            task = self._tickers.pop(tracking_id, None)
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
 
     async def broadcast(self, tracking_id: int, payload: dict) -> None:
-        for ws in self.active.get(tracking_id, []):
-            await ws.send_json(payload)
+        sockets = list(self.active.get(tracking_id, []))
+        results = await asyncio.gather(*(ws.send_json(payload) for ws in sockets), return_exceptions=True)
+        for ws, result in zip(sockets, results):
+            if isinstance(result, Exception):
+                self.disconnect(tracking_id, ws)
+
+    async def _close_all(self, tracking_id: int, payload: dict, code: int = 1000) -> None:
+        await self.broadcast(tracking_id, payload)
+        for ws in list(self.active.get(tracking_id, [])):
+            self.disconnect(tracking_id, ws)
+            try:
+                await ws.close(code=code)
+            except Exception:
+                pass
+
+    async def _run(self, tracking_id: int, tick: TickFn) -> None:
+        failures = 0
+        while self.active.get(tracking_id):
+            try:
+                payload = await tick(tracking_id)
+            except Exception:
+                # A failed tick (usually the database) is retried on the next interval; after
+                # `max_failures` in a row the viewers are closed so their clients reconnect.
+                failures += 1
+                logger.exception("Tracking tick %d failed (%d/%d)", tracking_id, failures, self.max_failures)
+                if failures >= self.max_failures:
+                    await self._close_all(tracking_id, {"error": "Tracking updates unavailable"}, code=1011)
+                    return
+                await asyncio.sleep(self.interval_seconds)
+                continue
+            failures = 0
+            if payload is None:
+                await self._close_all(tracking_id, {"error": "Tracking session not found"})
+                return
+            await self.broadcast(tracking_id, payload)
+            await asyncio.sleep(self.interval_seconds)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tracking_ids": len(self.active),
+            "subscribers": sum(len(sockets) for sockets in self.active.values()),
+            "tickers": sum(1 for task in self._tickers.values() if not task.done()),
+        }
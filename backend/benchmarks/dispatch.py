@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Tuple
+import argparse
+import json
+import platform
+import sys
+
+import numpy as np
+
+from app.services.assignment import solve_assignment, useful_columns
+from benchmarks.scoring import measure
+
+CITY_KM = 30.0
+SURGE_KM = 2.0
+
+
+def cost_matrix(emergencies: int, ambulances: int, spread_km: float, rng: np.random.Generator) -> np.ndarray:
+    # Travel minutes at 30 km/h scaled by a per-emergency severity weight, like plan_batch's cost rows.
+    sites = rng.uniform(0, spread_km, (emergencies, 2))
+    fleet = rng.uniform(0, CITY_KM, (ambulances, 2))
+    km = np.linalg.norm(sites[:, None, :] - fleet[None, :, :], axis=2)
+    weights = rng.choice([1.0, 2.0, 4.0, 8.0], size=(emergencies, 1))
+    return weights * km * 2.0
+
+
+def greedy(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Per-emergency dispatch in arrival order: each takes the cheapest ambulance still free.
+    taken = np.zeros(cost.shape[1], dtype=bool)
+    cols = []
+    for row in cost:
+        col = int(np.argmin(np.where(taken, np.inf, row)))
+        taken[col] = True
+        cols.append(col)
+    return np.arange(cost.shape[0]), np.array(cols)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the batch dispatch assignment solver.")
+    parser.add_argument("--shapes", default="100x1000,300x3000", help="comma separated emergencies x ambulances")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--seed", type=int, default=20260223)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "params": {"repeat": args.repeat, "seed": args.seed},
+        "shapes": {},
+    }
+    for shape in (s.strip() for s in args.shapes.split(",") if s.strip()):
+        emergencies, ambulances = (int(v) for v in shape.split("x"))
+        results = {}
+        for case, spread in (("citywide", CITY_KM), ("surge", SURGE_KM)):
+            dense = cost_matrix(emergencies, ambulances, spread, rng)
+            reduced = dense[:, useful_columns(dense)]
+            results[case] = {
+                "dense": measure(lambda: solve_assignment(dense), emergencies, args.repeat),
+                "reduced": measure(lambda: solve_assignment(reduced), emergencies, args.repeat),
+                "reduced_columns": reduced.shape[1],
+                "optimal_total": float(dense[solve_assignment(dense)].sum()),
+                "reduced_total": float(reduced[solve_assignment(reduced)].sum()),
+                "greedy_total": float(dense[greedy(dense)].sum()),
+            }
+        report["shapes"][shape] = results
+        print(f"benchmarked {shape}", file=sys.stderr)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from app.services.dispatch_engine import HaversineEtaProvider, RoadGraphEtaProvider
+from app.services.road_router import RoadGraph
+from benchmarks.scoring import measure
+
+ORIGIN = (19.0, 72.8)
+STEP_DEG = 0.002
+STREET_KMH = 25.0
+ARTERIAL_KMH = 50.0
+ARTERIAL_EVERY = 10
+BRIDGE_EVERY = 40
+
+
+def grid_city(side: int, seed: int) -> RoadGraph:
+    # Two-way street grid with faster arterials every few blocks and a river down the middle
+    # that can only be crossed on a handful of bridges.
+    rng = random.Random(seed)
+    ys, xs = np.divmod(np.arange(side * side), side)
+    lat = ORIGIN[0] + ys * STEP_DEG
+    lng = ORIGIN[1] + xs * STEP_DEG
+    block_km = STEP_DEG * 111.0
+    river = side // 2
+    edges_from, edges_to, seconds = [], [], []
+    for y in range(side):
+        for x in range(side):
+            node = y * side + x
+            for dy, dx in ((0, 1), (1, 0)):
+                ny, nx = y + dy, x + dx
+                if ny >= side or nx >= side:
+                    continue
+                if dx and x == river - 1 and y % BRIDGE_EVERY:
+                    continue
+                arterial = (y % ARTERIAL_EVERY == 0) if dx else (x % ARTERIAL_EVERY == 0)
+                kmh = (ARTERIAL_KMH if arterial else STREET_KMH) * rng.uniform(0.8, 1.2)
+                cost = block_km / kmh * 3600.0
+                edges_from += [node, ny * side + nx]
+                edges_to += [ny * side + nx, node]
+                seconds += [cost, cost]
+    return RoadGraph(lat, lng, np.array(edges_from), np.array(edges_to), np.array(seconds))
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the offline road routing ETA provider.")
+    parser.add_argument("--sides", default="50,100", help="comma separated grid sides (side^2 nodes)")
+    parser.add_argument("--targets", type=int, default=50, help="destinations per one-to-many query")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case")
+    parser.add_argument("--seed", type=int, default=20260223)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "params": {"targets": args.targets, "repeat": args.repeat, "seed": args.seed},
+        "sides": {},
+    }
+    for side in (int(s) for s in args.sides.split(",") if s.strip()):
+        start = time.perf_counter()
+        graph = grid_city(side, args.seed)
+        contract_seconds = time.perf_counter() - start
+        road = RoadGraphEtaProvider(graph)
+        span = side * STEP_DEG
+
+        def point():
+            return (ORIGIN[0] + rng.uniform(0, span), ORIGIN[1] + rng.uniform(0, span))
+
+        origin = point()
+        # Either side of the river, halfway between two bridges.
+        river_lat = ORIGIN[0] + (BRIDGE_EVERY // 2) * STEP_DEG
+        near_bank = (river_lat, ORIGIN[1] + (side // 2 - 2) * STEP_DEG)
+        far_bank = (river_lat, ORIGIN[1] + (side // 2 + 1) * STEP_DEG)
+        targets = [point() for _ in range(args.targets)]
+
+        source = graph.snap(origin)[0]
+        nodes = [graph.snap(t)[0] for t in targets]
+        start = time.perf_counter()
+        cold = graph.one_to_many(source, nodes)
+        cold_ms = (time.perf_counter() - start) * 1000.0
+        reference = graph.dijkstra(source)[nodes]
+        max_error = float(np.max(np.abs(np.array(cold, dtype=np.float64) - reference)))
+
+        results = {
+            "nodes": len(graph),
+            "edges": len(graph.edge_from),
+            "hierarchy_edges": len(graph._hierarchy[1]),
+            "contract_seconds": contract_seconds,
+            "max_error_seconds": max_error,
+            "one_to_many_cold_ms": cold_ms,
+            "point_to_point": measure(lambda: road.matrix([near_bank], [far_bank]), 1, args.repeat),
+            "one_to_many": measure(lambda: road.matrix([origin], targets), args.targets, args.repeat),
+            "haversine_one_to_many": measure(
+                lambda: HaversineEtaProvider().matrix([origin], targets), args.targets, args.repeat
+            ),
+            "across_river_seconds": {
+                "road": road.matrix([near_bank], [far_bank])[0][0],
+                "haversine": HaversineEtaProvider().matrix([near_bank], [far_bank])[0][0],
+            },
+        }
+        report["sides"][str(side)] = results
+        print(f"benchmarked {side}x{side} grid", file=sys.stderr)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, Dict, List
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.db.seed import _ambulance_random, _doctor_random, _hospital_random
+from app.services.batch_scoring import (
+    AmbulanceColumns,
+    DoctorColumns,
+    HospitalColumns,
+    ambulance_scores_batch,
+    doctor_scores_batch,
+    hospital_scores_batch,
+    rank_ambulances_batch,
+    rank_doctors_batch,
+    rank_hospitals_batch,
+)
+from app.services.feedback_loop import DEFAULT_ADJUSTMENTS
+from app.services.scoring_engine import ambulance_score, doctor_score, hospital_score
+from app.services.scoring_service import (
+    ambulance_contextual_scores,
+    contextual_order,
+    doctor_ai_scores,
+    doctor_contextual_scores,
+)
+
+PATIENT_LOC = (19.0760, 72.8777)
+SEVERITY = "HIGH"
+EMERGENCY_TYPE = "Cardiac"
+BUDGET = 3000.0
+TOP_K = 10
+
+
+def generate(size: int, seed: int):
+    rng = random.Random(seed)
+    doctors = [_doctor_random(i + 1, rng) for i in range(size)]
+    ambulances = [_ambulance_random(i + 1, rng) for i in range(size)]
+    hospitals = [_hospital_random(i + 1, rng, phone_serial=i % 10000) for i in range(max(1, size // 10))]
+    for rows in (doctors, ambulances, hospitals):
+        for idx, row in enumerate(rows, start=1):
+            row.id = idx
+    return doctors, ambulances, hospitals
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(np.array(samples), q)) * 1000.0
+
+
+def measure(fn: Callable[[], object], rows: int, repeat: int) -> Dict[str, float]:
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mean = sum(samples) / len(samples)
+    return {
+        "rows": rows,
+        "repeat": repeat,
+        "mean_ms": mean * 1000.0,
+        "p50_ms": _percentile(samples, 50),
+        "p99_ms": _percentile(samples, 99),
+        "rows_per_second": rows / mean if mean > 0 else 0.0,
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_size(size: int, repeat: int, reference_max: int, seed: int) -> Dict[str, Dict[str, float]]:
+    doctors, ambulances, hospitals = generate(size, seed)
+    adjustments = dict(DEFAULT_ADJUSTMENTS)
+    results: Dict[str, Dict[str, float]] = {}
+
+    start = time.perf_counter()
+    doctor_cols = DoctorColumns.from_rows(doctors)
+    ambulance_cols = AmbulanceColumns.from_rows(ambulances)
+    hospital_cols = HospitalColumns.from_rows(hospitals, {})
+    results["columns_build"] = {"rows": size * 2 + len(hospitals), "seconds": time.perf_counter() - start}
+
+    cases: Dict[str, tuple] = {
+        "doctor_full_ranking": (
+            size,
+            lambda: np.argsort(
+                -doctor_scores_batch(SEVERITY, doctor_cols, PATIENT_LOC, BUDGET, EMERGENCY_TYPE, adjustments).totals,
+                kind="stable",
+            ),
+        ),
+        "ambulance_full_ranking": (
+            size,
+            lambda: np.argsort(
+                -ambulance_scores_batch(SEVERITY, ambulance_cols, PATIENT_LOC, BUDGET, adjustments).totals,
+                kind="stable",
+            ),
+        ),
+        "hospital_full_ranking": (
+            len(hospitals),
+            lambda: np.argsort(
+                -hospital_scores_batch(
+                    SEVERITY, hospital_cols, PATIENT_LOC, BUDGET, EMERGENCY_TYPE, adjustments
+                ).totals,
+                kind="stable",
+            ),
+        ),
+        "doctor_top_k": (
+            size,
+            lambda: list(
+                rank_doctors_batch(SEVERITY, doctor_cols, PATIENT_LOC, BUDGET, EMERGENCY_TYPE, adjustments, TOP_K)
+            ),
+        ),
+        "ambulance_top_k": (
+            size,
+            lambda: list(rank_ambulances_batch(SEVERITY, ambulance_cols, PATIENT_LOC, BUDGET, adjustments, TOP_K)),
+        ),
+        "hospital_top_k": (
+            len(hospitals),
+            lambda: list(
+                rank_hospitals_batch(SEVERITY, hospital_cols, PATIENT_LOC, EMERGENCY_TYPE, adjustments, TOP_K)
+            ),
+        ),
+        "doctor_listing_scores": (size, lambda: doctor_ai_scores(doctor_cols)),
+        "doctor_contextual": (
+            size,
+            lambda: contextual_order(
+                *doctor_contextual_scores(doctor_cols, "Mumbai", "chest pain", BUDGET), doctor_cols.ids, TOP_K
+            ),
+        ),
+        "ambulance_contextual": (
+            size,
+            lambda: contextual_order(
+                *ambulance_contextual_scores(ambulance_cols, "Mumbai", BUDGET), ambulance_cols.ids, TOP_K
+            ),
+        ),
+    }
+    if size <= reference_max:
+        # The per-row scorers are the reference the vectorized paths must match.
+        cases["doctor_reference_ranking"] = (
+            size,
+            lambda: sorted(
+                (doctor_score(SEVERITY, d, PATIENT_LOC, BUDGET, EMERGENCY_TYPE)["score_total"] for d in doctors),
+                reverse=True,
+            ),
+        )
+        cases["ambulance_reference_ranking"] = (
+            size,
+            lambda: sorted(
+                (ambulance_score(SEVERITY, a, PATIENT_LOC, BUDGET)["score_total"] for a in ambulances), reverse=True
+            ),
+        )
+        cases["hospital_reference_ranking"] = (
+            len(hospitals),
+            lambda: sorted(
+                (hospital_score(SEVERITY, h, PATIENT_LOC, BUDGET, EMERGENCY_TYPE)["score_total"] for h in hospitals),
+                reverse=True,
+            ),
+        )
+
+    for name, (rows, fn) in cases.items():
+        results[name] = measure(fn, rows, repeat)
+    return results
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark provider scoring over synthetic populations.")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="comma separated provider counts")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case")
+    parser.add_argument("--reference-max", type=int, default=10000, help="largest size for the per-row scorers")
+    parser.add_argument("--seed", type=int, default=20260223)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "params": {
+            "severity": SEVERITY,
+            "emergency_type": EMERGENCY_TYPE,
+            "budget": BUDGET,
+            "top_k": TOP_K,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "sizes": {},
+    }
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        report["sizes"][str(size)] = run_size(size, args.repeat, args.reference_max, args.seed)
+        print(f"benchmarked {size} providers", file=sys.stderr)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
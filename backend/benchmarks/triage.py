@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List
+import argparse
+import json
+import platform
+import random
+import sys
+
+from app.services.triage_engine import (
+    ACUTE_WORDS,
+    EMERGENCY_TYPE_KEYWORDS,
+    HIGH_RISK_PHRASES,
+    MEDICATIONS,
+    RISK_FACTORS,
+    rule_based_triage,
+)
+from benchmarks.scoring import measure
+
+FILLER = ["patient", "reports", "since", "morning", "mild", "was", "walking", "home", "and", "felt", "dizzy", "today"]
+VITALS = ["bp 150/95", "hr 118", "spo2 91", "for 3 hours", "2 days"]
+
+
+def complaint(length: int, rng: random.Random) -> str:
+    terms = HIGH_RISK_PHRASES + ACUTE_WORDS + RISK_FACTORS + MEDICATIONS
+    terms += [keyword for keywords in EMERGENCY_TYPE_KEYWORDS.values() for keyword in keywords]
+    words: List[str] = []
+    size = 0
+    while size < length:
+        roll = rng.random()
+        word = rng.choice(terms) if roll < 0.05 else rng.choice(VITALS) if roll < 0.07 else rng.choice(FILLER)
+        if rng.random() < 0.1:
+            word += ","
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark rule-based triage on long complaint texts.")
+    parser.add_argument("--lengths", default="200,2000,20000,200000", help="comma separated complaint lengths")
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per length")
+    parser.add_argument("--seed", type=int, default=20260223)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"repeat": args.repeat, "seed": args.seed},
+        "lengths": {},
+    }
+    for length in (int(s) for s in args.lengths.split(",") if s.strip()):
+        text = complaint(length, rng)
+        result = measure(lambda: rule_based_triage(text), length, args.repeat)
+        result["chars_per_second"] = result.pop("rows_per_second")
+        report["lengths"][str(length)] = result
+        print(f"benchmarked {length} chars", file=sys.stderr)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep test runs off the development database; must be set before app.core.config is imported.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.api import dispatch
+from app.db.models import Emergency, EmergencyAssignment, ProviderReservation
+from app.db.session import SessionLocal
+from app.main import app
+
+
+def _open_emergency(latitude: float) -> str:
+    with SessionLocal() as db:
+        emergency = Emergency(severity="HIGH", severity_score=70, latitude=latitude, longitude=72.8777)
+        db.add(emergency)
+        db.commit()
+        return emergency.id
+
+
+def test_emergency_dispatched_elsewhere_mid_batch_is_not_assigned_twice():
+    with TestClient(app) as client:
+        contested = _open_emergency(19.08)
+        free = _open_emergency(19.09)
+
+        plan_batch = dispatch.plan_batch
+        planned = {}
+
+        def plan_then_dispatch_elsewhere(*args, **kwargs):
+            # A manual /dispatch commits between the batch reading the emergency as OPEN and writing it.
+            plan = plan_batch(*args, **kwargs)
+            planned.update({pair.emergency.id: pair.ambulance_id for pair in plan.pairs})
+            with SessionLocal() as db:
+                db.get(Emergency, contested).status = "DISPATCHED"
+                db.commit()
+            return plan
+
+        dispatch.plan_batch = plan_then_dispatch_elsewhere
+        try:
+            response = client.post("/dispatch/batch", json={"window_minutes": 5})
+        finally:
+            dispatch.plan_batch = plan_batch
+
+    assert response.status_code == 200
+    body = response.json()
+    assigned = {a["emergency_id"] for a in body["assignments"]}
+    assert contested in planned and free in planned
+    assert contested not in assigned
+    assert contested in body["unassigned"]
+    assert free in assigned
+
+    with SessionLocal() as db:
+        assert not db.scalars(select(EmergencyAssignment).where(EmergencyAssignment.emergency_id == contested)).all()
+        held = db.scalars(
+            select(ProviderReservation).where(
+                ProviderReservation.provider_type == "AMBULANCE",
+                ProviderReservation.provider_id == planned[contested],
+                ProviderReservation.status == "ACTIVE",
+            )
+        ).all()
+        assert not held
+        assert db.get(Emergency, free).status == "DISPATCHED"
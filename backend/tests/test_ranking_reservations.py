@@ -0,0 +1,160 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.db.models import Ambulance, Emergency
+from app.db.session import SessionLocal
+from app.main import app
+from app.services import reservations
+from app.services.batch_scoring import AmbulanceColumns
+from app.services.provider_snapshot import ProviderTable
+
+
+def _open_emergency() -> str:
+    with SessionLocal() as db:
+        emergency = Emergency(severity="CRITICAL", severity_score=90, latitude=19.076, longitude=72.8777)
+        db.add(emergency)
+        db.commit()
+        return emergency.id
+
+
+def _ranked_ids(client: TestClient, emergency_id: str, max_results: int = 10) -> list[int]:
+    response = client.post(
+        "/rank/ambulances",
+        json={"emergency_id": emergency_id, "budget": 5000, "severity": "CRITICAL", "max_results": max_results},
+    )
+    assert response.status_code == 200
+    return [ambulance["id"] for ambulance in response.json()["ambulances"]]
+
+
+def _claim(ambulance_ids: list[int]) -> list:
+    with SessionLocal() as db:
+        claimed = [reservations.claim(db, "AMBULANCE", ambulance_id, holder="test") for ambulance_id in ambulance_ids]
+        db.commit()
+        reservations.publish(claimed)
+        return [reservation.id for reservation in claimed]
+
+
+def _release(reservation_ids: list) -> None:
+    with SessionLocal() as db:
+        released = reservations.release(db, [db.get(reservations.ProviderReservation, rid) for rid in reservation_ids])
+        db.commit()
+        reservations.publish(released)
+
+
+def test_claimed_ambulance_drops_out_of_ranking():
+    with TestClient(app) as client:
+        emergency_id = _open_emergency()
+        ranked = _ranked_ids(client, emergency_id)
+        assert ranked
+        top = ranked[0]
+
+        held = _claim([top])
+        assert top not in _ranked_ids(client, emergency_id)
+
+        _release(held)
+        assert top in _ranked_ids(client, emergency_id)
+
+
+def test_ranking_stays_full_when_the_nearest_fleet_is_reserved():
+    with TestClient(app) as client:
+        emergency_id = _open_emergency()
+        first = _ranked_ids(client, emergency_id, max_results=50)
+        assert len(first) == 50
+
+        held = _claim(first)
+        try:
+            second = _ranked_ids(client, emergency_id, max_results=50)
+            assert len(second) == 50
+            assert not set(second) & set(first)
+        finally:
+            _release(held)
+
+
+def test_claim_leaves_the_roster_flag_alone():
+    with SessionLocal() as db:
+        off_shift = db.scalars(select(Ambulance).where(Ambulance.is_available.is_(False))).first()
+        reservation = reservations.claim(db, "AMBULANCE", off_shift.id, holder="test")
+        db.commit()
+        db.refresh(off_shift)
+        assert off_shift.is_available is False
+
+        try:
+            reservations.claim(db, "AMBULANCE", off_shift.id, holder="second")
+            raise AssertionError("second claim should fail")
+        except reservations.ProviderUnavailable:
+            pass
+        # The failed claim only rolls back its savepoint; the caller's transaction is still usable.
+        reservations.release(db, [reservation])
+        db.commit()
+        assert reservations.claim(db, "AMBULANCE", off_shift.id, holder="third") is not None
+        db.rollback()
+
+
+def _unit(ambulance_id: int, latitude: float) -> Ambulance:
+    return Ambulance(
+        id=ambulance_id,
+        city="Mumbai",
+        latitude=latitude,
+        longitude=72.8777,
+        response_time_minutes=10,
+        response_time_seconds=0,
+        availability_status="AVAILABLE",
+        is_available=True,
+        rating=4.0,
+        verified_status=True,
+        vehicle_type="ALS",
+        has_icu=False,
+        has_ventilator=False,
+        has_oxygen=True,
+        driver_score=85.0,
+        base_price=500.0,
+        cost_per_km=20.0,
+    )
+
+
+def _fleet(near: int, far: int) -> ProviderTable:
+    rows = [_unit(i + 1, 19.076 + i * 0.001) for i in range(near)]
+    rows += [_unit(near + i + 1, 19.676 + i * 0.001) for i in range(far)]
+    return ProviderTable(AmbulanceColumns.from_rows(rows))
+
+
+def test_reserved_rows_do_not_count_towards_min_candidates():
+    table = _fleet(near=10, far=10)
+    for provider_id in range(1, 9):
+        table.set_reserved(provider_id, True)
+
+    # 30 km holds only the 10 near units, 8 of them reserved; the search has to widen to find 10 free ones.
+    found = table.nearby(None, (19.076, 72.8777), 30.0, 10, skip_reserved=True)
+    ids = set(found.ids.tolist())
+    assert len(ids) == 12
+    assert not ids & set(range(1, 9))
+
+    assert len(table.nearby(None, (19.076, 72.8777), 30.0, 10)) == 10
+
+
+def test_fallback_without_location_skips_reserved_rows():
+    table = _fleet(near=5, far=0)
+    table.set_reserved(3, True)
+    assert table.nearby("Mumbai", (0.0, 0.0), 30.0, 10, skip_reserved=True).ids.tolist() == [1, 2, 4, 5]
+    assert table.nearby(None, (0.0, 0.0), 30.0, 10, skip_reserved=True).ids.tolist() == [1, 2, 4, 5]
+
+
+def test_rank_all_runs_inline_when_the_pool_is_busy():
+    import threading
+
+    from app.api import ranking
+
+    with TestClient(app) as client:
+        emergency_id = _open_emergency()
+        payload = {"emergency_id": emergency_id, "budget": 5000, "severity": "CRITICAL", "max_results": 5}
+        pooled = client.post("/rank/all", json=payload).json()
+
+        slots, ranking._executor_slots = ranking._executor_slots, threading.BoundedSemaphore(1)
+        ranking._executor_slots.acquire()
+        try:
+            inline = client.post("/rank/all", json=payload).json()
+        finally:
+            ranking._executor_slots = slots
+
+        for kind in ("doctors", "ambulances", "hospitals"):
+            assert [row["id"] for row in inline[kind][kind]] == [row["id"] for row in pooled[kind][kind]]
@@ -0,0 +1,67 @@
+import time
+
+from sqlalchemy import select
+
+from app.db.models import Base, RankingScore
+from app.db.session import SessionLocal, engine
+from app.services.ranking_writer import RankingScoreWriter, ranking_record
+
+
+class FlakyWriter(RankingScoreWriter):
+    def __init__(self, failures: int, **kwargs) -> None:
+        super().__init__(mode="async", queue_size=100, batch_size=50, flush_seconds=0.01, **kwargs)
+        self.failures = failures
+
+    def _write(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        super()._write(batch)
+
+
+def setup_function():
+    Base.metadata.create_all(bind=engine)
+
+
+def _records(emergency_id: str, n: int = 3):
+    return [ranking_record(emergency_id, "doctor", target_id, 80.0, {"distance": 90.0}) for target_id in range(1, n + 1)]
+
+
+def _stored(emergency_id: str) -> int:
+    with SessionLocal() as db:
+        return len(db.scalars(select(RankingScore).where(RankingScore.emergency_id == emergency_id)).all())
+
+
+def _wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_failed_batch_stays_pending_until_written():
+    writer = FlakyWriter(failures=4, retries=3)
+    writer.start()
+    try:
+        with SessionLocal() as db:
+            writer.submit(db, _records("flaky"))
+        assert writer.pending("flaky", "doctor", 1) is not None
+        assert _wait_until(lambda: _stored("flaky") == 3)
+        assert writer.pending("flaky", "doctor", 1) is None
+    finally:
+        writer.stop()
+
+
+def test_rows_are_dropped_after_bounded_retries():
+    writer = FlakyWriter(failures=10_000, retries=2)
+    writer.start()
+    try:
+        with SessionLocal() as db:
+            writer.submit(db, _records("broken"))
+        assert _wait_until(lambda: writer.pending("broken", "doctor", 1) is None)
+        assert writer._queue.empty()
+        assert _stored("broken") == 0
+    finally:
+        writer.stop()
@@ -0,0 +1,196 @@
+import random
+
+from app.db.models import Ambulance, Doctor, Hospital, HospitalSpecialization
+from app.services.batch_scoring import (
+    AmbulanceColumns,
+    DoctorColumns,
+    HospitalColumns,
+    ambulance_scores_batch,
+    doctor_scores_batch,
+    hospital_scores_batch,
+    rank_ambulances_batch,
+    rank_doctors_batch,
+    rank_hospitals_batch,
+)
+from app.services.scoring_engine import (
+    EMERGENCY_SPECIALTY_MAP,
+    SEVERITY_WEIGHTS_AMBULANCE,
+    SEVERITY_WEIGHTS_DOCTOR,
+    SEVERITY_WEIGHTS_HOSPITAL,
+    ambulance_score,
+    doctor_score,
+    hospital_score,
+)
+
+SEVERITIES = ["LOW", "MODERATE", "HIGH", "CRITICAL", "UNKNOWN"]
+EMERGENCY_TYPES = list(EMERGENCY_SPECIALTY_MAP) + ["Unlisted"]
+CATEGORIES = ["Cardiologist", "Neurologist", "Orthopedic", "General Physician", "Pulmonologist", "Pediatrician"]
+STATUSES = ["Online", "Offline", "AVAILABLE", "ON_CALL", "BUSY", "24x7", None]
+PATIENT = (19.076, 72.8777)
+
+
+def _location(rng: random.Random):
+    # A few providers have no coordinates, which the scorers treat as distance 0.
+    if rng.random() < 0.05:
+        return 0.0, 0.0
+    return PATIENT[0] + rng.uniform(-0.4, 0.4), PATIENT[1] + rng.uniform(-0.4, 0.4)
+
+
+def _doctors(rng: random.Random, n: int):
+    doctors = []
+    for i in range(n):
+        lat, lng = _location(rng)
+        doctors.append(
+            Doctor(
+                id=i + 1,
+                name=f"d{i}",
+                category=rng.choice(CATEGORIES),
+                city=rng.choice(["Mumbai", "Pune"]),
+                experience_years=rng.randint(0, 35),
+                rating=round(rng.uniform(1, 5), 1),
+                reviews_count=rng.randint(0, 900),
+                rating_count=rng.choice([0, rng.randint(1, 900)]),
+                total_patients_served=rng.randint(0, 5000),
+                response_time_minutes=rng.randint(1, 40),
+                response_time_seconds=rng.choice([0, rng.randint(1, 2400)]),
+                verified_status=rng.random() < 0.5,
+                availability_status=rng.choice(STATUSES),
+                is_available=rng.random() < 0.7,
+                consultation_fee=rng.choice([0.0, round(rng.uniform(100, 3000), 2)]),
+                success_rate=rng.uniform(60, 105),
+                latitude=lat,
+                longitude=lng,
+            )
+        )
+    return doctors
+
+
+def _ambulances(rng: random.Random, n: int):
+    ambulances = []
+    for i in range(n):
+        lat, lng = _location(rng)
+        ambulances.append(
+            Ambulance(
+                id=i + 1,
+                provider_name=f"a{i}",
+                city=rng.choice(["Mumbai", "Pune"]),
+                vehicle_type=rng.choice(["BLS", "ALS", "ICU", "Ventilator"]),
+                response_time_minutes=rng.randint(1, 40),
+                response_time_seconds=rng.choice([0, rng.randint(1, 2400)]),
+                cost_per_km=round(rng.uniform(10, 60), 2),
+                base_price=round(rng.uniform(200, 3000), 2),
+                availability_status=rng.choice(STATUSES),
+                rating=round(rng.uniform(1, 5), 1),
+                verified_status=rng.random() < 0.5,
+                driver_score=rng.uniform(50, 110),
+                has_icu=rng.random() < 0.3,
+                has_oxygen=rng.random() < 0.8,
+                has_ventilator=rng.random() < 0.2,
+                is_available=rng.random() < 0.7,
+                latitude=lat,
+                longitude=lng,
+            )
+        )
+    return ambulances
+
+
+def _hospitals(rng: random.Random, n: int):
+    hospitals = []
+    for i in range(n):
+        lat, lng = _location(rng)
+        hospital = Hospital(
+            id=i + 1,
+            name=f"h{i}",
+            city=rng.choice(["Mumbai", "Pune"]),
+            icu_beds_available=rng.randint(0, 40),
+            emergency_wait_minutes=rng.randint(0, 80),
+            success_rate=rng.uniform(60, 105),
+            avg_cost_index=rng.uniform(0.3, 2.5),
+            is_available=rng.random() < 0.8,
+            latitude=lat,
+            longitude=lng,
+        )
+        for name in rng.sample(EMERGENCY_TYPES, rng.randint(0, 3)):
+            hospital.specializations.append(HospitalSpecialization(specialization=name))
+        hospitals.append(hospital)
+    return hospitals
+
+
+def _adjustments(rng: random.Random, keys):
+    # Generous multipliers so some totals hit the 100 cap.
+    return {key: rng.uniform(0.7, 1.6) for key in keys if rng.random() < 0.8}
+
+
+def _adjusted_total(breakdown: dict, weights: dict, adjustments: dict) -> float:
+    # The per-row path as the ranking endpoints applied it before the batch engine.
+    total = 0.0
+    for key, weight in weights.items():
+        if key in breakdown:
+            total += breakdown[key] * weight * adjustments.get(key, 1.0)
+    return round(min(100.0, total), 2)
+
+
+def _assert_rows_match(batch, rows, scalar_results, weights, adjustments):
+    assert len(batch) == len(rows)
+    for idx, result in enumerate(scalar_results):
+        assert batch.breakdown(idx) == result["breakdown"]
+        assert float(batch.distance_km[idx]) == result["distance_km"]
+        assert float(batch.totals[idx]) == _adjusted_total(result["breakdown"], weights, adjustments)
+
+
+def _full_sort(totals, ids, k):
+    return sorted(range(len(ids)), key=lambda idx: (-float(totals[idx]), int(ids[idx])))[:k]
+
+
+def _assert_top_k_matches(ranked, full, columns, k):
+    expected = [(int(columns.ids[idx]), float(full.totals[idx])) for idx in _full_sort(full.totals, columns.ids, k)]
+    assert [(target_id, score) for target_id, score, _breakdown in ranked] == expected
+
+
+def test_doctor_batch_matches_per_row_scores():
+    rng = random.Random(1)
+    doctors = _doctors(rng, 400)
+    columns = DoctorColumns.from_rows(doctors)
+    for severity in SEVERITIES:
+        weights = SEVERITY_WEIGHTS_DOCTOR.get(severity, SEVERITY_WEIGHTS_DOCTOR["LOW"]).__dict__
+        for emergency_type in ("Cardiac", "Trauma", "Unlisted"):
+            budget = rng.choice([0.0, 500.0, 2500.0])
+            adjustments = _adjustments(rng, weights)
+            batch = doctor_scores_batch(severity, columns, PATIENT, budget, emergency_type, adjustments)
+            scalar = [doctor_score(severity, d, PATIENT, budget, emergency_type) for d in doctors]
+            _assert_rows_match(batch, doctors, scalar, weights, adjustments)
+            for k in (1, 10, 50):
+                ranked = rank_doctors_batch(severity, columns, PATIENT, budget, emergency_type, adjustments, k)
+                _assert_top_k_matches(ranked, batch, columns, k)
+
+
+def test_ambulance_batch_matches_per_row_scores():
+    rng = random.Random(2)
+    ambulances = _ambulances(rng, 400)
+    columns = AmbulanceColumns.from_rows(ambulances)
+    for severity in SEVERITIES:
+        weights = SEVERITY_WEIGHTS_AMBULANCE.get(severity, SEVERITY_WEIGHTS_AMBULANCE["LOW"])
+        budget = rng.choice([0.0, 800.0, 4000.0])
+        adjustments = _adjustments(rng, weights)
+        batch = ambulance_scores_batch(severity, columns, PATIENT, budget, adjustments)
+        scalar = [ambulance_score(severity, a, PATIENT, budget) for a in ambulances]
+        _assert_rows_match(batch, ambulances, scalar, weights, adjustments)
+        for k in (1, 10, 50):
+            ranked = rank_ambulances_batch(severity, columns, PATIENT, budget, adjustments, k)
+            _assert_top_k_matches(ranked, batch, columns, k)
+
+
+def test_hospital_batch_matches_per_row_scores():
+    rng = random.Random(3)
+    hospitals = _hospitals(rng, 400)
+    columns = HospitalColumns.from_rows(hospitals)
+    for severity in SEVERITIES:
+        weights = SEVERITY_WEIGHTS_HOSPITAL.get(severity, SEVERITY_WEIGHTS_HOSPITAL["LOW"])
+        for emergency_type in ("Cardiac", "Neuro", "Unlisted"):
+            adjustments = _adjustments(rng, weights)
+            batch = hospital_scores_batch(severity, columns, PATIENT, 0.0, emergency_type, adjustments)
+            scalar = [hospital_score(severity, h, PATIENT, 0.0, emergency_type) for h in hospitals]
+            _assert_rows_match(batch, hospitals, scalar, weights, adjustments)
+            for k in (1, 10, 50):
+                ranked = rank_hospitals_batch(severity, columns, PATIENT, emergency_type, adjustments, k)
+                _assert_top_k_matches(ranked, batch, columns, k)
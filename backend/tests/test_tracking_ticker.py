@@ -0,0 +1,63 @@
+import asyncio
+
+from app.services.websocket_manager import TrackingConnectionManager
+
+
+class FakeSocket:
+    def __init__(self) -> None:
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_json(self, payload: dict) -> None:
+        self.sent.append(payload)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+
+
+def _ticker(failures: int):
+    calls = {"n": 0}
+
+    async def tick(tracking_id: int):
+        calls["n"] += 1
+        if calls["n"] <= failures:
+            raise RuntimeError("database unavailable")
+        return {"tracking_id": tracking_id, "tick": calls["n"]}
+
+    return tick
+
+
+async def _watch(manager: TrackingConnectionManager, tick, sockets, seconds: float = 0.05):
+    for ws in sockets:
+        await manager.connect(7, ws)
+        manager.subscribe(7, tick)
+    await asyncio.sleep(seconds)
+
+
+def test_ticker_survives_transient_failures():
+    manager = TrackingConnectionManager(interval_seconds=0.001, max_failures=3)
+    viewers = [FakeSocket(), FakeSocket()]
+
+    async def scenario():
+        await _watch(manager, _ticker(failures=2), viewers)
+        for ws in viewers:
+            manager.disconnect(7, ws)
+
+    asyncio.run(scenario())
+    for ws in viewers:
+        assert ws.sent and ws.sent[0] == {"tracking_id": 7, "tick": 3}
+        assert ws.closed_with is None
+
+
+def test_ticker_closes_viewers_after_repeated_failures():
+    manager = TrackingConnectionManager(interval_seconds=0.001, max_failures=3)
+    viewers = [FakeSocket(), FakeSocket()]
+
+    asyncio.run(_watch(manager, _ticker(failures=100), viewers))
+    for ws in viewers:
+        assert ws.sent == [{"error": "Tracking updates unavailable"}]
+        assert ws.closed_with == 1011
+    assert manager.stats() == {"tracking_ids": 0, "subscribers": 0, "tickers": 0}
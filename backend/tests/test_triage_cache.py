@@ -0,0 +1,166 @@
+import asyncio
+import re
+
+from app.services import triage_engine
+from app.services.triage_engine import (
+    EMERGENCY_TYPE_KEYWORDS,
+    HIGH_RISK_PHRASES,
+    HOSPITAL_TYPE_MAP,
+    SPECIALTY_MAP,
+    complaint_digest,
+    llm_triage_cache,
+    rule_based_triage,
+    rule_triage_cache,
+    triage,
+)
+
+WHITESPACE_COMPLAINTS = [
+    "Patient has chest  pain, sweating",
+    "not\nbreathing since 5 minutes",
+    "Severe\theadache; BP 150 / 90",
+    "slurred   speech",
+    "  sudden\tcollapse ,  diabetic;\n\nhr 120 spo2 88  ",
+    "shortness of\r\nbreath, aspirin,   metformin, 3   days",
+    "left arm weakness\t\t; loss of  consciousness",
+]
+
+
+def _baseline_rules(text: str) -> dict:
+    # The rule engine as it was before triage caching, kept verbatim as the reference output.
+    lowered = text.lower()
+    risk_flags = [phrase for phrase in HIGH_RISK_PHRASES if phrase in lowered]
+    emergency_type = "Other"
+    for candidate, keywords in EMERGENCY_TYPE_KEYWORDS.items():
+        if any(keyword in lowered for keyword in keywords):
+            emergency_type = candidate
+            break
+    score = 20
+    if any(word in lowered for word in ["severe", "unconscious", "bleeding", "breathing", "stroke", "heart"]):
+        score += 35
+    if any(word in lowered for word in ["sudden", "intense", "unbearable", "collapse"]):
+        score += 20
+    if risk_flags:
+        score += 30
+    score = min(100, score)
+    severity = "CRITICAL" if score >= 85 else "HIGH" if score >= 65 else "MODERATE" if score >= 40 else "LOW"
+
+    duration = re.search(r"(\d+)\s*(minutes|minute|hours|hour|days|day|weeks|week)", lowered)
+    bp = re.search(r"(\d{2,3})\s*/\s*(\d{2,3})", lowered)
+    hr = re.search(r"hr\s*(\d{2,3})", lowered)
+    spo2 = re.search(r"spo2\s*(\d{2,3})", lowered)
+    entities = {
+        "symptoms": [s.strip() for s in re.split(r"[,;]", lowered) if s.strip()][:8],
+        "duration": duration.group(0) if duration else "unknown",
+        "vitals": {
+            "bp": f"{bp.group(1)}/{bp.group(2)}" if bp else None,
+            "hr": hr.group(1) if hr else None,
+            "spo2": spo2.group(1) if spo2 else None,
+        },
+        "risk_factors": [rf for rf in ["diabetes", "hypertension", "smoker", "obese"] if rf in lowered],
+        "medications": [med for med in ["aspirin", "insulin", "metformin", "statin"] if med in lowered],
+    }
+    return {
+        "severity": severity,
+        "severity_score": score,
+        "emergency_type": emergency_type,
+        "entities": entities,
+        "recommended": {
+            "doctor_specialty": SPECIALTY_MAP.get(emergency_type, "General Physician"),
+            "ambulance_priority": "CRITICAL" if severity == "CRITICAL" else "HIGH" if severity == "HIGH" else "NORMAL",
+            "hospital_type": HOSPITAL_TYPE_MAP.get(emergency_type, "General"),
+        },
+        "risk_flags": risk_flags,
+        "escalation": {
+            "triggered": bool(risk_flags) or severity in {"HIGH", "CRITICAL"},
+            "reason": ", ".join(risk_flags) if risk_flags else "Severity threshold",
+        },
+        "confidence": 0.72 if risk_flags else 0.62,
+    }
+
+
+def _without_source(result: dict) -> dict:
+    return {key: value for key, value in result.items() if key != "triage_source"}
+
+
+class FakeLlm:
+    enabled = True
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def triage(self, text: str):
+        self.calls += 1
+        return {
+            "severity": "HIGH",
+            "severity_score": 70,
+            "emergency_type": "Cardiac",
+            "entities": {"symptoms": ["crushing chest pain"], "duration": "20 minutes", "source": "model"},
+            "recommended": {"doctor_specialty": "Cardiologist"},
+            "risk_flags": ["chest pain"],
+            "confidence": 0.9,
+        }
+
+
+def setup_function():
+    rule_triage_cache.clear()
+    llm_triage_cache.clear()
+
+
+def test_punctuation_that_changes_the_rules_changes_the_key():
+    hyphenated = "patient not-breathing"
+    spaced = "patient not breathing"
+    assert rule_based_triage(hyphenated)["severity"] != rule_based_triage(spaced)["severity"]
+    assert complaint_digest(hyphenated) != complaint_digest(spaced)
+
+    first = asyncio.run(triage(hyphenated))
+    second = asyncio.run(triage(spaced))
+    assert first["severity"] == rule_based_triage(hyphenated)["severity"]
+    assert second["severity"] == rule_based_triage(spaced)["severity"]
+    assert second["risk_flags"] == ["not breathing"]
+
+
+def test_whitespace_is_part_of_the_key():
+    assert complaint_digest("Chest pain since MORNING") == complaint_digest("chest pain since morning")
+    assert complaint_digest("chest  pain") != complaint_digest("chest pain")
+
+
+def test_rules_match_the_baseline_on_irregular_whitespace():
+    for text in WHITESPACE_COMPLAINTS:
+        assert _without_source(rule_based_triage(text)) == _baseline_rules(text), text
+
+
+def test_cached_results_match_the_baseline():
+    for text in WHITESPACE_COMPLAINTS:
+        miss = asyncio.run(triage(text))
+        hit = asyncio.run(triage(text))
+        assert _without_source(miss) == _without_source(hit) == _baseline_rules(text), text
+
+
+def test_cache_holds_no_complaint_text():
+    text = "sudden chest pain, sweating, smoker"
+    result = asyncio.run(triage(text))
+    cached = rule_triage_cache.get(complaint_digest(text))
+    assert "entities" not in cached
+    assert "sweating" not in repr(cached)
+
+    hit = asyncio.run(triage(text.upper()))
+    assert hit["entities"] == result["entities"]
+    assert {k: v for k, v in hit.items() if k != "entities"} == {k: v for k, v in result.items() if k != "entities"}
+
+
+def test_llm_hit_returns_the_llm_entities_without_caching_them_in_clear():
+    text = "Crushing chest pain for 20 minutes"
+    fake = FakeLlm()
+    original = triage_engine.llm_client
+    triage_engine.llm_client = fake
+    try:
+        miss = asyncio.run(triage(text))
+        hit = asyncio.run(triage(text))
+    finally:
+        triage_engine.llm_client = original
+    assert fake.calls == 1
+    assert hit == miss
+    assert hit["entities"]["source"] == "model"
+    cached = llm_triage_cache.get(complaint_digest(text))
+    assert "entities" not in cached
+    assert "crushing" not in repr(cached)